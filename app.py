@@ -1,6 +1,30 @@
+import os
+import tempfile
+import time
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-from scoring import calc_all_players_from_html  # uses your existing logic
+from batch import (  # runs your existing parser/scorer per file
+    ReorderBuffer,
+    make_pool,
+    score_matches,
+)
+from export import EXTENSIONS, MEDIA_TYPES, SLIM_COLUMNS, open_export
+from match_cache import MatchTableCache
+from leaderboards import Leaderboards
+from player_index import PlayerIndex
+from profiling import PipelineProfile
+from scoring import build_stat_matrix
+from scoring_service import DEFAULT_SERVICE_URL, ScoringClient
+from watch_folder import FolderWatcher
+from season_store import SeasonStore, match_metadata
+from scoring_rules import (
+    DEFAULT_RULES,
+    rules_to_frame,
+    rules_with_weights,
+    score_stat_matrix_rule_sets,
+)
 
 st.set_page_config(page_title="Fantasy Soccer Scoring", layout="wide")
 
@@ -13,6 +37,32 @@ We'll calculate scores for every match and give you **one combined CSV** of all
 """
 )
 
+@st.cache_resource
+def get_table_cache():
+    # parsed tables survive reruns, so re-clicking "Calculate Scores" skips the HTML parse
+    return MatchTableCache()
+
+
+@st.cache_resource
+def get_worker_pool():
+    # bounded pool of warm worker processes, shared across reruns
+    return make_pool()
+
+
+@st.cache_resource
+def get_scoring_client():
+    # with HFW_SCORING_SERVICE set, matches are scored by the shared
+    # scoring service (see scoring_service.py) instead of a local pool
+    return ScoringClient(DEFAULT_SERVICE_URL) if DEFAULT_SERVICE_URL else None
+
+
+@st.cache_resource
+def get_folder_watcher(folder: str):
+    # one background watcher per folder, kept across reruns; its combined
+    # CSV and state live in the folder, so restarts only score new files
+    return FolderWatcher(folder, output=os.path.join(folder, "hfw-scores.csv")).start()
+
+
 # Multi-file uploader: user can pick 1 to N HTML files
 uploaded_files = st.file_uploader(
     "Upload FBref match HTML files",
@@ -20,50 +70,317 @@ uploaded_files = st.file_uploader(
     accept_multiple_files=True,
 )
 
+with st.expander("Performance options"):
+    collect_perf = st.checkbox("Record per-stage timings", value=False)
+    profile_memory = st.checkbox(
+        "Also record Python-heap memory peaks (slower)", value=False, disabled=not collect_perf
+    )
+
+
+def _stored_match(df_full: pd.DataFrame, meta: dict) -> dict:
+    # kept per file for the session: slim rows plus the stat matrix for
+    # what-if rescoring; the wide full frame is dropped once handled.
+    # Squad (the club) stays: the player index keys identities on it
+    slim = ["Player", "Team", "pos", "score"] + [
+        c for c in ("Squad", "player_id") if c in df_full
+    ]
+    return {
+        "df": df_full[slim].copy(),
+        "mat": build_stat_matrix(df_full),
+        "pos": df_full["pos"].to_numpy(),
+        "meta": meta,
+    }
+
+
+def _new_download_file(fmt: str) -> str:
+    # the combined download is written to disk match by match (one Parquet
+    # row group / Arrow record batch each) instead of built in memory
+    old = st.session_state.pop("download_path", None)
+    if old and os.path.exists(old):
+        os.remove(old)
+    fd, path = tempfile.mkstemp(prefix="hfw-scores-", suffix=EXTENSIONS[fmt])
+    os.close(fd)
+    os.remove(path)  # Parquet / Arrow writers create the file themselves
+    st.session_state["download_path"] = path
+    st.session_state["download_format"] = fmt
+    return path
+
+
+# file hash -> parsed match, kept for the whole browser session
+matches = st.session_state.setdefault("matches", {})
+# season views over every match scored this session, updated per match
+boards = st.session_state.setdefault("leaderboards", Leaderboards())
+# player id / normalized name -> rows in the matches above, for lookups
+players = st.session_state.setdefault("player_index", PlayerIndex())
+
+save_to_store = st.checkbox(
+    "💾 Also add new matches to the season store", value=False,
+    help="Stat columns are written to the season store as each match finishes.",
+)
+keep_all_stats = st.checkbox(
+    "Keep every FBref stat column (for auditing; slower)", value=False,
+    disabled=not save_to_store,
+    help="By default only the stats the scoring formulas read are parsed and stored.",
+)
+
+export_formats = {"CSV": "csv", "Parquet": "parquet", "Arrow IPC (Feather)": "arrow"}
+with st.expander("Download options"):
+    export_fmt = export_formats.get(st.selectbox("Download format", list(export_formats)), "csv")
+    export_full = st.checkbox(
+        "Include every stat column", value=False,
+        help="Parquet and Arrow keep each column's type; CSV turns everything into text.",
+    )
+
 if st.button("Calculate Scores"):
     if not uploaded_files:
         st.warning("Please upload at least one HTML file.")
     else:
-        all_results = []
-        for i, f in enumerate(uploaded_files, start=1):
-            try:
-                st.write(f"📄 Processing file {i}: **{f.name}**")
-                # Read file content and decode to text
-                html_bytes = f.read()
-                html_text = html_bytes.decode("utf-8", errors="ignore")
+        uploads = [(MatchTableCache.key(f.getvalue()), f) for f in uploaded_files]
+        positions = {}  # file hash -> upload positions (a file may be uploaded twice)
+        for i, (key, _) in enumerate(uploads):
+            positions.setdefault(key, []).append(i)
 
-                # Use your existing parser/scorer
-                df_match = calc_all_players_from_html(html_text)
+        # Files parsed earlier in this session are reused from memory; the
+        # rest run in a pool of worker processes and come back as each file
+        # finishes. Uploads are read lazily, a few at a time. Full-stat
+        # exports need every wide frame again, which the parse cache makes cheap.
+        todo_keys = [key for key in positions if export_full or key not in matches]
+        items = (
+            (uploads[positions[key][0]][1].name, uploads[positions[key][0]][1].getvalue())
+            for key in todo_keys
+        )
 
-                # Tag with match/source name so you know which game it was
-                df_match["Match"] = f.name
+        progress = st.progress(0.0, text=f"Scoring {len(uploads)} file(s)…")
+        # any click reruns the script, which stops this run and cancels
+        # files that have not started yet; finished matches are kept
+        st.button("⏹ Cancel")
+        results_area = st.container()
 
-                all_results.append(df_match)
+        # rows are appended to the download in upload order; the reorder
+        # buffer only holds matches that finished ahead of an earlier one
+        sink = open_export(_new_download_file(export_fmt), export_fmt, full=export_full)
+        order = ReorderBuffer()
+        loaded = st.session_state["loaded"] = []
+        done_files = 0
+        wide = {}  # file hash -> full frame, only until its rows are written
 
-            except Exception as e:
-                st.error(f"❌ Error processing {f.name}: {e}")
+        def release(ready):
+            for i, key in ready:
+                if key is None:
+                    continue
+                name = uploads[i][1].name
+                df = wide[key] if export_full else matches[key]["df"]
+                sink.write(df.assign(Match=name).sort_values("score", ascending=False))
+                if export_full and i == positions[key][-1]:
+                    del wide[key]
+                loaded.append((key, name))
 
-        if not all_results:
-            st.error("No valid match data found to combine.")
+        for key in positions:
+            if key in matches and not export_full:
+                for i in positions[key]:
+                    results_area.write(f"♻️ Already loaded: **{uploads[i][1].name}**")
+                    release(order.push(i, key))
+                    done_files += 1
+
+        perf = PipelineProfile()
+        store = SeasonStore() if save_to_store else None
+        all_stats = save_to_store and keep_all_stats
+        client = get_scoring_client()
+        if client is not None:
+            results = client.score_matches(items, full=True, all_stats=all_stats)
         else:
-            combined = pd.concat(all_results, ignore_index=True)
+            results = score_matches(
+                items, cache_dir=get_table_cache().directory, pool=get_worker_pool(),
+                profile=("memory" if profile_memory else True) if collect_perf else False,
+                full=True, all_stats=all_stats,
+            )
+        try:
+            for r in results:
+                key = todo_keys[r.index]
+                if r.error is not None:
+                    results_area.error(f"❌ Error processing {r.name}: {r.error}")
+                    key = None
+                else:
+                    meta = match_metadata(uploads[positions[key][0]][1].getvalue())
+                    if store is not None:
+                        store.add_scored_match(meta, r.df, source=r.name)
+                    matches[key] = _stored_match(r.df, meta)
+                    boards.add_match(meta["match_id"], r.df)
+                    players.add_match(r.name, matches[key]["df"])
+                    if export_full:
+                        wide[key] = r.df
+                    missing = r.df.attrs.get("missing_stats")
+                    if missing:
+                        results_area.warning(
+                            f"⚠️ {r.name}: no column for {', '.join(missing)} – scored as 0."
+                        )
+                    with results_area.expander(f"📄 {r.name}: {len(r.df)} players"):
+                        st.dataframe(
+                            matches[key]["df"].sort_values("score", ascending=False),
+                            use_container_width=True,
+                        )
+                if r.profile:
+                    perf.add(r.profile)
+
+                for i in positions[todo_keys[r.index]]:
+                    release(order.push(i, key))
+                    done_files += 1
+                progress.progress(
+                    done_files / len(uploads),
+                    text=f"Scored {done_files} of {len(uploads)} file(s)",
+                )
+        finally:
+            sink.close()
+            if store is not None:
+                store.close()
+
+        if collect_perf and perf.report():
+            with st.expander("Performance"):
+                st.caption("Summed over all files; flatten_standardise is part of merge.")
+                st.dataframe(perf.to_frame(), use_container_width=True)
+
+        if not loaded:
+            st.error("No valid match data found to combine.")
 
-            st.success(f"✅ Calculated scores for {len(all_results)} match(es).")
+loaded = st.session_state.get("loaded")
+if loaded:
+    combined = pd.concat(
+        [matches[key]["df"].assign(Match=name) for key, name in loaded],
+        ignore_index=True,
+    )[SLIM_COLUMNS]
 
-            # Nice sorted view: by match, then score descending
-            combined_display = combined.sort_values(
-                ["Match", "score"],
-                ascending=[True, False],
-            ).reset_index(drop=True)
+    st.success(f"✅ Calculated scores for {len(loaded)} match(es).")
+    cache_stats = get_table_cache().stats()
+    st.caption(
+        f"Parse cache: {cache_stats['entries']} matches stored "
+        f"({cache_stats['bytes'] / 1e6:.1f} MB)"
+    )
 
-            st.subheader("Combined Player Scores")
-            st.dataframe(combined_display, use_container_width=True)
+    # Nice sorted view: by match, then score descending
+    combined_display = combined.sort_values(
+        ["Match", "score"],
+        ascending=[True, False],
+    ).reset_index(drop=True)
 
-            # Download combined CSV
-            csv = combined_display.to_csv(index=False).encode("utf-8-sig")
+    st.subheader("Combined Player Scores")
+    st.dataframe(combined_display, use_container_width=True)
+
+    # Download the combined file (written incrementally while scoring)
+    download_path = st.session_state.get("download_path")
+    download_fmt = st.session_state.get("download_format", "csv")
+    if download_path and os.path.exists(download_path):
+        label = next(k for k, v in export_formats.items() if v == download_fmt)
+        with open(download_path, "rb") as f:
             st.download_button(
-                label="📥 Download Combined Scores as CSV",
-                data=csv,
-                file_name="fantasy_scores_combined.csv",
-                mime="text/csv",
+                label=f"📥 Download Combined Scores as {label}",
+                data=f,
+                file_name="fantasy_scores_combined" + EXTENSIONS[download_fmt],
+                mime=MEDIA_TYPES[download_fmt],
             )
+
+    # What-if rescoring: edited weights are applied to the stat matrices
+    # kept in memory, so nothing is parsed again
+    with st.expander("🧪 What-if scoring weights"):
+        st.caption(
+            "Edit any weight; every loaded match is rescored from memory. "
+            "Adjustments add their amount when the condition holds."
+        )
+        if st.button("Reset to current formulas"):
+            st.session_state.pop("what_if_weights", None)
+        weights = st.data_editor(
+            rules_to_frame(DEFAULT_RULES),
+            disabled=["pos", "kind", "component", "term"],
+            hide_index=True,
+            use_container_width=True,
+            key="what_if_weights",
+        )
+
+        t0 = time.perf_counter()
+        rules = rules_with_weights(DEFAULT_RULES, weights["weight"].fillna(0.0))
+        # deltas are taken against the same engine under the unedited rules,
+        # so an edit only moves the rows it touches
+        current, what_if = score_stat_matrix_rule_sets(
+            np.vstack([matches[key]["mat"] for key, _ in loaded]),
+            np.concatenate([matches[key]["pos"] for key, _ in loaded]),
+            {"current": DEFAULT_RULES, "what_if": rules},
+        ).T
+        elapsed_ms = 1000 * (time.perf_counter() - t0)
+
+        rescored = combined.assign(what_if=what_if, delta=what_if - current)
+        rescored = rescored.sort_values(
+            ["Match", "what_if"], ascending=[True, False]
+        ).reset_index(drop=True)
+        st.caption(
+            f"Rescored {len(rescored)} players in {elapsed_ms:.1f} ms; "
+            f"{int((rescored['delta'] != 0).sum())} scores changed."
+        )
+        st.dataframe(rescored, use_container_width=True)
+        st.download_button(
+            label="📥 Download What-if Scores as CSV",
+            data=rescored.to_csv(index=False).encode("utf-8-sig"),
+            file_name="fantasy_scores_what_if.csv",
+            mime="text/csv",
+        )
+
+# Leaderboards are kept up to date as matches come in, so showing them
+# never goes back over the combined rows
+if len(boards):
+    with st.expander(f"🏆 Leaderboards ({len(boards)} match(es) this session)"):
+        board_pos = st.selectbox("Position", ["All", "FWD", "MID", "DEF", "GK"])
+        board_pos = None if board_pos in (None, "All") else board_pos
+        st.markdown("**Top scorers**")
+        st.dataframe(boards.top_scorers(board_pos), use_container_width=True)
+        st.markdown(f"**Form – last {boards.form_window} matches**")
+        st.dataframe(boards.form(board_pos), use_container_width=True)
+        st.markdown("**Team totals**")
+        st.dataframe(boards.team_totals(), use_container_width=True)
+
+# Player lookup: ids and accent/case-insensitive names resolve through the
+# index, so nothing is rescanned however many matches are loaded
+if len(players):
+    with st.expander("🔎 Find a player across matches"):
+        query = st.text_input("Player name or FBref id", value="")
+        found = players.resolve(query) if query else []
+        if query and not found:
+            st.warning(f"No player matching '{query}'.")
+        elif found:
+            if len(found) > 1:
+                st.caption("Also matching: " + ", ".join(players.name(i) for i in found[1:]))
+            history = players.history(found[0])
+            st.markdown(
+                f"**{players.name(found[0])}**: {len(history)} match(es), "
+                f"{history['score'].sum():.1f} points"
+            )
+            st.dataframe(history, use_container_width=True)
+
+# Watch mode: matches saved into a folder during a matchday are scored as
+# they appear, without re-uploading (or re-parsing) the earlier ones
+with st.expander("📂 Watch a folder of saved match reports"):
+    st.caption(
+        "New or changed HTML files are scored in the background as soon as "
+        "they finish saving; matches already scored are never parsed again."
+    )
+    watch_dir = st.text_input("Folder", value=os.environ.get("HFW_WATCH_DIR", ""))
+    if watch_dir and not os.path.isdir(watch_dir):
+        st.warning("Folder not found.")
+    elif watch_dir:
+        watcher = get_folder_watcher(os.path.abspath(watch_dir))
+        status = watcher.status()
+        st.caption(
+            f"{status['matches']} match(es) scored, {status['waiting']} still saving, "
+            f"{status['scoring']} being scored ({status['mode']})"
+        )
+        st.button("🔄 Refresh")
+        for rel, error in sorted(watcher.errors.items()):
+            st.error(f"❌ Error processing {rel}: {error}")
+
+        st.dataframe(watcher.combined(), use_container_width=True)
+        # the watcher keeps its combined CSV on disk; send that file as is
+        if os.path.exists(watcher.output):
+            with open(watcher.output, "rb") as f:
+                st.download_button(
+                    label="📥 Download Watched Folder Scores as CSV",
+                    data=f,
+                    file_name="fantasy_scores_watched.csv",
+                    mime="text/csv",
+                )
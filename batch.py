@@ -0,0 +1,423 @@
+# batch.py
+# ==========================================================
+#   Score many match reports in a pool of worker processes
+#
+#   Command line:
+#     python batch.py reports/ "archive/*.zip" -o scores.csv -j 4 --resume
+# ==========================================================
+
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import pathlib
+import sys
+import tarfile
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import pandas as pd
+
+from export import EXPORT_FORMATS, EXTENSIONS, SLIM_COLUMNS, CsvExport, export_format, open_export
+from match_cache import DEFAULT_CACHE_DIR, MatchTableCache
+from profiling import NULL_PROFILE, PipelineProfile
+from scoring import calc_all_players_from_file, calc_all_players_from_html
+from season_store import SeasonStore, match_metadata
+
+MAX_WORKERS = 8
+
+# one cache object per worker process and directory
+_worker_caches = {}
+
+
+def _worker_cache(cache_dir):
+    if cache_dir is None:
+        return None
+    if cache_dir not in _worker_caches:
+        _worker_caches[cache_dir] = MatchTableCache(cache_dir)
+    return _worker_caches[cache_dir]
+
+
+def default_workers(n_files: int) -> int:
+    """Bounded worker count: never more than files, cores or MAX_WORKERS."""
+    return max(1, min(n_files, os.cpu_count() or 1, MAX_WORKERS))
+
+
+# one finished file: position in the input, name, scored rows or the error,
+# and the per-stage profile report (None unless profiling was requested)
+MatchResult = namedtuple("MatchResult", ["index", "name", "df", "error", "profile"])
+
+
+def score_match(
+    name: str, html_bytes, cache_dir=DEFAULT_CACHE_DIR, profile=NULL_PROFILE,
+    full: bool = False, all_stats: bool = False,
+) -> pd.DataFrame:
+    """
+    Per-file work: parse and score one match report, then tag the rows
+    with the match/source name. Runs inside a worker process.
+    `html_bytes` is the raw page, or the os.PathLike of a saved page,
+    which is memory-mapped by the worker rather than sent to it.
+    full=True keeps the internal stat columns, all_stats=True every column
+    FBref publishes (see calc_all_players_from_html).
+    """
+    if isinstance(html_bytes, os.PathLike):
+        score = calc_all_players_from_file
+    else:
+        score = calc_all_players_from_html
+    df_match = score(
+        html_bytes, cache=_worker_cache(cache_dir), profile=profile, full=full,
+        all_stats=all_stats,
+    )
+    df_match["Match"] = name
+    return df_match
+
+
+def _score_one(index, name, html_bytes, cache_dir, profile=False, full=False, all_stats=False):
+    prof = PipelineProfile(trace_memory=profile == "memory") if profile else NULL_PROFILE
+    try:
+        df_match = score_match(
+            name, html_bytes, cache_dir, profile=prof, full=full, all_stats=all_stats
+        )
+        error = None
+    except Exception as e:
+        df_match, error = None, e
+    return MatchResult(index, name, df_match, error, prof.report() if profile else None)
+
+
+def make_pool(max_workers: int = None, initializer=None) -> ProcessPoolExecutor:
+    """
+    Worker pool for score_matches. Start it once and reuse it: workers pay
+    the pandas/lxml import cost only when the pool starts. `initializer`
+    runs once in every worker process as it starts.
+    """
+    # spawn: safe to start from threaded hosts such as the Streamlit server
+    ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(
+        max_workers=max_workers or default_workers(MAX_WORKERS), mp_context=ctx,
+        initializer=initializer,
+    )
+
+
+def score_matches(items, max_workers=None, cache_dir=DEFAULT_CACHE_DIR, pool=None,
+                  profile=False, full=False, all_stats=False):
+    """
+    Score (name, html_bytes or path) pairs in parallel.
+
+    Yields a MatchResult as each file finishes, so callers can report
+    progress and per-file errors immediately; `index` is the position in
+    `items` for restoring a deterministic order afterwards.
+    Uses `pool` if given, otherwise a temporary pool of `max_workers`.
+    profile=True (or "memory" to include allocation peaks) attaches each
+    file's PipelineProfile report. full=True returns the internal stat
+    columns instead of the slim result; add all_stats=True for every
+    column FBref publishes.
+
+    `items` may be a lazy iterator: at most two files per worker are read
+    and in flight at any time. Closing the generator early (e.g. a
+    cancelled UI run) cancels files that have not started yet.
+    """
+    if max_workers is None:
+        n = len(items) if hasattr(items, "__len__") else MAX_WORKERS
+        max_workers = default_workers(n)
+
+    if pool is None and max_workers <= 1:
+        for i, (name, data) in enumerate(items):
+            yield _score_one(i, name, data, cache_dir, profile, full, all_stats)
+        return
+
+    own_pool = pool is None
+    if own_pool:
+        pool = make_pool(max_workers)
+    window = 2 * max_workers
+    pending = set()
+    try:
+        for i, (name, data) in enumerate(items):
+            pending.add(pool.submit(
+                _score_one, i, name, data, cache_dir, profile, full, all_stats
+            ))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        for fut in as_completed(pending):
+            yield fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if own_pool:
+            pool.shutdown(cancel_futures=True)
+
+
+class ReorderBuffer:
+    """
+    Releases (index, item) pairs in index order as they arrive out of
+    order; only items that finished ahead of an earlier index are held.
+    """
+
+    def __init__(self, start: int = 0):
+        self._next = start
+        self._held = {}
+
+    def push(self, index: int, item) -> list:
+        """Add one item; returns every (index, item) now ready, in order."""
+        self._held[index] = item
+        ready = []
+        while self._next in self._held:
+            ready.append((self._next, self._held.pop(self._next)))
+            self._next += 1
+        return ready
+
+    def __len__(self) -> int:
+        return len(self._held)
+
+
+# ----------------------------------------------------------
+# input discovery: directories, globs, zip / tar archives
+# ----------------------------------------------------------
+
+HTML_SUFFIXES = (".html", ".htm")
+
+
+def _is_html(name: str) -> bool:
+    return name.lower().endswith(HTML_SUFFIXES)
+
+
+def iter_sources(inputs):
+    """
+    Yield (source_id, name, read) for every match report in `inputs`.
+
+    source_id is unique across runs (used for --resume), name is the file
+    name used for the Match column, read() returns the HTML bytes (archive
+    members) or a pathlib.Path (plain files, memory-mapped when scored).
+    """
+    for spec in inputs:
+        if os.path.isdir(spec):
+            for root, _, files in sorted(os.walk(spec)):
+                for fname in sorted(files):
+                    if _is_html(fname):
+                        yield from _file_source(os.path.join(root, fname))
+        elif os.path.isfile(spec):
+            yield from _file_source(spec)
+        else:
+            matches = sorted(glob.glob(spec, recursive=True))
+            if not matches:
+                print(f"⚠️ No files match {spec}", file=sys.stderr)
+            for path in matches:
+                if os.path.isfile(path):
+                    yield from _file_source(path)
+
+
+def _file_source(path):
+    if zipfile.is_zipfile(path):
+        yield from _zip_sources(path)
+    elif tarfile.is_tarfile(path):
+        yield from _tar_sources(path)
+    elif _is_html(path):
+        # workers memory-map the file themselves; only the path is sent
+        yield os.path.abspath(path), os.path.basename(path), lambda: pathlib.Path(path)
+
+
+def _zip_sources(path):
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if not info.is_dir() and _is_html(info.filename):
+                yield (
+                    f"{os.path.abspath(path)}::{info.filename}",
+                    os.path.basename(info.filename),
+                    lambda info=info: zf.read(info),
+                )
+
+
+def _tar_sources(path):
+    with tarfile.open(path) as tf:
+        for member in tf:
+            if member.isfile() and _is_html(member.name):
+                yield (
+                    f"{os.path.abspath(path)}::{member.name}",
+                    os.path.basename(member.name),
+                    lambda member=member: tf.extractfile(member).read(),
+                )
+
+
+# ----------------------------------------------------------
+# streaming output sinks
+# ----------------------------------------------------------
+
+def open_sink(path: str, fmt: str = None, full: bool = False, append: bool = False):
+    """
+    CSV output is one file, rewritten unless `append`. Parquet and Arrow IPC
+    files cannot be appended to, so for those `path` is a dataset directory
+    of part files (one row group / record batch per match): with `append`
+    every run adds its own part, otherwise earlier parts are removed first.
+    """
+    fmt = export_format(path, fmt)
+    if fmt == "csv":
+        return CsvExport(path, full, append=append)
+    os.makedirs(path, exist_ok=True)
+    if not append:
+        for old in glob.glob(os.path.join(glob.escape(path), "part-*" + EXTENSIONS[fmt])):
+            os.remove(old)
+    part = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{EXTENSIONS[fmt]}"
+    return open_export(os.path.join(path, part), fmt, full)
+
+
+# ----------------------------------------------------------
+# command line entry point
+# ----------------------------------------------------------
+
+def _load_done(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def run_batch(inputs, output, workers=None, fmt=None, resume=False,
+              cache_dir=DEFAULT_CACHE_DIR, store=None, fetcher=None,
+              all_stats=False, client=None, full=False) -> dict:
+    """
+    Score every match report in `inputs`, streaming rows to `output`
+    (SLIM_COLUMNS, or every stat column with `full`).
+    With `resume`, sources listed in the <output>.done log are skipped.
+    With `store` (a season_store.SeasonStore), every new match is also
+    appended to the season store with its stat columns (the ones scoring
+    reads, or every FBref column with `all_stats`).
+    With `fetcher` (an fbref_fetch.FbrefFetcher), `inputs` are match URLs,
+    downloaded concurrently under the fetcher's rate limit.
+    With `client` (a scoring_service.ScoringClient), matches are scored by
+    the shared scoring service instead of a local worker pool.
+    Returns counts of scored / skipped / failed / stored files.
+    """
+    done_path = output.rstrip("/\\") + ".done"
+    done = _load_done(done_path) if resume else set()
+    counts = {"scored": 0, "skipped": 0, "failed": 0, "stored": 0}
+
+    in_flight = {}  # index -> source_id, only while that file is being scored
+    metadata = {}  # index -> match_metadata, only with a store
+    next_index = itertools.count()
+
+    def fetch_failed(r):
+        counts["failed"] += 1
+        print(f"❌ Could not fetch {r.url}: {r.error}", file=sys.stderr)
+
+    if fetcher is None:
+        sources = iter_sources(inputs)
+    else:
+        from fbref_fetch import fetch_sources
+
+        urls = []
+        for url in inputs:
+            if fetcher.resolve(url) in done:
+                counts["skipped"] += 1  # never downloaded
+            else:
+                urls.append(url)
+        sources = fetch_sources(urls, fetcher, on_error=fetch_failed)
+
+    def todo():
+        for source_id, name, read in sources:
+            if source_id in done:
+                counts["skipped"] += 1
+                continue
+            index = next(next_index)
+            in_flight[index] = source_id
+            data = read()
+            if store is not None:
+                metadata[index] = match_metadata(data)
+            yield name, data
+
+    # without `resume` a run starts over: output and done log are rewritten
+    sink = open_sink(output, fmt, full=full, append=resume)
+    full_frames = full or store is not None
+    try:
+        with open(done_path, "a" if resume else "w", encoding="utf-8") as done_log:
+            if client is not None:
+                results = client.score_matches(todo(), full=full_frames, all_stats=all_stats)
+            else:
+                results = score_matches(
+                    todo(), max_workers=workers or default_workers(MAX_WORKERS),
+                    cache_dir=cache_dir, full=full_frames, all_stats=all_stats,
+                )
+            for r in results:
+                source_id = in_flight.pop(r.index)
+                meta = metadata.pop(r.index, None)
+                if r.error is not None:
+                    counts["failed"] += 1
+                    print(f"❌ Error processing {source_id}: {r.error}", file=sys.stderr)
+                    continue
+                if store is not None and store.add_scored_match(meta, r.df, source=source_id):
+                    counts["stored"] += 1
+                sink.write((r.df if full else r.df[SLIM_COLUMNS]).sort_values("score", ascending=False))
+                done_log.write(source_id + "\n")
+                done_log.flush()
+                counts["scored"] += 1
+                print(f"📄 {r.name}: {len(r.df)} players", file=sys.stderr)
+    finally:
+        sink.close()
+    return counts
+
+
+def main(argv=None) -> int:
+    from scoring_service import DEFAULT_SERVICE_URL, ScoringClient
+
+    parser = argparse.ArgumentParser(
+        description="Score saved FBref match reports without the Streamlit app."
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="HTML files, directories, glob patterns or zip/tar archives",
+    )
+    parser.add_argument(
+        "-o", "--output", required=True,
+        help="output CSV file, or Parquet / Arrow IPC dataset directory (*.parquet, *.arrow)",
+    )
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None)
+    parser.add_argument(
+        "--full", action="store_true",
+        help="write every stat column, not just Player/Team/pos/score/Match",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip files already recorded in <output>.done",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="do not use the parse cache")
+    parser.add_argument(
+        "--store", metavar="DB",
+        help="also append new matches (full stats) to this season store (SQLite)",
+    )
+    parser.add_argument(
+        "--all-stats", action="store_true",
+        help="store every FBref stat column, not just the ones scoring reads",
+    )
+    parser.add_argument(
+        "--service", metavar="URL", default=DEFAULT_SERVICE_URL,
+        help="score through a running scoring_service.py (default: $HFW_SCORING_SERVICE)",
+    )
+    args = parser.parse_args(argv)
+
+    store = SeasonStore(args.store) if args.store else None
+    try:
+        counts = run_batch(
+            args.inputs, args.output, workers=args.workers, fmt=args.format,
+            resume=args.resume, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+            store=store, all_stats=args.all_stats,
+            client=ScoringClient(args.service) if args.service else None,
+            full=args.full,
+        )
+    finally:
+        if store is not None:
+            store.close()
+    print(
+        f"✅ scored {counts['scored']}, skipped {counts['skipped']}, "
+        f"failed {counts['failed']}"
+        + (f", stored {counts['stored']} new" if store is not None else ""),
+        file=sys.stderr,
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
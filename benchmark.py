@@ -0,0 +1,330 @@
+# benchmark.py
+# ==========================================================
+#   Throughput / memory benchmark for the scoring pipeline
+#   on synthetic FBref match reports (see fbref_synth.py)
+#
+#     python benchmark.py --matches 50
+#     python benchmark.py --matches 50 --save bench_baseline.json
+#     python benchmark.py --matches 50 --compare bench_baseline.json
+#     python benchmark.py --matches 50 --input file
+#     python benchmark.py --lineup-players 5000 --lineup-budget 80
+# ==========================================================
+
+import argparse
+import ctypes
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from fbref_synth import generate_matches
+from lineup import best_lineup
+from scoring import (
+    _combine_team_frames,
+    _extract_team_tables_from_html,
+    _merge_team_tables,
+    calc_all_players_from_file,
+    calc_all_players_from_html,
+    score_players,
+)
+
+STAGES = ("extract", "extract_all_stats", "merge", "score", "end_to_end")
+
+# how pages reach the parser: decoded text, raw bytes, or saved files mapped on use
+INPUTS = ("str", "bytes", "file")
+
+
+def _merge_all(team_tables: dict) -> dict:
+    return {team: _merge_team_tables(dfs) for team, dfs in team_tables.items()}
+
+
+def _extract_file(path: str, all_stats: bool = True) -> dict:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return _extract_team_tables_from_html(mapped, all_stats=all_stats)
+
+
+def _best_time(fn, inputs, repeat: int) -> float:
+    """Best wall time over `repeat` runs of fn over every input."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x in inputs:
+            fn(x)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_bytes(fn, x) -> int:
+    """
+    Peak Python-heap allocation (tracemalloc) while running fn(x) once.
+    Misses native memory such as lxml trees; see _peak_rss_bytes.
+    """
+    tracemalloc.start()
+    try:
+        fn(x)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise OSError(f"{field} missing from /proc/self/status")
+
+
+def _measure_rss(fn, x) -> int:
+    # runs in a fresh process: one warm-up call for lazy imports and caches,
+    # freed memory handed back to the OS, then the measured call
+    fn(x)
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+        f.write("5")  # reset VmHWM to the current RSS
+    before = _status_kb("VmRSS")
+    fn(x)
+    return 1024 * (_status_kb("VmHWM") - before)
+
+
+def _peak_rss_bytes(fn, x):
+    """
+    Peak resident-set growth while running fn(x) once, in a fresh process so
+    native allocations (lxml, numpy) count too. None where Linux's /proc
+    high-water-mark reset is unavailable.
+    """
+    if not os.path.exists("/proc/self/clear_refs"):
+        return None
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        try:
+            return pool.submit(_measure_rss, fn, x).result()
+        except OSError:
+            return None
+
+
+def run_benchmark(
+    n_matches: int = 20,
+    n_subs: int = 5,
+    filler_tables: int = 20,
+    comment_tables: bool = False,
+    repeat: int = 3,
+    engine: str = "vectorized",
+    rss: bool = True,
+    input_kind: str = "str",
+) -> dict:
+    """
+    Time every pipeline stage over `n_matches` synthetic reports.
+    Returns {stage: {"seconds", "matches_per_sec", "peak_bytes",
+    "peak_rss_bytes"}} plus the configuration used, ready to be saved as a
+    regression baseline. peak_bytes is the Python heap only (tracemalloc);
+    peak_rss_bytes (None without `rss` or off Linux) also counts native
+    memory, measured on the first match in a separate process.
+
+    input_kind picks how pages reach the extract and end-to-end stages:
+    "str", "bytes" or "file" (written to a temporary directory and
+    memory-mapped, as calc_all_players_from_file does).
+    """
+    pages = [
+        html for _, html in generate_matches(
+            n_matches, n_subs=n_subs, filler_tables=filler_tables,
+            comment_tables=comment_tables,
+        )
+    ]
+
+    # inputs for each stage are prepared outside the timed region
+    extracted = [_extract_team_tables_from_html(h, all_stats=False) for h in pages]
+    combined = [_combine_team_frames(_merge_all(t)) for t in extracted]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if input_kind == "file":
+            sources = []
+            for i, html in enumerate(pages):
+                path = os.path.join(tmp, f"match_{i}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(html)
+                sources.append(path)
+            extract, to_frame = _extract_file, calc_all_players_from_file
+        else:
+            sources = [h.encode("utf-8") for h in pages] if input_kind == "bytes" else pages
+            extract, to_frame = _extract_team_tables_from_html, calc_all_players_from_html
+
+        stages = {
+            "extract": (partial(extract, all_stats=False), sources),
+            "extract_all_stats": (extract, sources),
+            "merge": (_merge_all, extracted),
+            "score": (partial(score_players, engine=engine), combined),
+            "end_to_end": (partial(to_frame, engine=engine), sources),
+        }
+
+        results = {}
+        for stage, (fn, inputs) in stages.items():
+            seconds = _best_time(fn, inputs, repeat)
+            results[stage] = {
+                "seconds": seconds,
+                "matches_per_sec": n_matches / seconds if seconds else float("inf"),
+                "peak_bytes": _peak_bytes(fn, inputs[0]),
+                "peak_rss_bytes": _peak_rss_bytes(fn, inputs[0]) if rss else None,
+            }
+
+    results["config"] = {
+        "n_matches": n_matches,
+        "n_subs": n_subs,
+        "filler_tables": filler_tables,
+        "comment_tables": comment_tables,
+        "engine": engine,
+        "input": input_kind,
+        "page_bytes": sum(len(h.encode("utf-8")) for h in pages) // n_matches,
+    }
+    return results
+
+
+def synthetic_players(n_players: int, n_teams: int = 20, seed: int = 0) -> pd.DataFrame:
+    """Scored-player rows (Player, Squad, pos, score, price) for the lineup benchmark."""
+    rng = np.random.default_rng(seed)
+    pos = rng.choice(["GK", "DEF", "MID", "FWD"], n_players, p=[0.1, 0.35, 0.35, 0.2])
+    score = np.round(rng.gamma(2.0, 3.0, n_players) + 2.0 * (pos == "FWD"), 1)
+    price = np.round(4.0 + 0.5 * score + rng.normal(0.0, 1.0, n_players), 1).clip(4.0, 15.0)
+    return pd.DataFrame({
+        "Player": [f"Player {i}" for i in range(n_players)],
+        "Squad": rng.choice([f"Club {i}" for i in range(n_teams)], n_players),
+        "pos": pos,
+        "score": score,
+        "price": price,
+    })
+
+
+def run_lineup_benchmark(n_players: int = 5000, budget: float = None, repeat: int = 3) -> dict:
+    """Best time of an exact lineup search over every formation."""
+    players = synthetic_players(n_players)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        lineup = best_lineup(players, budget=budget)
+        best = min(best, time.perf_counter() - t0)
+    return {
+        "seconds": best,
+        "n_players": n_players,
+        "budget": budget,
+        "formation": lineup.formation,
+        "total": lineup.total,
+    }
+
+
+def print_report(results: dict, baseline: dict = None) -> None:
+    if "config" not in results:
+        return _print_lineup(results, baseline)
+
+    cfg = results["config"]
+    print(
+        f"{cfg['n_matches']} matches, {cfg['page_bytes'] / 1e6:.2f} MB/page, "
+        f"engine={cfg['engine']}, input={cfg.get('input', 'str')}"
+    )
+    # py MB: Python heap (tracemalloc); RSS MB: whole process, native memory included
+    header = f"{'stage':<18}{'ms/match':>10}{'matches/s':>12}{'py MB':>10}{'RSS MB':>10}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    for stage in STAGES:
+        r = results[stage]
+        rss = r.get("peak_rss_bytes")
+        line = (
+            f"{stage:<18}{1000 * r['seconds'] / cfg['n_matches']:>10.2f}"
+            f"{r['matches_per_sec']:>12.1f}{r['peak_bytes'] / 1e6:>10.2f}"
+            + (f"{rss / 1e6:>10.2f}" if rss is not None else f"{'n/a':>10}")
+        )
+        if baseline and stage in baseline:
+            line += f"{r['matches_per_sec'] / baseline[stage]['matches_per_sec']:>9.2f}x"
+        print(line)
+
+
+def _print_lineup(results: dict, baseline: dict = None) -> None:
+    r = results["lineup"]
+    budget = "no budget" if r["budget"] is None else f"budget {r['budget']:g}"
+    line = (
+        f"lineup: {r['n_players']} players, {budget} -> {r['formation']} "
+        f"({r['total']:.1f} pts) in {1000 * r['seconds']:.1f} ms"
+    )
+    if baseline and "lineup" in baseline:
+        line += f", {baseline['lineup']['seconds'] / r['seconds']:.2f}x vs base"
+    print(line)
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Stages whose throughput fell more than `tolerance` below the baseline."""
+    slow = [
+        stage for stage in STAGES
+        if stage in results and stage in baseline
+        and results[stage]["matches_per_sec"]
+        < (1 - tolerance) * baseline[stage]["matches_per_sec"]
+    ]
+    if "lineup" in results and "lineup" in baseline:
+        if (1 - tolerance) * results["lineup"]["seconds"] > baseline["lineup"]["seconds"]:
+            slow.append("lineup")
+    return slow
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the FBref scoring pipeline.")
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--subs", type=int, default=5, help="substitutes per team")
+    parser.add_argument("--filler", type=int, default=20, help="unrelated tables per page")
+    parser.add_argument("--comment-tables", action="store_true",
+                        help="wrap stats tabs in HTML comments, as raw FBref pages do")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", choices=["vectorized", "rows"], default="vectorized")
+    parser.add_argument("--input", choices=INPUTS, default="str",
+                        help="feed pages as text, bytes or memory-mapped files")
+    parser.add_argument("--no-rss", action="store_true",
+                        help="skip the per-stage peak RSS runs (one process each)")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed throughput drop vs baseline (default 20%%)")
+    parser.add_argument("--lineup-players", type=int, default=0,
+                        help="benchmark the lineup optimizer on this many players instead")
+    parser.add_argument("--lineup-budget", type=float, help="budget for the lineup benchmark")
+    args = parser.parse_args(argv)
+
+    if args.lineup_players:
+        results = {"lineup": run_lineup_benchmark(
+            args.lineup_players, budget=args.lineup_budget, repeat=args.repeat,
+        )}
+    else:
+        results = run_benchmark(
+            n_matches=args.matches, n_subs=args.subs, filler_tables=args.filler,
+            comment_tables=args.comment_tables, repeat=args.repeat, engine=args.engine,
+            rss=not args.no_rss, input_kind=args.input,
+        )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        slow = regressions(results, baseline, args.tolerance)
+        if slow:
+            print(f"❌ Regression in: {', '.join(slow)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
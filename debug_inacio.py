@@ -1,25 +1,25 @@
 import pandas as pd
-from scoring import calc_all_players_from_html, debug_player_components
+from scoring import calc_all_players_from_file, debug_player_components, score_breakdown
+from match_cache import MatchTableCache
 
-# 1) Load the HTML you uploaded (adjust path if needed)
+# 1) The HTML you uploaded (adjust path if needed)
 HTML_PATH = "Sporting CP vs. Club Brugge Match Report – Wednesday November 26, 2025 _ FBref.com.html"
 
-with open(HTML_PATH, "r", encoding="utf-8") as f:
-    html_text = f.read()
+# 2) Get the full scored dataframe for that match, with every FBref stat
+#    column (all_stats) for auditing. The file is memory-mapped rather than
+#    read into a string, and parsed tables are cached on disk, so re-runs
+#    skip the HTML parse.
+full_scores_df = calc_all_players_from_file(
+    HTML_PATH, cache=MatchTableCache(), full=True, all_stats=True
+)
 
-# 2) Get the full scored dataframe for that match
-full_scores_df = calc_all_players_from_html(html_text)
-
-# 3) Show all Sporting players just to check it’s right
-print("All players and scores:")
-print(full_scores_df)
+# 3) Show all players with their per-component contributions
+print("All players and score breakdowns:")
+print(score_breakdown(full_scores_df).to_string())
 
 # 4) Debug just Gonçalo Inácio
-player_name = "Gonçalo Inácio"  # must match the Player column spelling
-debug = debug_player_components(full_scores_df.merge(
-    # merge back all internal columns if you kept a slimmer df in calc_all_players_from_html
-    full_scores_df, on=["Player", "Team", "pos", "score"], how="left"
-), player_name)
+player_name = "Goncalo Inacio"  # accents, case and small typos don't matter
+debug = debug_player_components(full_scores_df, player_name)
 
 print("\n--- Detailed breakdown for", player_name, "---")
 for k, v in debug.items():
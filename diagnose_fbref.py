@@ -1,29 +1,35 @@
-import requests
 from bs4 import BeautifulSoup
 
+from fbref_fetch import FbrefFetcher
+from scoring import _extract_team_tables_from_html, calc_all_players_from_html, schema_report
+
 link = "https://fbref.com/en/matches/a071faa8/Liverpool-Bournemouth-August-15-2025-Premier-League"
 
-headers_list = [
-    {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36"},
-    {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Firefox/120.0"},
-    {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/120.0"},
-]
+# no disk cache: always look at what FBref serves right now
+with FbrefFetcher(cache_dir=None, max_retries=2) as fetcher:
+    r = fetcher.fetch(link)
 
-for i, headers in enumerate(headers_list, 1):
-    print(f"\n--- Attempt {i} ---")
+print("Status:", r.status, f"({fetcher.stats['requests']} request(s))")
+if r.error is not None:
+    print("❌ Error:", r.error)
+else:
     try:
-        r = requests.get(link, headers=headers, timeout=15)
-        print("Status:", r.status_code)
-        if r.status_code != 200:
-            print("⚠️ Non-200 response. First 300 chars of body:")
-            print(r.text[:300])
-            continue
-
-        soup = BeautifulSoup(r.text, "html.parser")
+        html_text = r.content.decode("utf-8", errors="ignore")
+        soup = BeautifulSoup(html_text, "html.parser")
         title = soup.title.string if soup.title else "(no title)"
         print("✅ Page title:", title)
         print("Contains 'table' tags:", len(soup.find_all('table')))
         print("Contains HTML comments:", len(soup.find_all(string=lambda x: isinstance(x, type(soup.comment)))))
+        team_tables = _extract_team_tables_from_html(r.content)
+        print("Stats tables per team (incl. comment-wrapped):",
+              {team: len(dfs) for team, dfs in team_tables.items()})
+
+        # header layouts FBref currently uses, and any scoring stat none of them provide
+        result = calc_all_players_from_html(r.content, all_stats=True)
+        print("Table layouts:")
+        print(schema_report().to_string(index=False))
+        missing = result.attrs["missing_stats"]
+        print("⚠️ Scoring stats missing:" if missing else "✅ All scoring stats present", *missing)
 
     except Exception as e:
         print("❌ Error:", e)
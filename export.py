@@ -0,0 +1,219 @@
+# export.py
+# ==========================================================
+#   Chunked export of scored matches: CSV, Parquet (one row
+#   group per match) and Arrow IPC (one record batch per
+#   match), slim or with every stat column
+# ==========================================================
+
+import os
+import warnings
+
+import pandas as pd
+
+from scoring import SchemaWarning
+
+SLIM_COLUMNS = ["Player", "Team", "pos", "score", "Match"]
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def export_format(path: str, fmt: str = None) -> str:
+    """Explicit format, else the one implied by the path's extension (CSV by default)."""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path.rstrip("/\\"))[1].lower()
+    if ext == ".parquet":
+        return "parquet"
+    if ext in (".arrow", ".feather", ".ipc"):
+        return "arrow"
+    return "csv"
+
+
+def _export_columns(df: pd.DataFrame, full: bool) -> list:
+    # slim columns first, then every stat column in frame order
+    if not full:
+        return SLIM_COLUMNS
+    return [c for c in SLIM_COLUMNS if c in df.columns] + [
+        c for c in df.columns if c not in SLIM_COLUMNS
+    ]
+
+
+def _unexpected_columns(df: pd.DataFrame, columns: list) -> None:
+    extra = [c for c in df.columns if c not in columns]
+    if extra:
+        warnings.warn(
+            f"Columns missing from the first exported match were dropped: {', '.join(map(str, extra))}",
+            SchemaWarning,
+            stacklevel=3,
+        )
+
+
+class CsvExport:
+    """
+    Writes each match's rows to one CSV; the header is written once. With
+    `full`, the first match fixes the columns and later ones are aligned.
+    With `append`, rows go after an existing file's, under its header.
+    """
+
+    def __init__(self, path: str, full: bool = False, append: bool = False):
+        new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._columns = None
+        if not new_file:
+            self._columns = list(pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns)
+        self._f = open(
+            path, "w" if new_file else "a", newline="",
+            encoding="utf-8-sig" if new_file else "utf-8",
+        )
+        self._header = new_file
+        self._full = full
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._columns is None:
+            self._columns = _export_columns(df, self._full)
+        elif self._full:
+            _unexpected_columns(df, self._columns)
+        df.reindex(columns=self._columns).to_csv(self._f, index=False, header=self._header)
+        self._header = False
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ArrowExport:
+    """
+    Shared part of the Parquet and Arrow IPC writers: every match becomes one
+    Arrow table and is written as its own chunk, so no text copy of the
+    export is ever built. The schema is the slim one, or with `full` the
+    first match's columns. Numbers are stored as float64, which holds every
+    stat and any integer up to 2**53 exactly, with nulls for gaps. A column
+    that a later match needs wider (null < bool < float64 < string) is
+    promoted, and the chunks already written are rewritten to match.
+    """
+
+    def __init__(self, path: str, full: bool = False):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.path = path
+        self._full = full
+        self._writer = None
+        self._widths = (pa.null(), pa.bool_(), pa.float64(), pa.string())
+        self._schema = None if full else pa.schema([
+            ("Player", pa.string()), ("Team", pa.string()), ("pos", pa.string()),
+            ("score", pa.float64()), ("Match", pa.string()),
+        ])
+
+    def _field_type(self, series: pd.Series):
+        pa = self._pa
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return pa.bool_()
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            return pa.float64()
+        if series.isna().all():
+            return pa.null()  # no values yet: any later type fits
+        return pa.string()
+
+    def _wider(self, a, b):
+        return max(a, b, key=self._widths.index)
+
+    def _table(self, df: pd.DataFrame):
+        pa = self._pa
+        if self._schema is None:
+            self._schema = pa.schema([
+                (c, self._field_type(df[c])) for c in _export_columns(df, full=True)
+            ])
+        else:
+            if self._full:
+                _unexpected_columns(df, self._schema.names)
+            schema = pa.schema([
+                (f.name, self._wider(f.type, self._field_type(df[f.name])))
+                if f.name in df.columns else f
+                for f in self._schema
+            ])
+            if not schema.equals(self._schema):
+                self._promote(schema)
+
+        arrays = []
+        for field in self._schema:
+            if field.name not in df.columns:
+                arrays.append(pa.nulls(len(df), field.type))
+                continue
+            col = df[field.name]
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                col = col.astype(object)
+            arrays.append(pa.array(col, from_pandas=True).cast(field.type))
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def _promote(self, schema) -> None:
+        # rare: rewrite what is on disk chunk by chunk under the wider schema
+        if self._writer is not None:
+            self._writer.close()
+            old = self.path + ".promote"
+            os.replace(self.path, old)
+            self._writer = self._open(schema)
+            for table in self._chunks(old):
+                self._writer.write_table(table.cast(schema))
+            os.remove(old)
+        self._schema = schema
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = self._table(df)
+        if self._writer is None:
+            self._writer = self._open(self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is None:
+            # nothing scored: still leave a readable, empty file
+            schema = self._schema or self._pa.schema([(c, self._pa.string()) for c in SLIM_COLUMNS])
+            self._writer = self._open(schema)
+        self._writer.close()
+
+
+class ParquetExport(_ArrowExport):
+    """Parquet file with one row group per match."""
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self.path, schema)
+
+    def _chunks(self, path: str):
+        import pyarrow.parquet as pq
+
+        f = pq.ParquetFile(path)
+        try:
+            for i in range(f.num_row_groups):
+                yield f.read_row_group(i)
+        finally:
+            f.close()
+
+
+class ArrowExport(_ArrowExport):
+    """Arrow IPC file with one record batch per match (memory-maps on read)."""
+
+    def _open(self, schema):
+        return self._pa.ipc.new_file(self.path, schema)
+
+    def _chunks(self, path: str):
+        with self._pa.memory_map(path) as source:
+            reader = self._pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield self._pa.Table.from_batches([reader.get_batch(i)])
+
+
+def open_export(path: str, fmt: str = None, full: bool = False, append: bool = False):
+    """Writer for `path`: CsvExport, ParquetExport or ArrowExport (CSV only appends)."""
+    fmt = export_format(path, fmt)
+    if fmt == "parquet":
+        return ParquetExport(path, full)
+    if fmt == "arrow":
+        return ArrowExport(path, full)
+    return CsvExport(path, full, append=append)
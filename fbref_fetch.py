@@ -0,0 +1,419 @@
+# fbref_fetch.py
+# ==========================================================
+#   Concurrent FBref downloader: pooled keep-alive
+#   connections, a global rate limit, 429 back-off and a
+#   conditional-request-aware on-disk HTTP cache
+#
+#     python fbref_fetch.py urls.txt -o scores.csv --rate 0.15
+# ==========================================================
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = os.environ.get("FBREF_BASE_URL", "https://fbref.com")
+DEFAULT_HTTP_CACHE_DIR = os.environ.get(
+    "HFW_HTTP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hfw-app", "http")
+)
+
+# FBref asks scrapers to stay under 10 requests per minute
+DEFAULT_RATE = 10 / 60
+DEFAULT_WORKERS = 4
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36"
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+# ----------------------------------------------------------
+# global rate limit
+# ----------------------------------------------------------
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: at most `burst` requests at once and `rate`
+    requests per second on average across every thread. pause() holds all
+    callers back, e.g. after a 429.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # a pause() holds callers back even without a rate limit
+                delay = self._not_before - now
+                if delay <= 0:
+                    if not self.rate:
+                        return
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
+
+
+def _retry_after(response) -> float:
+    """Seconds from a Retry-After header (delta or HTTP date), else None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+# ----------------------------------------------------------
+# on-disk HTTP cache
+# ----------------------------------------------------------
+
+class HttpCache:
+    """
+    Raw response bodies keyed by URL, with the validators (ETag /
+    Last-Modified) needed to revalidate them with a conditional GET.
+    Stored as <sha256(url)>.body + <sha256(url)>.json under `directory`.
+    """
+
+    def __init__(self, directory: str = DEFAULT_HTTP_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def get(self, url: str):
+        """(meta, body) or None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if len(body) != meta.get("length"):
+            return None  # torn write
+        return meta, body
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def put(self, url: str, body: bytes, headers) -> None:
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "length": len(body),
+        }
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def touch(self, url: str, meta: dict) -> None:
+        """Record a successful revalidation (304)."""
+        meta = dict(meta, fetched_at=time.time())
+        self._write(self._paths(url)[1], json.dumps(meta).encode("utf-8"))
+
+    def clear(self) -> None:
+        for e in os.scandir(self.directory):
+            if e.is_file():
+                os.remove(e.path)
+
+
+# ----------------------------------------------------------
+# fetcher
+# ----------------------------------------------------------
+
+# one downloaded URL: position in the input, final URL, status, body bytes
+# (None on failure), whether the body came from the disk cache, error message
+FetchResult = namedtuple(
+    "FetchResult", ["index", "url", "status", "content", "from_cache", "error"]
+)
+
+
+class FbrefFetcher:
+    """
+    Downloads match reports with a shared pool of keep-alive connections.
+
+    Every request, from every thread, goes through one TokenBucket
+    (`rate` requests/second). 429 and 5xx responses are retried with
+    exponential back-off; a 429's Retry-After pauses all threads. Bodies
+    are kept in an HttpCache: entries younger than `max_age` seconds are
+    served without a request, older ones are revalidated with
+    If-None-Match / If-Modified-Since.
+
+    `base_url` replaces the scheme and host of absolute FBref URLs (and is
+    prepended to bare paths), so a local stand-in server can be used.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        rate: float = DEFAULT_RATE,
+        burst: int = 1,
+        max_workers: int = DEFAULT_WORKERS,
+        cache_dir: str = DEFAULT_HTTP_CACHE_DIR,
+        max_age: float = 24 * 3600,
+        max_retries: int = 5,
+        backoff: float = 2.0,
+        timeout: float = 30.0,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.user_agent = user_agent
+        # one connection pool shared by every thread's session
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "revalidated": 0, "retries": 0}
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def resolve(self, url: str) -> str:
+        """Absolute URL on base_url for an FBref URL or a bare path."""
+        if url.startswith("/"):
+            return self.base_url + url
+        parts = urlsplit(url)
+        if parts.netloc.endswith("fbref.com"):
+            base = urlsplit(self.base_url)
+            return urlunsplit((base.scheme, base.netloc) + tuple(parts[2:]))
+        return urljoin(self.base_url + "/", url)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def fetch(self, url: str, index: int = 0) -> FetchResult:
+        url = self.resolve(url)
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            meta, body = cached
+            if self.max_age is not None and time.time() - meta["fetched_at"] < self.max_age:
+                self._count("cache_hits")
+                return FetchResult(index, url, 200, body, True, None)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        status, error = None, None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            self.bucket.acquire()
+            self._count("requests")
+            try:
+                r = self._session().get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                status, error = None, str(e)
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            status = r.status_code
+            if status == 304 and cached:
+                self.cache.touch(url, meta)
+                self._count("revalidated")
+                return FetchResult(index, url, 200, body, True, None)
+            if status in _RETRY_STATUSES:
+                error = f"HTTP {status}"
+                delay = _retry_after(r)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                if status == 429:
+                    self.bucket.pause(delay)  # every thread backs off
+                else:
+                    time.sleep(delay)
+                continue
+            if not r.ok:
+                return FetchResult(index, url, status, None, False, f"HTTP {status}")
+
+            if self.cache:
+                self.cache.put(url, r.content, r.headers)
+            return FetchResult(index, url, status, r.content, False, None)
+
+        return FetchResult(
+            index, url, status, None, False,
+            f"gave up after {self.max_retries + 1} attempts ({error})",
+        )
+
+    def fetch_many(self, urls):
+        """
+        Fetch URLs concurrently on max_workers threads, yielding a
+        FetchResult as each one finishes (`index` is the input position).
+        At most two downloads per worker are held at any time.
+        """
+        window = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            for i, url in enumerate(urls):
+                pending.add(pool.submit(self.fetch, url, i))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield fut.result()
+            for fut in as_completed(pending):
+                yield fut.result()
+
+    def close(self) -> None:
+        for session in self._sessions:
+            session.close()
+        self._adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def match_name(url: str) -> str:
+    """Match column label for a URL: its last path segment."""
+    path = urlsplit(url).path.rstrip("/")
+    return path.rsplit("/", 1)[-1] or url
+
+
+def fetch_sources(urls, fetcher: FbrefFetcher, on_error=None):
+    """
+    (source_id, name, read) for every URL that downloaded, in the shape
+    batch.iter_sources yields, so fetched bytes go straight to the
+    scoring pipeline. Failed downloads are passed to on_error(result), or
+    reported on stderr.
+    """
+    for r in fetcher.fetch_many(urls):
+        if r.error is not None:
+            if on_error is not None:
+                on_error(r)
+            else:
+                print(f"❌ Could not fetch {r.url}: {r.error}", file=sys.stderr)
+            continue
+        yield r.url, match_name(r.url), lambda content=r.content: content
+
+
+# ----------------------------------------------------------
+# command line entry point
+# ----------------------------------------------------------
+
+def _read_url_list(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main(argv=None) -> int:
+    from batch import DEFAULT_CACHE_DIR, run_batch
+    from scoring_service import DEFAULT_SERVICE_URL, ScoringClient
+    from season_store import SeasonStore
+
+    parser = argparse.ArgumentParser(
+        description="Download FBref match reports and score them."
+    )
+    parser.add_argument("url_file", help="text file with one match URL (or path) per line")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output CSV file, or Parquet / Arrow IPC dataset directory (*.parquet, *.arrow)")
+    parser.add_argument("--full", action="store_true",
+                        help="write every stat column, not just Player/Team/pos/score/Match")
+    parser.add_argument("--store", metavar="DB", help="also append new matches to this season store")
+    parser.add_argument("--all-stats", action="store_true",
+                        help="store every FBref stat column, not just the ones scoring reads")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="requests per second across all threads (default %(default).3f)")
+    parser.add_argument("--fetch-workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="scoring processes")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip URLs already recorded in <output>.done")
+    parser.add_argument("--service", metavar="URL", default=DEFAULT_SERVICE_URL,
+                        help="score through a running scoring_service.py (default: $HFW_SCORING_SERVICE)")
+    args = parser.parse_args(argv)
+
+    store = SeasonStore(args.store) if args.store else None
+    fetcher = FbrefFetcher(
+        base_url=args.base_url, rate=args.rate, max_workers=args.fetch_workers
+    )
+    try:
+        counts = run_batch(
+            _read_url_list(args.url_file), args.output, workers=args.workers,
+            resume=args.resume, cache_dir=DEFAULT_CACHE_DIR, store=store,
+            fetcher=fetcher, all_stats=args.all_stats,
+            client=ScoringClient(args.service) if args.service else None,
+            full=args.full,
+        )
+    finally:
+        fetcher.close()
+        if store is not None:
+            store.close()
+    print(
+        f"✅ scored {counts['scored']}, skipped {counts['skipped']}, "
+        f"failed {counts['failed']}; {fetcher.stats['requests']} requests, "
+        f"{fetcher.stats['cache_hits'] + fetcher.stats['revalidated']} from cache",
+        file=sys.stderr,
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
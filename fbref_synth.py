@@ -0,0 +1,361 @@
+# fbref_synth.py
+# ==========================================================
+#   Synthetic FBref match-report HTML for benchmarks
+#   (same table layout as a saved FBref match report)
+# ==========================================================
+
+import random
+
+# ----------------------------------------------------------
+# table layouts (over-header, columns) as FBref publishes them
+# ----------------------------------------------------------
+
+_ID_COLS = [("", ["Player", "#", "Nation", "Pos", "Age", "Min"])]
+
+OUTFIELD_TABS = {
+    "summary": _ID_COLS + [
+        ("Performance", ["Gls", "Ast", "PK", "PKatt", "Sh", "SoT", "CrdY",
+                         "CrdR", "Touches", "Tkl", "Int", "Blocks"]),
+        ("Expected", ["xG", "npxG", "xAG"]),
+        ("SCA", ["SCA", "GCA"]),
+        ("Passes", ["Cmp", "Att", "Cmp%", "PrgP"]),
+        ("Carries", ["Carries", "PrgC"]),
+        ("Take-Ons", ["Att", "Succ"]),
+    ],
+    "passing": _ID_COLS + [
+        ("Total", ["Cmp", "Att", "Cmp%", "TotDist", "PrgDist"]),
+        ("Short", ["Cmp", "Att", "Cmp%"]),
+        ("Medium", ["Cmp", "Att", "Cmp%"]),
+        ("Long", ["Cmp", "Att", "Cmp%"]),
+        ("", ["Ast"]),
+        ("Expected", ["xAG", "xA"]),
+        ("", ["KP", "1/3", "PPA", "CrsPA", "PrgP"]),
+    ],
+    "passing_types": _ID_COLS + [
+        ("", ["Att"]),
+        ("Pass Types", ["Live", "Dead", "FK", "TB", "Sw", "Crs", "TI", "CK"]),
+        ("Corner Kicks", ["In", "Out", "Str"]),
+        ("Outcomes", ["Cmp", "Off", "Blocks"]),
+    ],
+    "defense": _ID_COLS + [
+        ("Tackles", ["Tkl", "TklW", "Def 3rd", "Mid 3rd", "Att 3rd"]),
+        ("Challenges", ["Tkl", "Att", "Tkl%", "Lost"]),
+        ("Blocks", ["Blocks", "Sh", "Pass"]),
+        ("", ["Int", "Tkl+Int", "Clr", "Err"]),
+    ],
+    "possession": _ID_COLS + [
+        ("Touches", ["Touches", "Def Pen", "Def 3rd", "Mid 3rd", "Att 3rd",
+                     "Att Pen", "Live"]),
+        ("Take-Ons", ["Att", "Succ", "Succ%", "Tkld", "Tkld%"]),
+        ("Carries", ["Carries", "TotDist", "PrgDist", "PrgC", "1/3", "CPA",
+                     "Mis", "Dis"]),
+        ("Receiving", ["Rec", "PrgR"]),
+    ],
+    "misc": _ID_COLS + [
+        ("Performance", ["CrdY", "CrdR", "2CrdY", "Fls", "Fld", "Off", "Crs",
+                         "Int", "TklW", "PKwon", "PKcon", "OG", "Recov"]),
+        ("Aerial Duels", ["Won", "Lost", "Won%"]),
+    ],
+}
+
+KEEPER_TAB = [
+    ("", ["Player", "Nation", "Age", "Min"]),
+    ("Shot Stopping", ["SoTA", "GA", "Saves", "Save%", "PSxG"]),
+    ("Launched", ["Cmp", "Att", "Cmp%"]),
+    ("Passes", ["Att (GK)", "Thr", "Launch%", "AvgLen"]),
+    ("Goal Kicks", ["Att", "Launch%", "AvgLen"]),
+    ("Crosses", ["Opp", "Stp", "Stp%"]),
+    ("Sweeper", ["#OPA", "AvgDist"]),
+]
+
+_POSITIONS = ["GK"] + ["CB", "CB", "LB", "RB"] + ["DM", "CM", "AM"] + ["LW", "RW", "FW"]
+_SUB_POSITIONS = ["CB", "WB", "CM", "LM", "RM", "FW", "LW,FW", "AM,CM", "DF"]
+_FIRST = ["Gonçalo", "Luis", "Hugo", "Ivan", "Max", "Noah", "Pedro", "Ali",
+          "Théo", "Kai", "Joël", "Sam", "Ruben", "Mats", "Zé", "Erling"]
+_LAST = ["Inácio", "Silva", "Fernandes", "Müller", "Dias", "Santos", "Kovač",
+         "Mendes", "Okafor", "Larsen", "Nuñez", "Braut", "Hernández", "Quenda"]
+_NATIONS = [("pt", "POR"), ("br", "BRA"), ("es", "ESP"), ("de", "GER"),
+            ("fr", "FRA"), ("no", "NOR"), ("nl", "NED"), ("be", "BEL")]
+
+
+def _flat_columns(layout):
+    return [(top, col) for top, cols in layout for col in cols]
+
+
+# ----------------------------------------------------------
+# random per-player stats
+# ----------------------------------------------------------
+
+def _player_stats(rng, minutes, goals):
+    """One dict keyed by (top, col) covering every tab column."""
+    att = rng.randint(0, 80) if minutes else 0
+    cmp_ = rng.randint(0, att)
+    sh = rng.randint(0, 5)
+    sot = rng.randint(0, sh)
+    to_att = rng.randint(0, 6)
+    to_succ = rng.randint(0, to_att)
+    pkatt = 1 if rng.random() < 0.03 else 0
+    pk = pkatt if rng.random() < 0.75 else 0
+    s = {
+        ("", "Min"): minutes,
+        ("Performance", "Gls"): goals + pk,
+        ("Performance", "Ast"): 1 if rng.random() < 0.08 else 0,
+        ("Performance", "PK"): pk,
+        ("Performance", "PKatt"): pkatt,
+        ("Performance", "Sh"): sh,
+        ("Performance", "SoT"): sot,
+        ("Performance", "CrdY"): 1 if rng.random() < 0.1 else 0,
+        ("Performance", "CrdR"): 1 if rng.random() < 0.01 else 0,
+        ("Performance", "Touches"): rng.randint(0, 110),
+        ("Performance", "Tkl"): rng.randint(0, 6),
+        ("Performance", "Int"): rng.randint(0, 4),
+        ("Performance", "Blocks"): rng.randint(0, 3),
+        ("Performance", "2CrdY"): 0,
+        ("Performance", "Fls"): rng.randint(0, 4),
+        ("Performance", "Fld"): rng.randint(0, 4),
+        ("Performance", "Off"): rng.randint(0, 2),
+        ("Performance", "Crs"): rng.randint(0, 8),
+        ("Performance", "TklW"): rng.randint(0, 4),
+        ("Performance", "PKwon"): 1 if rng.random() < 0.03 else 0,
+        ("Performance", "PKcon"): 1 if rng.random() < 0.02 else 0,
+        ("Performance", "OG"): 1 if rng.random() < 0.005 else 0,
+        ("Performance", "Recov"): rng.randint(0, 12),
+        ("Passes", "Cmp"): cmp_,
+        ("Passes", "Att"): att,
+        ("Passes", "Cmp%"): round(100 * cmp_ / att, 1) if att else "",
+        ("Take-Ons", "Att"): to_att,
+        ("Take-Ons", "Succ"): to_succ,
+        ("Take-Ons", "Succ%"): round(100 * to_succ / to_att, 1) if to_att else "",
+        ("Challenges", "Lost"): rng.randint(0, 3),
+        ("Blocks", "Sh"): rng.randint(0, 2),
+        ("", "Clr"): rng.randint(0, 9),
+        ("", "Err"): 1 if rng.random() < 0.02 else 0,
+        ("", "KP"): rng.randint(0, 4),
+        ("", "Int"): rng.randint(0, 4),
+        ("Carries", "Dis"): rng.randint(0, 3),
+        ("Aerial Duels", "Won"): rng.randint(0, 6),
+        ("Aerial Duels", "Lost"): rng.randint(0, 5),
+    }
+    s[("Total", "Cmp")] = cmp_
+    s[("Total", "Att")] = att
+    s[("Total", "Cmp%")] = s[("Passes", "Cmp%")]
+    s[("", "Ast")] = s[("Performance", "Ast")]
+    s[("Expected", "xG")] = round(rng.random() * 0.3 * sh, 1)
+    s[("Tackles", "Tkl")] = s[("Performance", "Tkl")]
+    s[("Challenges", "Tkl")] = rng.randint(0, 3)
+    s[("Challenges", "Att")] = s[("Challenges", "Tkl")] + s[("Challenges", "Lost")]
+    return s
+
+
+def _keeper_stats(rng, minutes, ga):
+    sota = ga + rng.randint(0, 7)
+    saves = sota - ga
+    launched_att = rng.randint(0, 15)
+    opp = rng.randint(0, 15)
+    return {
+        ("", "Min"): minutes,
+        ("Shot Stopping", "SoTA"): sota,
+        ("Shot Stopping", "GA"): ga,
+        ("Shot Stopping", "Saves"): saves,
+        ("Shot Stopping", "Save%"): round(100 * saves / sota, 1) if sota else "",
+        ("Shot Stopping", "PSxG"): round(rng.random() * sota, 1),
+        ("Launched", "Cmp"): rng.randint(0, launched_att),
+        ("Launched", "Att"): launched_att,
+        ("Crosses", "Opp"): opp,
+        ("Crosses", "Stp"): rng.randint(0, min(opp, 3)),
+        ("Sweeper", "#OPA"): rng.randint(0, 3),
+        ("Sweeper", "AvgDist"): round(8 + rng.random() * 12, 1),
+    }
+
+
+def _squad(rng, n_subs):
+    players = []
+    used = set()
+    for i in range(11 + n_subs):
+        while True:
+            name = f"{rng.choice(_FIRST)} {rng.choice(_LAST)}"
+            if name not in used:
+                used.add(name)
+                break
+        starter = i < 11
+        pos = _POSITIONS[i] if starter else rng.choice(_SUB_POSITIONS)
+        players.append({
+            "name": name,
+            "id": "%08x" % rng.getrandbits(32),
+            "shirt": i + 1,
+            "pos": pos,
+            "nation": rng.choice(_NATIONS),
+            "age": f"{rng.randint(18, 36)}-{rng.randint(0, 364):03d}",
+            "starter": starter,
+        })
+    return players
+
+
+# ----------------------------------------------------------
+# HTML rendering
+# ----------------------------------------------------------
+
+def _cell_text(value):
+    if value == "" or value is None:
+        return ""
+    return str(value)
+
+
+def _render_header(layout):
+    over = []
+    for top, cols in layout:
+        cls = ' class="over_header center"'
+        over.append(f'<th aria-label=""{cls} colspan="{len(cols)}">{top}</th>')
+    names = "".join(
+        f'<th aria-label="{c}" data-stat="{c.lower()}" scope="col">{c}</th>'
+        for _, cols in layout for c in cols
+    )
+    return (
+        '<thead><tr class="over_header">' + "".join(over) + "</tr>"
+        f"<tr>{names}</tr></thead>"
+    )
+
+
+def _render_player_cell(p):
+    indent = "" if p["starter"] else "&nbsp;&nbsp;&nbsp;"
+    slug = p["name"].replace(" ", "-")
+    return (
+        f'<th scope="row" class="left " data-append-csv="{p["id"]}" '
+        f'data-stat="player">{indent}<a href="/en/players/{p["id"]}/{slug}">'
+        f'{p["name"]}</a></th>'
+    )
+
+
+def _render_row(p, layout, stats):
+    cells = [_render_player_cell(p)]
+    for top, col in _flat_columns(layout)[1:]:
+        if col == "#":
+            v = p["shirt"]
+        elif col == "Nation":
+            code, nat = p["nation"]
+            cells.append(
+                '<td class="left poptip" data-stat="nationality">'
+                f'<a href="/en/country/{nat}/"><span style="white-space: nowrap">'
+                f'<span class="f-i f-{code}" style="">{code}</span> {nat}</span></a></td>'
+            )
+            continue
+        elif col == "Pos":
+            v = p["pos"]
+        elif col == "Age":
+            v = p["age"]
+        else:
+            v = stats.get((top, col), stats.get(("", col), 0))
+        cells.append(f'<td class="right " data-stat="{col.lower()}">{_cell_text(v)}</td>')
+    return "<tr>" + "".join(cells) + "</tr>"
+
+
+def _render_footer(n_players, layout, rows_stats):
+    cells = [f'<th scope="row" class="left " data-stat="player">{n_players} Players</th>']
+    for top, col in _flat_columns(layout)[1:]:
+        if col in ("#", "Nation", "Pos", "Age"):
+            cells.append("<td></td>")
+            continue
+        total = 0
+        for s in rows_stats:
+            v = s.get((top, col), s.get(("", col), 0))
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                total += v
+        cells.append(f"<td>{_cell_text(round(total, 1))}</td>")
+    return "<tfoot><tr>" + "".join(cells) + "</tr></tfoot>"
+
+
+def _render_table(table_id, caption, layout, players, stats, comment=False):
+    body = "".join(_render_row(p, layout, s) for p, s in zip(players, stats))
+    html = (
+        f'<div class="table_container" id="div_{table_id}">'
+        f'<table class="stats_table sortable min_width" id="{table_id}">'
+        f"<caption>{caption} Table</caption>"
+        + _render_header(layout)
+        + f"<tbody>{body}</tbody>"
+        + _render_footer(len(players), layout, stats)
+        + "</table></div>"
+    )
+    if comment:
+        return f"<!--\n{html}\n-->"
+    return html
+
+
+def _filler_tables(rng, n):
+    """Unrelated tables (shots, lineups, ...) that the extractor must skip."""
+    out = []
+    for i in range(n):
+        rows = "".join(
+            "<tr>" + "".join(f"<td>{rng.randint(0, 99)}</td>" for _ in range(8)) + "</tr>"
+            for _ in range(25)
+        )
+        out.append(
+            f'<table id="filler_{i}"><caption>Shots Table {i}</caption>'
+            f"<thead><tr>{''.join(f'<th>c{j}</th>' for j in range(8))}</tr></thead>"
+            f"<tbody>{rows}</tbody></table>"
+        )
+    return "".join(out)
+
+
+def generate_match_html(
+    seed: int = 0,
+    home: str = "Sporting CP",
+    away: str = "Club Brugge",
+    n_subs: int = 5,
+    filler_tables: int = 20,
+    comment_tables: bool = False,
+) -> str:
+    """
+    Build one synthetic FBref match report.
+
+    Both teams get all six outfield tabs plus the GK table, with two-level
+    headers and "N Players" total rows. ``comment_tables`` wraps every tab
+    but the summary inside HTML comments, as FBref serves them raw.
+    ``filler_tables`` adds unrelated tables to make the page realistic in size.
+    """
+    rng = random.Random(seed)
+    goals = {home: rng.randint(0, 4), away: rng.randint(0, 3)}
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{home} vs. {away} Match Report – Wednesday November 26, 2025 | FBref.com</title>"
+        "</head><body><div id=\"content\">",
+        _filler_tables(rng, filler_tables // 2),
+    ]
+    keepers = []
+    for team, opp in ((home, away), (away, home)):
+        team_id = "%08x" % rng.getrandbits(32)
+        players = _squad(rng, n_subs)
+        # distribute the team's goals over outfield players
+        scorers = [0] * len(players)
+        for _ in range(goals[team]):
+            scorers[rng.randint(1, len(players) - 1)] += 1
+        minutes = []
+        for p in players:
+            if p["starter"]:
+                minutes.append(90 if rng.random() < 0.7 else rng.randint(46, 89))
+            else:
+                minutes.append(rng.randint(1, 44))
+        stats = [
+            _player_stats(rng, m, g)
+            for p, m, g in zip(players, minutes, scorers)
+        ]
+        for tab, layout in OUTFIELD_TABS.items():
+            parts.append(_render_table(
+                f"stats_{team_id}_{tab}", f"{team} Player Stats", layout,
+                players, stats, comment=comment_tables and tab != "summary",
+            ))
+        gk = players[0]
+        keepers.append(_render_table(
+            f"keeper_stats_{team_id}", f"{team} Goalkeeper Stats", KEEPER_TAB,
+            [gk], [_keeper_stats(rng, minutes[0], goals[opp])],
+            comment=comment_tables,
+        ))
+    parts.extend(keepers)
+    parts.append(_filler_tables(rng, filler_tables - filler_tables // 2))
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def generate_matches(n: int, seed: int = 0, **kwargs):
+    """Yield (file name, html) for `n` different synthetic matches."""
+    for i in range(n):
+        yield f"synthetic_match_{seed + i:05d}.html", generate_match_html(seed + i, **kwargs)
@@ -0,0 +1,227 @@
+# leaderboards.py
+# ==========================================================
+#   Season leaderboards kept as materialized views: running
+#   totals, last-N form windows and per-position top-K heaps,
+#   updated in O(rows of the new match) as matches arrive
+# ==========================================================
+
+import heapq
+import itertools
+from collections import Counter, deque
+
+import pandas as pd
+
+from scoring import PLAYER_ID
+
+DEFAULT_FORM_WINDOW = 5
+DEFAULT_TOP_K = 10
+
+# heap names: one per position bucket plus every player
+ALL = "ALL"
+_BOARD_POSITIONS = ("FWD", "MID", "DEF", "GK")
+
+LEADERBOARD_COLUMNS = ["player", "pos", "team", "matches", "total", "mean", "best"]
+FORM_COLUMNS = ["player", "pos", "team", "last_n", "form_total", "form_mean"]
+TEAM_COLUMNS = ["team", "matches", "players", "total", "per_match"]
+
+
+class _PlayerAgg:
+    """Running aggregates of one player."""
+
+    __slots__ = ("name", "pos", "team", "total", "best", "history", "recent", "version")
+
+    def __init__(self, window: int):
+        self.name = self.pos = self.team = None
+        self.total = 0.0
+        self.best = None
+        self.history = {}  # match_id -> score, in arrival order
+        self.recent = deque(maxlen=window)  # last `window` scores
+        self.version = 0
+
+
+class _TopK:
+    """
+    Max-heap of (value, name) per player with lazy invalidation: an update
+    pushes a new entry and bumps the player's version, so stale entries are
+    skipped (and dropped) when the board is read instead of searched for.
+    """
+
+    def __init__(self):
+        self._heap = []
+
+    def push(self, value: float, name: str, key, version: int) -> None:
+        heapq.heappush(self._heap, (-value, name, key, version))
+
+    def top(self, k: int, valid) -> list:
+        """Up to k (key, value) pairs, best first; `valid(key, version)` filters stale entries."""
+        out, keep = [], []
+        while self._heap and len(out) < k:
+            entry = heapq.heappop(self._heap)
+            if valid(entry[2], entry[3]):
+                out.append((entry[2], -entry[0]))
+                keep.append(entry)
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+        return out
+
+    def compact(self, valid, live: int) -> None:
+        # rebuild once stale entries outnumber live players
+        if len(self._heap) > 2 * live + 64:
+            self._heap = [e for e in self._heap if valid(e[2], e[3])]
+            heapq.heapify(self._heap)
+
+
+class Leaderboards:
+    """
+    Season views over scored matches, maintained incrementally.
+
+    add_match(match_id, df) folds one match's rows (Player, Team, pos,
+    score; Squad and player_id when present) into running totals, each
+    player's last-`form_window` scores and top-K heaps per position, for
+    both season totals and form. Re-adding a match id replaces it;
+    remove_match takes it out again. Reads never scan every row.
+
+    Players are keyed by FBref player id when available, else by name;
+    teams by club (Squad) when available, else by the Team column. A
+    player's position and team are the ones from their latest match.
+    Form windows follow arrival order.
+    """
+
+    def __init__(self, form_window: int = DEFAULT_FORM_WINDOW, top_k: int = DEFAULT_TOP_K):
+        self.form_window = form_window
+        self.top_k = top_k
+        self._players = {}
+        self._matches = {}  # match_id -> [(player key, team, score), ...]
+        self._team_totals = Counter()
+        self._team_matches = {}  # team -> Counter(match_id -> rows)
+        self._team_players = {}  # team -> Counter(player key -> rows)
+        self._totals = {pos: _TopK() for pos in (ALL,) + _BOARD_POSITIONS}
+        self._form = {pos: _TopK() for pos in (ALL,) + _BOARD_POSITIONS}
+        self._versions = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def __contains__(self, match_id) -> bool:
+        return match_id in self._matches
+
+    # ------------------------------------------------------
+    # updates
+    # ------------------------------------------------------
+
+    def add_match(self, match_id, df: pd.DataFrame) -> None:
+        """Fold one match's rows into every view (replacing an earlier copy)."""
+        if match_id in self._matches:
+            self.remove_match(match_id)
+
+        names = df["Player"].astype(str).tolist()
+        ids = df[PLAYER_ID].tolist() if PLAYER_ID in df.columns else [None] * len(df)
+        teams = df["Squad" if "Squad" in df.columns else "Team"].astype(str).tolist()
+        positions = df["pos"].astype(str).tolist()
+        scores = df["score"].astype(float).tolist()
+
+        rows = []
+        touched = set()
+        for name, pid, team, pos, score in zip(names, ids, teams, positions, scores):
+            key = pid if isinstance(pid, str) and pid else name
+            if key in touched:
+                continue  # one row per player per match
+            touched.add(key)
+            p = self._players.get(key)
+            if p is None:
+                p = self._players[key] = _PlayerAgg(self.form_window)
+            p.name, p.pos, p.team = name, pos, team
+            p.total += score
+            p.best = score if p.best is None else max(p.best, score)
+            p.history[match_id] = score
+            p.recent.append(score)
+            self._bump(key, p)
+
+            self._team_totals[team] += score
+            self._team_matches.setdefault(team, Counter())[match_id] += 1
+            self._team_players.setdefault(team, Counter())[key] += 1
+            rows.append((key, team, score))
+        self._matches[match_id] = rows
+
+    def remove_match(self, match_id) -> None:
+        """Take one match out of every view."""
+        for key, team, score in self._matches.pop(match_id, []):
+            p = self._players[key]
+            del p.history[match_id]
+            if not p.history:
+                del self._players[key]
+            else:
+                p.total -= score
+                if score == p.best:
+                    p.best = max(p.history.values())
+                # the window has to be refilled from the player's history
+                p.recent = deque(p.history.values(), maxlen=self.form_window)
+                self._bump(key, p)
+
+            self._team_totals[team] -= score
+            for counter, item in ((self._team_matches[team], match_id), (self._team_players[team], key)):
+                counter[item] -= 1
+                if counter[item] == 0:
+                    del counter[item]
+            if not self._team_matches[team]:
+                del self._team_matches[team], self._team_players[team], self._team_totals[team]
+
+    def _bump(self, key, p: _PlayerAgg) -> None:
+        p.version = next(self._versions)
+        form = sum(p.recent)
+        for pos in (ALL, p.pos):
+            if pos in self._totals:
+                self._totals[pos].push(p.total, p.name, key, p.version)
+                self._form[pos].push(form, p.name, key, p.version)
+
+    # ------------------------------------------------------
+    # reads
+    # ------------------------------------------------------
+
+    def _valid(self, pos):
+        def valid(key, version):
+            p = self._players.get(key)
+            return p is not None and p.version == version and pos in (ALL, p.pos)
+        return valid
+
+    def _board(self, heaps: dict, pos, k):
+        pos = pos or ALL
+        valid = self._valid(pos)
+        heaps[pos].compact(valid, len(self._players))
+        return heaps[pos].top(k or self.top_k, valid)
+
+    def top_scorers(self, pos: str = None, k: int = None) -> pd.DataFrame:
+        """Highest season totals, overall or for one position bucket."""
+        rows = []
+        for key, total in self._board(self._totals, pos, k):
+            p = self._players[key]
+            n = len(p.history)
+            rows.append((p.name, p.pos, p.team, n, total, total / n, p.best))
+        return pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+
+    def form(self, pos: str = None, k: int = None) -> pd.DataFrame:
+        """Best total over each player's last `form_window` matches."""
+        rows = []
+        for key, form_total in self._board(self._form, pos, k):
+            p = self._players[key]
+            n = len(p.recent)
+            rows.append((p.name, p.pos, p.team, n, form_total, form_total / n))
+        return pd.DataFrame(rows, columns=FORM_COLUMNS)
+
+    def team_totals(self) -> pd.DataFrame:
+        """Per team: matches, distinct players used, total and per-match score."""
+        rows = [
+            (team, len(self._team_matches[team]), len(self._team_players[team]),
+             total, total / len(self._team_matches[team]))
+            for team, total in self._team_totals.items()
+        ]
+        out = pd.DataFrame(rows, columns=TEAM_COLUMNS)
+        return out.sort_values(["total", "team"], ascending=[False, True], ignore_index=True)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, match_column: str = "Match", **kwargs) -> "Leaderboards":
+        """Build the views from a combined frame, one match per `match_column` value."""
+        boards = cls(**kwargs)
+        for match_id, rows in df.groupby(match_column, sort=False):
+            boards.add_match(match_id, rows)
+        return boards
@@ -0,0 +1,278 @@
+# lineup.py
+# ==========================================================
+#   Optimal fantasy XI from scored players: exact branch and
+#   bound over per-position candidates sorted by score, with
+#   formation counts, a per-team cap and an optional budget
+# ==========================================================
+
+import bisect
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import PLAYER_ID
+
+POSITIONS = ("GK", "DEF", "MID", "FWD")
+DEFAULT_TEAM_CAP = 3
+
+# resolution of the budget bound: prices are counted in budget / steps units
+_BUDGET_STEPS = 1000
+
+# outfield DEF-MID-FWD counts; every formation has one goalkeeper
+FORMATIONS = ("3-4-3", "3-5-2", "4-3-3", "4-4-2", "4-5-1", "5-3-2", "5-4-1")
+
+Lineup = namedtuple("Lineup", "formation total cost players")
+
+
+def formation_counts(formation) -> dict:
+    """'4-4-2' -> {'GK': 1, 'DEF': 4, 'MID': 4, 'FWD': 2}; dicts pass through."""
+    if isinstance(formation, dict):
+        return {pos: int(formation.get(pos, 0)) for pos in POSITIONS}
+    try:
+        d, m, f = (int(x) for x in str(formation).split("-"))
+    except ValueError:
+        raise ValueError(f"Formation must look like '4-4-2', got {formation!r}") from None
+    return {"GK": 1, "DEF": d, "MID": m, "FWD": f}
+
+
+def _candidate_frame(players: pd.DataFrame, team_column: str, price_column: str) -> pd.DataFrame:
+    """One row per player (scores summed when a player has several matches)."""
+    if team_column not in players.columns:
+        raise ValueError(f"No {team_column!r} column to apply the team cap to")
+    if price_column is not None and price_column not in players.columns:
+        raise ValueError(f"No {price_column!r} column to apply the budget to")
+
+    ids = players[PLAYER_ID] if PLAYER_ID in players.columns else pd.Series(np.nan, index=players.index)
+    key = ids.where(ids.notna() & (ids.astype(str) != ""), players["Player"]).astype(str)
+    out = pd.DataFrame({
+        "key": key.to_numpy(),
+        "row": np.arange(len(players)),
+        "pos": players["pos"].astype(str).to_numpy(),
+        "team": players[team_column].astype(str).to_numpy(),
+        "price": players[price_column].astype(float).to_numpy() if price_column else 0.0,
+        "score": players["score"].astype(float).to_numpy(),
+    })
+    return out.groupby("key", sort=False).agg(
+        row=("row", "first"), pos=("pos", "last"), team=("team", "last"),
+        price=("price", "last"), score=("score", "sum"),
+    ).reset_index(drop=True)
+
+
+def _undominated(cands: pd.DataFrame, slots: int, size: int, cap: int) -> pd.DataFrame:
+    """
+    Drop players that can never be needed in one position. With candidates
+    ordered by (score desc, price asc), x can be swapped for an unused,
+    no-worse and no-dearer player y whenever more such predecessors exist
+    than the other `slots - 1` picks and the teams already at the cap can
+    block, so some optimal lineup avoids x.
+    """
+    cands = cands.sort_values(["score", "price", "row"], ascending=[False, True, True])
+    blockers = (slots - 1) + (size - 1) // cap
+    seen = {}  # team -> sorted prices of predecessors
+    keep = []
+    for team, price in zip(cands["team"].tolist(), cands["price"].tolist()):
+        same = seen.get(team, [])
+        better = bisect.bisect_right(same, price) + sum(
+            1 for t, prices in seen.items() if t != team and prices[0] <= price
+        )
+        keep.append(better <= blockers)
+        bisect.insort(seen.setdefault(team, []), price)
+    return cands.iloc[np.flatnonzero(keep)]
+
+
+class _BranchAndBound:
+    """
+    Depth-first search over the formation's slots, position by position,
+    picking candidates in score order. A branch is cut once its score
+    bound (picks so far plus the best remaining candidates of every
+    position, ignoring caps and budget) cannot beat the incumbent. With a
+    budget, a second bound also counts prices: a knapsack table over the
+    remaining slots, ignoring the team cap, with prices rounded down to
+    budget / _BUDGET_STEPS units so it never undershoots.
+    """
+
+    def __init__(self, cands: dict, cap: int, budget: float = None):
+        self.cands = cands  # pos -> (scores, team codes, prices), score order
+        self.cap = cap
+        self.budget = budget
+        self.unit = budget / _BUDGET_STEPS if budget else 1.0
+        self.best_total = -np.inf
+        self.best = None
+
+    def _budget_tables(self, order: list, counts: dict) -> dict:
+        """
+        pos -> array [j, r, b]: best score of r more picks among the pos
+        candidates from index j on, plus every later position, spending at
+        most b units.
+        """
+        tables = {}
+        tail = np.zeros(_BUDGET_STEPS + 1)
+        for pos in reversed(order):
+            scores, _, prices = self.cands[pos]
+            weights = np.floor(np.asarray(prices) / self.unit).astype(int).clip(0).tolist()
+            table = np.empty((len(scores) + 1, counts[pos] + 1, _BUDGET_STEPS + 1))
+            table[-1] = -np.inf
+            table[-1, 0] = tail
+            for j in range(len(scores) - 1, -1, -1):
+                table[j] = table[j + 1]
+                w = weights[j]
+                if w <= _BUDGET_STEPS:
+                    np.maximum(
+                        table[j, 1:, w:], table[j + 1, :-1, :_BUDGET_STEPS + 1 - w] + scores[j],
+                        out=table[j, 1:, w:],
+                    )
+            tables[pos] = table
+            tail = table[0, counts[pos]]
+        return tables
+
+    def upper_bound(self, counts: dict) -> float:
+        """Best total any lineup of this formation could reach (caps ignored)."""
+        order = [pos for pos in POSITIONS if counts[pos]]
+        if any(len(self.cands[pos][0]) < counts[pos] for pos in order):
+            return -np.inf
+        if self.budget is None:
+            return sum(sum(self.cands[pos][0][:counts[pos]]) for pos in order)
+        return self._budget_tables(order, counts)[order[0]][0, counts[order[0]], -1]
+
+    def search(self, counts: dict) -> bool:
+        """Improve the incumbent with this formation; False if it has too few candidates."""
+        order = [pos for pos in POSITIONS if counts[pos]]
+        if any(len(self.cands[pos][0]) < counts[pos] for pos in order):
+            return False
+
+        prefix, cheapest = {}, {}
+        for pos in order:
+            scores, _, prices = self.cands[pos]
+            prefix[pos] = np.concatenate([[0.0], np.cumsum(scores)]).tolist()
+            cheapest[pos] = np.concatenate([[0.0], np.cumsum(np.sort(prices))]).tolist()
+
+        # per slot: position, picks still due in it afterwards, and bounds
+        # for all later positions
+        self._slots = []
+        for i, pos in enumerate(order):
+            later = order[i + 1:]
+            tail = sum(prefix[p][counts[p]] for p in later)
+            tail_cost = sum(cheapest[p][counts[p]] for p in later)
+            for rest in range(counts[pos] - 1, -1, -1):
+                self._slots.append((pos, rest, tail, tail_cost + cheapest[pos][rest]))
+        self._prefix = prefix
+        self._budget_bound = self._budget_tables(order, counts) if self.budget is not None else None
+        self._team_count = {}
+        self._picked = []
+        self._formation = counts
+        self._descend(0, 0, 0.0, 0.0)
+        return True
+
+    def _descend(self, k: int, start: int, total: float, cost: float) -> None:
+        if k == len(self._slots):
+            if total > self.best_total:
+                self.best_total = total
+                self.best = (self._formation, list(self._picked), cost)
+            return
+
+        pos, rest, tail, min_rest_cost = self._slots[k]
+        if self.budget is not None:
+            units = int((self.budget - cost) / self.unit + 1e-9)
+            if total + self._budget_bound[pos][start, rest + 1, units] <= self.best_total:
+                return  # nothing affordable from here can beat the incumbent
+
+        scores, teams, prices = self.cands[pos]
+        team_count = self._team_count
+        if k == len(self._slots) - 1:
+            # last slot: the first candidate that still fits is the best one
+            for j in range(start, len(scores)):
+                if total + scores[j] <= self.best_total:
+                    return
+                if team_count.get(teams[j], 0) < self.cap and (
+                    self.budget is None or cost + prices[j] <= self.budget
+                ):
+                    self._picked.append((pos, j))
+                    self._descend(k + 1, 0, total + scores[j], cost + prices[j])
+                    self._picked.pop()
+                    return
+            return
+
+        prefix = self._prefix[pos]
+        for j in range(start, len(scores) - rest):
+            if total + prefix[j + 1 + rest] - prefix[j] + tail <= self.best_total:
+                break  # candidates only get worse from here
+            if self.budget is not None and (
+                total + scores[j] + self._budget_bound[pos][j + 1, rest, units] <= self.best_total
+            ):
+                break  # same, even before paying for candidate j
+            team = teams[j]
+            if team_count.get(team, 0) >= self.cap:
+                continue
+            spent = cost + prices[j]
+            if self.budget is not None:
+                if spent + min_rest_cost > self.budget:
+                    continue
+                left = int((self.budget - spent) / self.unit + 1e-9)
+                if total + scores[j] + self._budget_bound[pos][j + 1, rest, left] <= self.best_total:
+                    continue
+            team_count[team] = team_count.get(team, 0) + 1
+            self._picked.append((pos, j))
+            self._descend(k + 1, j + 1 if rest else 0, total + scores[j], spent)
+            self._picked.pop()
+            team_count[team] -= 1
+
+
+def best_lineup(
+    players: pd.DataFrame,
+    formation=None,
+    team_cap: int = DEFAULT_TEAM_CAP,
+    budget: float = None,
+    team_column: str = "Squad",
+    price_column: str = "price",
+) -> Lineup:
+    """
+    Highest-scoring lineup from scored players (output of
+    calc_all_players_from_html, concatenated over any number of matches).
+
+    formation: '4-4-2', a {pos: count} dict, a list of either, or None for
+    every formation in FORMATIONS (the best one wins). At most `team_cap`
+    players come from one club (`team_column`); with a `budget`, the summed
+    `price_column` may not exceed it. A player listed in several matches is
+    one candidate with the summed score. The search is exact.
+
+    Returns Lineup(formation, total, cost, players), players being the
+    chosen rows of `players` (a player's first row if listed more than
+    once) in GK/DEF/MID/FWD order. Raises ValueError if no lineup
+    satisfies the constraints.
+    """
+    if formation is None:
+        formations = list(FORMATIONS)
+    elif isinstance(formation, (str, dict)):
+        formations = [formation]
+    else:
+        formations = list(formation)
+    counts = [formation_counts(f) for f in formations]
+    size = max(sum(c.values()) for c in counts)
+
+    cands = _candidate_frame(players, team_column, price_column if budget is not None else None)
+    codes = {team: i for i, team in enumerate(cands["team"].unique())}
+    by_pos, rows = {}, {}
+    for pos in POSITIONS:
+        slots = max(c[pos] for c in counts)
+        sub = _undominated(cands[cands["pos"] == pos], slots, size, team_cap) if slots else cands[:0]
+        by_pos[pos] = (
+            sub["score"].tolist(), [codes[t] for t in sub["team"]], sub["price"].tolist()
+        )
+        rows[pos] = sub["row"].tolist()
+
+    # most promising formation first, so the others start from a strong incumbent
+    search = _BranchAndBound(by_pos, team_cap, budget)
+    for c in sorted(counts, key=search.upper_bound, reverse=True):
+        search.search(c)
+    if search.best is None:
+        raise ValueError("No lineup satisfies the formation, team cap and budget")
+
+    chosen, picked, cost = search.best
+    index = [rows[pos][j] for pos, j in picked]
+    return Lineup(
+        formation="-".join(str(chosen[pos]) for pos in POSITIONS[1:]),
+        total=search.best_total,
+        cost=cost if budget is not None else None,
+        players=players.iloc[index],
+    )
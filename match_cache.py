@@ -0,0 +1,224 @@
+# match_cache.py
+# ==========================================================
+#   Content-addressed on-disk cache of parsed match tables
+#   (HTML bytes hash  ➜  merged per-team stat frames)
+# ==========================================================
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+try:
+    from pyarrow.lib import ArrowException
+except ImportError:  # Parquet through another engine
+    ArrowException = ValueError
+
+import scoring
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "HFW_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hfw-app")
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# entries written by other parser versions are dropped once unused this long
+DEFAULT_STALE_SECONDS = 7 * 24 * 3600
+
+# Every function whose output ends up in a cached frame. Editing any of them
+# changes parser_version(), which moves the cache to a fresh namespace.
+_PARSER_FUNCTIONS = (
+    scoring._cell_text,
+    scoring._expand_rows,
+    scoring._row_player_id,
+    scoring._table_to_frame,
+    scoring._team_table_name,
+    scoring._commented_tables,
+    scoring._iter_tables,
+    scoring._parse_document,
+    scoring._extract_team_tables_from_html,
+    scoring._flat_column_names,
+    scoring._build_schema,
+    scoring._keeps_column,
+    scoring._header_plan,
+    scoring._standardise_columns,
+    scoring._key_kinds,
+    scoring._player_keys,
+    scoring._merge_team_tables,
+)
+
+_MANIFEST = "manifest.json"
+_RE_VERSION_DIR = re.compile(r"^[0-9a-f]{12}$")
+
+
+def parser_version() -> str:
+    """Short hash of the parsing code and the pandas version."""
+    h = hashlib.sha256(pd.__version__.encode())
+    for fn in _PARSER_FUNCTIONS:
+        h.update(inspect.getsource(fn).encode())
+    h.update(repr(scoring._STANDARD_NAMES).encode())
+    h.update(repr(sorted(scoring.PROJECTED_COLUMNS)).encode())
+    return h.hexdigest()[:12]
+
+
+def _dir_size(path: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+
+class MatchTableCache:
+    """
+    Size-bounded LRU cache of the per-team frames built from one match report.
+
+    Entries are keyed by a SHA-256 of the HTML bytes and stored as one Parquet
+    file per team under <directory>/<parser version>/<key>/. A hit refreshes
+    the entry's mtime; once the cache grows past `max_bytes` the least
+    recently used entries are evicted, whatever parser version wrote them.
+
+    Entries written by a different parser version are kept at start-up
+    (another checkout or process may still be using them) and deleted only
+    once unused for `stale_seconds`. Only entry directories holding a
+    cache manifest are ever deleted. A frame that cannot be written as
+    Parquet is not cached (with a RuntimeWarning); scoring is unaffected.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        version: str = None,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+    ):
+        self.directory = directory
+        self.version = version or parser_version()
+        self.max_bytes = max_bytes
+        self.root = os.path.join(directory, self.version)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._drop_stale_versions(stale_seconds)
+
+    # ------------------------------------------------------
+    # keys and lookups
+    # ------------------------------------------------------
+
+    @staticmethod
+    def key(html) -> str:
+        """SHA-256 of the match report (str is hashed as UTF-8, bytes-like as is)."""
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        return hashlib.sha256(html).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str):
+        """team_name -> DataFrame, or None on a miss."""
+        manifest_path = os.path.join(self._entry(key), _MANIFEST)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            frames = {
+                team: pd.read_parquet(os.path.join(self._entry(key), fname))
+                for team, fname in manifest["teams"]
+            }
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        os.utime(manifest_path)  # LRU: mark as recently used
+        self.hits += 1
+        return frames
+
+    def put(self, key: str, team_frames: dict) -> None:
+        """Store team_name -> DataFrame atomically, then enforce the size bound."""
+        if os.path.isdir(self._entry(key)):
+            return
+
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            teams = []
+            for i, (team, df) in enumerate(team_frames.items()):
+                fname = f"team{i}.parquet"
+                df.to_parquet(os.path.join(tmp, fname), index=False)
+                teams.append([team, fname])
+            with open(os.path.join(tmp, _MANIFEST), "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "teams": teams}, f)
+            os.replace(tmp, self._entry(key))
+        except OSError:
+            # another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        except (ValueError, TypeError, ArrowException) as e:
+            # e.g. a mixed-type object column Arrow cannot convert: the
+            # cache is only an optimisation, so skip this entry
+            shutil.rmtree(tmp, ignore_errors=True)
+            warnings.warn(
+                f"Match tables not cached: {type(e).__name__}: {e}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            return
+
+        self._evict()
+
+    # ------------------------------------------------------
+    # housekeeping
+    # ------------------------------------------------------
+
+    @staticmethod
+    def _version_entries(root: str):
+        """(mtime, size, path) for every complete entry (one with a manifest) under root."""
+        out = []
+        for e in os.scandir(root):
+            manifest = os.path.join(e.path, _MANIFEST)
+            if e.is_dir() and not e.name.startswith(".") and os.path.exists(manifest):
+                out.append((os.stat(manifest).st_mtime, _dir_size(e.path), e.path))
+        return out
+
+    def _version_roots(self):
+        return [
+            e.path for e in os.scandir(self.directory)
+            if e.is_dir() and _RE_VERSION_DIR.match(e.name)
+        ]
+
+    def _entries(self):
+        return self._version_entries(self.root)
+
+    def _evict(self) -> None:
+        # the size budget covers every parser version sharing the directory
+        entries = sorted(e for root in self._version_roots() for e in self._version_entries(root))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def _drop_stale_versions(self, stale_seconds: float) -> None:
+        cutoff = time.time() - stale_seconds
+        for root in self._version_roots():
+            if root == self.root:
+                continue
+            for mtime, _, path in self._version_entries(root):
+                if mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "version": self.version,
+        }
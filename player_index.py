@@ -0,0 +1,228 @@
+# player_index.py
+# ==========================================================
+#   Player identity index across loaded matches: FBref player
+#   id (or normalized name)  ➜  (match, row) positions, with
+#   accent/case-insensitive and fuzzy name lookup
+# ==========================================================
+
+import difflib
+import unicodedata
+from collections import namedtuple
+
+import pandas as pd
+
+from scoring import PLAYER_ID
+
+PlayerRef = namedtuple("PlayerRef", "match row")
+
+_NAME_PREFIX = "name:"
+# the club; "Team" is only the Home/Away side and changes with the fixture
+TEAM_COLUMN = "Squad"
+
+
+def normalize_name(name) -> str:
+    """'  Gonçalo  INÁCIO' -> 'goncalo inacio' (accents stripped, case-folded)."""
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def _teams(df: pd.DataFrame) -> list:
+    if TEAM_COLUMN in df.columns:
+        return df[TEAM_COLUMN].astype(str).tolist()
+    return [None] * len(df)
+
+
+def _same_team(team, teams) -> bool:
+    # an unknown club (no Squad column) matches any
+    return team is None or None in teams or team in teams
+
+
+class PlayerIndex:
+    """
+    Maps each player identity to the rows holding that player in every
+    registered match frame. The identity is the FBref player id when the
+    row has one, else the normalized name. A name-only row joins the one id
+    seen with the same name and club (Squad), and rows indexed by name
+    before their id turned up are merged into it once it does. Frames are
+    referenced, not copied; add_match and remove_match cost O(rows of that
+    match), plus the rows moved when such a merge happens; exact lookups
+    are O(1).
+    """
+
+    def __init__(self):
+        self._frames = {}  # match -> DataFrame
+        self._refs = {}  # identity -> {match: [row, ...]} in the order matches were added
+        self._row_ids = {}  # match -> identity of every row
+        self._by_name = {}  # normalized name -> {identity}
+        self._by_token = {}  # name token -> {normalized name}
+        self._display = {}  # identity -> latest spelling of the name
+        self._names = {}  # identity -> {normalized names seen}
+        self._teams = {}  # identity -> {teams seen}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __contains__(self, query) -> bool:
+        return bool(self.resolve(query, fuzzy=False))
+
+    @property
+    def matches(self) -> list:
+        return list(self._frames)
+
+    # ------------------------------------------------------
+    # building
+    # ------------------------------------------------------
+
+    def add_match(self, match, df: pd.DataFrame) -> None:
+        """Index one match frame (replacing an earlier frame under the same key)."""
+        if match in self._frames:
+            self.remove_match(match)
+        self._frames[match] = df
+        row_ids = self._row_ids[match] = []
+
+        names = df["Player"].astype(str).tolist()
+        ids = df[PLAYER_ID].tolist() if PLAYER_ID in df.columns else [None] * len(df)
+        for row, (name, pid, team) in enumerate(zip(names, ids, _teams(df))):
+            norm = normalize_name(name)
+            has_id = isinstance(pid, str) and pid
+            if has_id:
+                identity = pid
+            else:
+                known = self._by_name.get(norm, ())
+                ids_for_name = [
+                    i for i in known
+                    if not i.startswith(_NAME_PREFIX) and _same_team(team, self._teams[i])
+                ]
+                identity = ids_for_name[0] if len(ids_for_name) == 1 else _NAME_PREFIX + norm
+            self._refs.setdefault(identity, {}).setdefault(match, []).append(row)
+            row_ids.append(identity)
+            self._display[identity] = name
+            self._names.setdefault(identity, set()).add(norm)
+            self._teams.setdefault(identity, set()).add(team)
+            self._by_name.setdefault(norm, set()).add(identity)
+            for token in norm.split():
+                self._by_token.setdefault(token, set()).add(norm)
+            unlinked = _NAME_PREFIX + norm
+            if has_id and unlinked in self._refs and _same_team(team, self._teams[unlinked]):
+                self._merge(unlinked, pid, team)
+
+    def _merge(self, name_identity, pid, team) -> None:
+        """Move a name-only identity's rows of `team` onto the player id."""
+        moved, kept_teams = {}, set()
+        for match, rows in list(self._refs[name_identity].items()):
+            row_ids, teams = self._row_ids[match], _teams(self._frames[match])
+            keep = []
+            for r in rows:
+                if _same_team(teams[r], {team}):
+                    moved.setdefault(match, []).append(r)
+                    row_ids[r] = pid
+                else:
+                    keep.append(r)
+            kept_teams.update(teams[r] for r in keep)
+            if keep:
+                self._refs[name_identity][match] = keep
+            else:
+                del self._refs[name_identity][match]
+        if not moved:
+            return
+        refs = self._refs[pid]
+        for match, rows in moved.items():
+            refs[match] = sorted(refs.get(match, []) + rows)
+        self._refs[pid] = {m: refs[m] for m in self._frames if m in refs}
+        if self._refs[name_identity]:
+            self._teams[name_identity] = kept_teams
+        else:
+            self._forget(name_identity)
+
+    def remove_match(self, match) -> None:
+        """Drop every row of one match from the index."""
+        if self._frames.pop(match, None) is None:
+            return
+        for identity in set(self._row_ids.pop(match)):
+            refs = self._refs[identity]
+            del refs[match]
+            if not refs:
+                self._forget(identity)
+
+    def _forget(self, identity) -> None:
+        self._refs.pop(identity, None)
+        self._display.pop(identity, None)
+        self._teams.pop(identity, None)
+        for norm in self._names.pop(identity, ()):
+            owners = self._by_name[norm]
+            owners.discard(identity)
+            if owners:
+                continue
+            del self._by_name[norm]
+            for token in norm.split():
+                names = self._by_token[token]
+                names.discard(norm)
+                if not names:
+                    del self._by_token[token]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, match_column: str = "Match") -> "PlayerIndex":
+        """Index a combined frame, one match per `match_column` value (or one match)."""
+        index = cls()
+        if match_column in df.columns:
+            for match, rows in df.groupby(match_column, sort=False):
+                index.add_match(match, rows)
+        else:
+            index.add_match(None, df)
+        return index
+
+    # ------------------------------------------------------
+    # lookups
+    # ------------------------------------------------------
+
+    def resolve(self, query, fuzzy: bool = True, n: int = 5, cutoff: float = 0.75) -> list:
+        """
+        Identities matching `query`, best first: an FBref player id, then an
+        exact normalized name, then a name containing every query token
+        ("inacio"), then (with `fuzzy`) close spellings via difflib.
+        """
+        query = str(query)
+        if query in self._refs:
+            return [query]
+        norm = normalize_name(query)
+        if norm in self._by_name:
+            return sorted(self._by_name[norm])
+
+        tokens = norm.split()
+        if tokens and all(t in self._by_token for t in tokens):
+            names = set.intersection(*(self._by_token[t] for t in tokens))
+            if names:
+                return sorted(i for name in sorted(names) for i in self._by_name[name])
+
+        if not fuzzy:
+            return []
+        close = difflib.get_close_matches(norm, self._by_name, n=n, cutoff=cutoff)
+        return [i for name in close for i in sorted(self._by_name[name])]
+
+    def name(self, identity) -> str:
+        """Latest spelling of the player's name as it appears in the frames."""
+        return self._display[identity]
+
+    def refs(self, query, fuzzy: bool = True) -> list:
+        """(match, row) positions of the best match for `query`."""
+        found = self.resolve(query, fuzzy=fuzzy)
+        if not found:
+            return []
+        return [PlayerRef(m, r) for m, rows in self._refs[found[0]].items() for r in rows]
+
+    def history(self, query, fuzzy: bool = True) -> pd.DataFrame:
+        """
+        Every row of the best-matching player across the indexed matches, in
+        the order matches were added, with a Match column. Empty if no player
+        matches `query`.
+        """
+        by_match = {}
+        for match, row in self.refs(query, fuzzy=fuzzy):
+            by_match.setdefault(match, []).append(row)
+        parts = [
+            self._frames[match].iloc[rows].assign(Match=match) for match, rows in by_match.items()
+        ]
+        if not parts:
+            return pd.DataFrame(columns=["Player", "Match"])
+        return pd.concat(parts)
@@ -0,0 +1,187 @@
+# profiling.py
+# ==========================================================
+#   Optional per-stage timing / memory instrumentation
+#   for the scoring pipeline
+# ==========================================================
+
+import time
+import tracemalloc
+
+import pandas as pd
+
+# pipeline stages in the order they run (see scoring.calc_all_players_from_html)
+PIPELINE_STAGES = (
+    "cache_lookup",
+    "extract",
+    "flatten_standardise",  # runs inside "merge"
+    "merge",
+    "goals_inference",
+    "combine",
+    "position_classification",
+    "compact",
+    "scoring",
+)
+
+
+class _StageRecord:
+    __slots__ = ("name", "seconds", "rows", "cols", "peak_bytes", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = 0
+        self.cols = 0
+        self.peak_bytes = 0
+
+    def update(self, rows: int = 0, cols: int = 0) -> None:
+        """Record how much data the stage processed."""
+        self.rows += rows
+        self.cols = max(self.cols, cols)
+
+
+class _Stage:
+    def __init__(self, profile, name):
+        self._profile = profile
+        self._record = _StageRecord(name)
+
+    def __enter__(self):
+        rec = self._record
+        if self._profile.trace_memory:
+            self._profile._push_memory(rec)
+        rec._start = time.perf_counter()
+        return rec
+
+    def __exit__(self, *exc):
+        rec = self._record
+        rec.seconds = time.perf_counter() - rec._start
+        if self._profile.trace_memory:
+            self._profile._pop_memory(rec)
+        self._profile._records.append(rec)
+        return False
+
+
+class PipelineProfile:
+    """
+    Collects wall time, rows/columns processed and (optionally) allocation
+    peaks for each pipeline stage. Pass one to calc_all_players_from_html
+    and read report() / to_frame() afterwards; one profile can accumulate
+    many matches.
+
+    trace_memory=True uses tracemalloc, which slows the pipeline down
+    noticeably – leave it off for plain timings. Its peaks cover the Python
+    heap only: lxml's native trees are not traced (benchmark.py measures
+    peak RSS for that).
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self._records = []
+        self._mem_stack = []  # [record, current bytes at entry]
+        self._started_tracemalloc = False
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    # ------------------------------------------------------
+    # tracemalloc bookkeeping (nested stages share one peak counter)
+    # ------------------------------------------------------
+
+    def _push_memory(self, rec):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        current, peak = tracemalloc.get_traced_memory()
+        # credit the peak reached so far to the enclosing stage before resetting
+        if self._mem_stack:
+            outer, outer_mem0 = self._mem_stack[-1]
+            outer.peak_bytes = max(outer.peak_bytes, peak - outer_mem0)
+        tracemalloc.reset_peak()
+        self._mem_stack.append([rec, current])
+
+    def _pop_memory(self, rec):
+        _, mem0 = self._mem_stack.pop()
+        peak = tracemalloc.get_traced_memory()[1]
+        rec.peak_bytes = max(rec.peak_bytes, peak - mem0)
+        if self._mem_stack:
+            outer, outer_mem0 = self._mem_stack[-1]
+            outer.peak_bytes = max(outer.peak_bytes, peak - outer_mem0)
+        elif self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # ------------------------------------------------------
+    # reporting
+    # ------------------------------------------------------
+
+    def report(self) -> list:
+        """One dict per stage call, in execution order (picklable)."""
+        return [
+            {
+                "stage": r.name,
+                "seconds": r.seconds,
+                "rows": r.rows,
+                "cols": r.cols,
+                "peak_bytes": r.peak_bytes,
+            }
+            for r in self._records
+        ]
+
+    def add(self, report: list) -> None:
+        """Fold in a report() produced elsewhere, e.g. by a worker process."""
+        for entry in report:
+            rec = _StageRecord(entry["stage"])
+            rec.seconds = entry["seconds"]
+            rec.rows = entry["rows"]
+            rec.cols = entry["cols"]
+            rec.peak_bytes = entry["peak_bytes"]
+            self._records.append(rec)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Per-stage totals: calls, total/mean ms, rows, max cols, Python-heap peak MB."""
+        df = pd.DataFrame(self.report(), columns=["stage", "seconds", "rows", "cols", "peak_bytes"])
+        summary = df.groupby("stage", sort=False).agg(
+            calls=("seconds", "size"),
+            total_ms=("seconds", "sum"),
+            mean_ms=("seconds", "mean"),
+            rows=("rows", "sum"),
+            cols=("cols", "max"),
+            peak_mb=("peak_bytes", "max"),
+        )
+        summary[["total_ms", "mean_ms"]] *= 1000
+        summary["peak_mb"] /= 1e6
+        order = [s for s in PIPELINE_STAGES if s in summary.index]
+        order += [s for s in summary.index if s not in order]
+        return summary.loc[order].reset_index()
+
+
+class _NullRecord:
+    __slots__ = ()
+
+    def update(self, rows: int = 0, cols: int = 0) -> None:
+        pass
+
+
+class _NullStage:
+    __slots__ = ()
+    _record = _NullRecord()
+
+    def __enter__(self):
+        return self._record
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullProfile:
+    """Stand-in used when profiling is off: every stage is a shared no-op."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+
+NULL_PROFILE = _NullProfile()
@@ -4,8 +4,21 @@
 #   ➜  fantasy scores (DEF/MID/FWD/GK)
 # ==========================================================
 
+import hashlib
+import mmap
+import os
+import re
+import sys
+import warnings
+from collections import namedtuple
+
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+from pandas.io.parsers import TextParser
+
+from profiling import NULL_PROFILE
 
 # ----------------------------------------------------------
 # position helper
@@ -242,128 +255,787 @@ def gk_score_calc(row: pd.Series) -> float:
     return round(score, 0)
 
 
+# ----------------------------------------------------------
+# Vectorized scoring engine
+# ----------------------------------------------------------
+
+# All outfield stats the formulas above read (plus team goals)
+OUTFIELD_STATS = [
+    "Aerial Duels_Won", "Aerial Duels_Lost",
+    "Performance_Tkl", "Challenges_Lost", "Performance_Int",
+    "Unnamed: 20_level_0_Clr", "Carries_Dis",
+    "Performance_Fls", "Performance_Off", "Performance_OG",
+    "Unnamed: 21_level_0_Err", "Passes_Cmp", "Passes_Att",
+    "Unnamed: 23_level_0_KP", "Take-Ons_Att", "Take-Ons_Succ",
+    "Blocks_Sh", "Performance_Crs", "Performance_SoT",
+    "Performance_Sh", "Unnamed: 5_level_0_Min",
+    "Performance_Gls", "Performance_Ast",
+    "Performance_CrdR", "Performance_PKcon",
+    "Performance_PKatt", "Performance_PK",
+    "Performance_PKwon", "goals_scored", "goals_conceded",
+]
+
+# GK stats keyed by matrix column, with the candidates _get_any tries
+GK_STATS = {
+    "Shot Stopping_GA": ["Shot Stopping_GA", "GA"],
+    "Shot Stopping_Saves": ["Shot Stopping_Saves", "Saves"],
+    "Launched_Cmp": ["Launched_Cmp"],
+    "Crosses_Stp": ["Crosses_Stp"],
+    "Sweeper_#OPA": ["Sweeper_#OPA", "#OPA"],
+}
+
+STAT_MATRIX_COLUMNS = OUTFIELD_STATS + list(GK_STATS)
+
+
+def _numeric_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as float64, NaN where missing or not convertible (like _get)."""
+    s = df[col]
+    if isinstance(s, pd.DataFrame):  # duplicate labels: first one wins
+        s = s.iloc[:, 0]
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def build_stat_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    One float64 matrix (rows x STAT_MATRIX_COLUMNS) for a match or a batch
+    of matches. Missing stats are 0, exactly as _get / _get_any default them.
+    """
+    mat = np.zeros((len(df), len(STAT_MATRIX_COLUMNS)))
+    for j, col in enumerate(OUTFIELD_STATS):
+        if col in df.columns:
+            mat[:, j] = np.nan_to_num(_numeric_column(df, col), nan=0.0)
+
+    # GK stats: first non-missing candidate per row
+    offset = len(OUTFIELD_STATS)
+    for j, candidates in enumerate(GK_STATS.values(), start=offset):
+        vals = np.full(len(df), np.nan)
+        for c in candidates:
+            if c in df.columns:
+                vals = np.where(np.isnan(vals), _numeric_column(df, c), vals)
+        mat[:, j] = np.nan_to_num(vals, nan=0.0)
+    return mat
+
+
+def _stat_view(mat: np.ndarray) -> dict:
+    """Name -> column view of a stat matrix."""
+    return {c: mat[:, j] for j, c in enumerate(STAT_MATRIX_COLUMNS)}
+
+
+def _pk_won_bonus(S: dict) -> np.ndarray:
+    return np.where(
+        (S["Performance_PKwon"] == 1) & (S["Performance_PK"] != 1), 6.4, 0.0
+    )
+
+
+def _def_scores(S: dict) -> np.ndarray:
+    team_conc = S["goals_conceded"]
+
+    score = (
+        1.9 * S["Aerial Duels_Won"]
+        - 1.5 * S["Aerial Duels_Lost"]
+        + 2.7 * S["Performance_Tkl"]
+        - 1.6 * S["Challenges_Lost"]
+        + 2.7 * S["Performance_Int"]
+        + 1.1 * S["Unnamed: 20_level_0_Clr"]
+        + (10 - (5 * team_conc))
+        + (
+            3
+            - 1.2 * S["Carries_Dis"]
+            - 0.6 * (S["Performance_Fls"] + S["Performance_Off"])
+            - 3.5 * S["Performance_OG"]
+            - 5 * S["Unnamed: 21_level_0_Err"]
+        )
+        + S["Passes_Cmp"] / 9.0
+        - ((S["Passes_Att"] - S["Passes_Cmp"]) / 4.5)
+        + S["Unnamed: 23_level_0_KP"]
+        + 2.5 * S["Take-Ons_Succ"]
+        - 0.8 * (S["Take-Ons_Att"] - S["Take-Ons_Succ"])
+        + 1.1 * S["Blocks_Sh"]
+        + 1.5 * S["Unnamed: 23_level_0_KP"]
+        + 1.2 * S["Performance_Crs"]
+        + 2.5 * S["Performance_SoT"]
+        + ((S["Performance_Sh"] - S["Performance_SoT"]) / 2.0)
+        + S["Unnamed: 5_level_0_Min"] / 30.0
+        + 10 * S["Performance_Gls"]
+        + 8 * S["Performance_Ast"]
+        - 5 * S["Performance_CrdR"]
+        - 5 * S["Performance_PKcon"]
+        - 5 * (S["Performance_PKatt"] - S["Performance_PK"])
+    )
+
+    score = score + _pk_won_bonus(S)
+
+    # early-sub clean sheet penalty
+    early_sub = (S["Unnamed: 5_level_0_Min"] <= 45) & (team_conc == 0)
+    score = score - np.where(early_sub, 5.0, 0.0)
+
+    return np.round(score, 0)
+
+
+def _mid_scores(S: dict) -> np.ndarray:
+    team_score = S["goals_scored"]
+    team_conc = S["goals_conceded"]
+
+    score = (
+        1.7 * S["Aerial Duels_Won"]
+        - 1.5 * S["Aerial Duels_Lost"]
+        + 2.6 * S["Performance_Tkl"]
+        - 1.2 * S["Challenges_Lost"]
+        + 2.5 * S["Performance_Int"]
+        + 1.1 * S["Unnamed: 20_level_0_Clr"]
+        + (4 - (2 * team_conc) + (2 * team_score))
+        + (
+            3
+            - 1.1 * S["Carries_Dis"]
+            - 0.6 * (S["Performance_Fls"] + S["Performance_Off"])
+            - 3.3 * S["Performance_OG"]
+            - 5 * S["Unnamed: 21_level_0_Err"]
+        )
+        + S["Passes_Cmp"] / 6.6
+        - ((S["Passes_Att"] - S["Passes_Cmp"]) / 3.2)
+        + S["Unnamed: 23_level_0_KP"]
+        + 2.9 * S["Take-Ons_Succ"]
+        - 0.8 * (S["Take-Ons_Att"] - S["Take-Ons_Succ"])
+        + 1.1 * S["Blocks_Sh"]
+        + 1.5 * S["Unnamed: 23_level_0_KP"]
+        + 1.2 * S["Performance_Crs"]
+        + 2.2 * S["Performance_SoT"]
+        + ((S["Performance_Sh"] - S["Performance_SoT"]) / 4.0)
+        + S["Unnamed: 5_level_0_Min"] / 30.0
+        + 10 * S["Performance_Gls"]
+        + 8 * S["Performance_Ast"]
+        - 5 * S["Performance_CrdR"]
+        - 5 * S["Performance_PKcon"]
+        - 5 * (S["Performance_PKatt"] - S["Performance_PK"])
+    )
+
+    score = score + _pk_won_bonus(S)
+
+    return np.round(score, 0)
+
+
+def _fwd_scores(S: dict) -> np.ndarray:
+    team_score = S["goals_scored"]
+
+    score = (
+        1.4 * S["Aerial Duels_Won"]
+        - 0.4 * S["Aerial Duels_Lost"]
+        + 2.6 * S["Performance_Tkl"]
+        - 1.0 * S["Challenges_Lost"]
+        + 2.7 * S["Performance_Int"]
+        + 0.8 * S["Unnamed: 20_level_0_Clr"]
+        + (3 * team_score)
+        + (
+            5
+            - 0.9 * S["Carries_Dis"]
+            - 0.5 * (S["Performance_Fls"] + S["Performance_Off"])
+            - 3.0 * S["Performance_OG"]
+            - 5 * S["Unnamed: 21_level_0_Err"]
+        )
+        + S["Passes_Cmp"] / 6.0
+        - ((S["Passes_Att"] - S["Passes_Cmp"]) / 8.0)
+        + S["Unnamed: 23_level_0_KP"]
+        + 3.0 * S["Take-Ons_Succ"]
+        - 1.0 * (S["Take-Ons_Att"] - S["Take-Ons_Succ"])
+        + 0.8 * S["Blocks_Sh"]
+        + 1.5 * S["Unnamed: 23_level_0_KP"]
+        + 1.2 * S["Performance_Crs"]
+        + 3.0 * S["Performance_SoT"]
+        + ((S["Performance_Sh"] - S["Performance_SoT"]) / 3.0)
+        + S["Unnamed: 5_level_0_Min"] / 30.0
+        + 10 * S["Performance_Gls"]
+        + 8 * S["Performance_Ast"]
+        - 5 * S["Performance_CrdR"]
+        - 5 * S["Performance_PKcon"]
+        - 5 * (S["Performance_PKatt"] - S["Performance_PK"])
+    )
+
+    score = score + _pk_won_bonus(S)
+
+    return np.round(score, 0)
+
+
+def _gk_scores(S: dict) -> np.ndarray:
+    GA = S["Shot Stopping_GA"]
+
+    # Goal concession penalty tiers: 0 / -5 / -5 - 3 per extra goal
+    ga_penalty = np.where(
+        GA == 0, 0.0, np.where(GA == 1, -5.0, -5 - 3 * (GA - 1))
+    )
+
+    score = (
+        17
+        + 2.5 * S["Shot Stopping_Saves"]
+        + 0.5 * S["Launched_Cmp"]
+        + 1.0 * S["Crosses_Stp"]
+        + 1.0 * S["Sweeper_#OPA"]
+        + ga_penalty
+    )
+    score = score + np.where(GA == 0, 2.0, 0.0)
+
+    return np.round(score, 0)
+
+
+_VECTOR_SCORERS = {
+    "FWD": _fwd_scores,
+    "DEF": _def_scores,
+    "GK": _gk_scores,
+}
+
+
+def score_stat_matrix(mat: np.ndarray, pos) -> np.ndarray:
+    """
+    Score every row of a stat matrix given its FWD/MID/DEF/GK bucket.
+    Each bucket is computed once over its masked rows; anything that is
+    not FWD/DEF/GK is scored like MID, as in the row path.
+    """
+    pos = np.asarray(pos, dtype=object)
+    scores = np.zeros(len(pos))
+    remaining = np.ones(len(pos), dtype=bool)
+    for bucket, scorer in _VECTOR_SCORERS.items():
+        mask = pos == bucket
+        if mask.any():
+            scores[mask] = scorer(_stat_view(mat[mask]))
+        remaining &= ~mask
+    if remaining.any():
+        scores[remaining] = _mid_scores(_stat_view(mat[remaining]))
+    return scores
+
+
+def _score_row(row: pd.Series) -> float:
+    """Reference (row-by-row) scorer."""
+    if row["pos"] == "FWD":
+        return fwd_score_calc(row)
+    elif row["pos"] == "MID":
+        return mid_score_calc(row)
+    elif row["pos"] == "DEF":
+        return def_score_calc(row)
+    elif row["pos"] == "GK":
+        return gk_score_calc(row)
+    else:
+        # fallback – treat unknown like MID
+        return mid_score_calc(row)
+
+
+SCORING_ENGINES = ("vectorized", "rows")
+
+
+def score_players(df: pd.DataFrame, engine: str = "vectorized") -> pd.Series:
+    """
+    Score a frame that already has the "pos" bucket column.
+
+    engine="vectorized" (default) builds one stat matrix for the whole frame;
+    engine="rows" runs the original per-row functions and is kept as the
+    reference the vectorized engine must match.
+    """
+    if engine == "rows":
+        if df.empty:
+            return pd.Series(index=df.index, dtype=float)
+        return df.apply(_score_row, axis=1).astype(float)
+    if engine != "vectorized":
+        raise ValueError(
+            f"Unknown scoring engine '{engine}' (expected one of {SCORING_ENGINES})."
+        )
+    mat = build_stat_matrix(df)
+    return pd.Series(score_stat_matrix(mat, df["pos"].to_numpy()), index=df.index)
+
+
 # ----------------------------------------------------------
 # HTML → per-team merged DataFrames
 # ----------------------------------------------------------
 
-def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = [
+def _flat_column_names(columns) -> list:
+    if isinstance(columns, pd.MultiIndex):
+        return [
             "_".join([str(x) for x in col if str(x) != "nan"]).strip("_")
-            for col in df.columns
+            for col in columns
         ]
-    else:
-        df.columns = [str(c) for c in df.columns]
+    return [str(c) for c in columns]
+
+
+def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = _flat_column_names(df.columns)
     return df
 
 
+# FBref column -> name used by the outfield formulas
+_STANDARD_NAMES = {
+    # core performance
+    "Player": "Player",
+    "Pos": "Pos",
+    "Min": "Unnamed: 5_level_0_Min",
+    "Gls": "Performance_Gls",
+    "Ast": "Performance_Ast",
+    "PK": "Performance_PK",
+    "PKatt": "Performance_PKatt",
+    "Sh": "Performance_Sh",
+    "SoT": "Performance_SoT",
+    "CrdY": "Performance_CrdY",
+    "CrdR": "Performance_CrdR",
+    "Tkl": "Performance_Tkl",
+    "Int": "Performance_Int",
+    # passing
+    "Cmp": "Passes_Cmp",
+    "Att": "Passes_Att",      # from the passing table
+    "KP": "Unnamed: 23_level_0_KP",
+    "Crs": "Performance_Crs",
+    # possession & misc
+    "Dis": "Carries_Dis",
+    "Won": "Aerial Duels_Won",
+    "Lost": "Aerial Duels_Lost",
+    "Fls": "Performance_Fls",
+    "Off": "Performance_Off",
+    "OG": "Performance_OG",
+    "PKcon": "Performance_PKcon",
+    "PKwon": "Performance_PKwon",
+    "Err": "Unnamed: 21_level_0_Err",
+    "Blocks": "Blocks_Sh",
+    # NOTE: no special renames for GK columns – we use their
+    # flattened names directly in gk_score_calc.
+}
+
+
 def _standardise_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     Rename FBref columns to the names used by your original outfield formula.
     GK columns are left with their natural flattened names
     (Shot Stopping_GA, Launched_Cmp, Crosses_Stp, Sweeper_#OPA, etc.).
     """
-    rename_map = {
-        # core performance
-        "Player": "Player",
-        "Pos": "Pos",
-        "Min": "Unnamed: 5_level_0_Min",
-        "Gls": "Performance_Gls",
-        "Ast": "Performance_Ast",
-        "PK": "Performance_PK",
-        "PKatt": "Performance_PKatt",
-        "Sh": "Performance_Sh",
-        "SoT": "Performance_SoT",
-        "CrdY": "Performance_CrdY",
-        "CrdR": "Performance_CrdR",
-        "Tkl": "Performance_Tkl",
-        "Int": "Performance_Int",
-        # passing
-        "Cmp": "Passes_Cmp",
-        "Att": "Passes_Att",      # from the passing table
-        "KP": "Unnamed: 23_level_0_KP",
-        "Crs": "Performance_Crs",
-        # possession & misc
-        "Dis": "Carries_Dis",
-        "Won": "Aerial Duels_Won",
-        "Lost": "Aerial Duels_Lost",
-        "Fls": "Performance_Fls",
-        "Off": "Performance_Off",
-        "OG": "Performance_OG",
-        "PKcon": "Performance_PKcon",
-        "PKwon": "Performance_PKwon",
-        "Err": "Unnamed: 21_level_0_Err",
-        "Blocks": "Blocks_Sh",
-        # NOTE: no special renames for GK columns – we use their
-        # flattened names directly in gk_score_calc.
-    }
-
-    rename_map = {k: v for k, v in rename_map.items() if k in df.columns}
+    rename_map = {k: v for k, v in _STANDARD_NAMES.items() if k in df.columns}
     df = df.rename(columns=rename_map)
     return df
 
 
-def _merge_team_tables(team_dfs):
-    """Merge the 6 outfield tables + GK table(s) for one team on Player."""
-    merged = None
-    for df in team_dfs:
-        df = _flatten_columns(df.copy())
+# FBref player id taken from each row's player link (see _table_to_frame)
+PLAYER_ID = "player_id"
+
+
+def _key_kinds(ids, shirts) -> list:
+    """Player keys available for one tab, strongest first."""
+    kinds = []
+    if ids is not None and not pd.isna(ids).any():
+        kinds.append("id")
+    if shirts is not None:
+        kinds.append("shirt")
+    kinds.append("order")
+    return kinds
+
+
+def _player_keys(players, ids, shirts, kind: str) -> pd.Index:
+    """
+    Row keys of one kind: "id" (FBref player id), "shirt" (name + shirt
+    number) or "order" (name + occurrence, always available).
+    """
+    if kind == "id":
+        return pd.Index(ids)
+    if kind == "shirt":
+        numbers = pd.to_numeric(pd.Series(shirts), errors="coerce")
+        return pd.Index([f"{p}#{n:g}" for p, n in zip(players, numbers)])
+    counts = {}
+    keys = []
+    for p in players:
+        n = counts.get(p, 0)
+        counts[p] = n + 1
+        keys.append(f"{p}@{n}")
+    return pd.Index(keys)
+
+
+# ----------------------------------------------------------
+# SCHEMA RESOLUTION – one column plan per header layout
+# ----------------------------------------------------------
+
+class SchemaWarning(UserWarning):
+    """An FBref table layout or scoring stat the parser does not recognise."""
+
+
+# Flattened + standardised names and the positions of the player, player id
+# and shirt-number columns for one header layout
+TableSchema = namedtuple(
+    "TableSchema", ["fingerprint", "names", "player_pos", "id_pos", "shirt_pos", "stats"]
+)
+
+# header signature -> TableSchema, shared by every table this process parses
+_SCHEMA_PLANS = {}
+_SCHEMA_USES = {}
+
+# every name a scoring formula can read
+_SCORING_COLUMNS = set(OUTFIELD_STATS[:-2]) | {c for cs in GK_STATS.values() for c in cs}
+
+
+def _build_schema(columns) -> TableSchema:
+    names = _flat_column_names(columns)
+    fingerprint = hashlib.sha1(repr(list(columns)).encode()).hexdigest()[:12]
+
+    # identify player column
+    player_pos = next(
+        (i for i, c in enumerate(names) if "player" in c.lower() and c != PLAYER_ID),
+        None,
+    )
+    if player_pos is None:
+        return TableSchema(fingerprint, names, None, None, None, ())
+
+    names[player_pos] = "Player"
+    # standardise outfield column names
+    names = [_STANDARD_NAMES.get(c, c) for c in names]
+    return TableSchema(
+        fingerprint,
+        names,
+        player_pos,
+        names.index(PLAYER_ID) if PLAYER_ID in names else None,
+        next((i for i, c in enumerate(names) if c == "#" or c.endswith("_#")), None),
+        tuple(c for c in names if c in _SCORING_COLUMNS),
+    )
+
+
+def resolve_schema(columns) -> TableSchema:
+    """
+    Column plan for a table header, computed once per distinct layout and
+    memoised for the life of the process.
+    """
+    key = tuple(columns)
+    plan = _SCHEMA_PLANS.get(key)
+    if plan is None:
+        plan = _SCHEMA_PLANS[key] = _build_schema(columns)
+        if plan.player_pos is None:
+            names = plan.names
+            warnings.warn(
+                f"Stats table layout {plan.fingerprint} has no player column and is skipped "
+                f"(columns: {', '.join(names[:8])}{', …' if len(names) > 8 else ''}).",
+                SchemaWarning,
+                stacklevel=4,
+            )
+    _SCHEMA_USES[key] = _SCHEMA_USES.get(key, 0) + 1
+    return plan
+
+
+def schema_report() -> pd.DataFrame:
+    """Every header layout resolved so far, with how often it was seen."""
+    return pd.DataFrame(
+        [
+            {
+                "fingerprint": plan.fingerprint,
+                "columns": len(plan.names),
+                "tables": _SCHEMA_USES.get(key, 0),
+                "has_player": plan.player_pos is not None,
+                "scoring_stats": len(plan.stats),
+            }
+            for key, plan in _SCHEMA_PLANS.items()
+        ],
+        columns=["fingerprint", "columns", "tables", "has_player", "scoring_stats"],
+    )
+
+
+def missing_scoring_stats(df: pd.DataFrame) -> list:
+    """
+    Scoring stats absent from a combined match frame. The formulas would
+    score them as 0; GK stats only count when the frame has a goalkeeper.
+    """
+    present = set(df.columns)
+    missing = [c for c in OUTFIELD_STATS if c not in present]
+    if "pos" in df.columns and (df["pos"] == "GK").any():
+        missing += [c for c, cands in GK_STATS.items() if not present.intersection(cands)]
+    return missing
+
+
+# ----------------------------------------------------------
+# COLUMN PROJECTION – convert only what scoring reads
+# ----------------------------------------------------------
+
+# columns kept from every tab besides the player / player id / shirt keys
+PROJECTED_COLUMNS = frozenset(_SCORING_COLUMNS | {"Player", "Pos"})
 
-        # identify player column
-        player_col = next((c for c in df.columns if "player" in c.lower()), None)
-        if not player_col:
+# header rows of a table -> (kept columns, their positions), or None to keep all
+_HEADER_PLANS = {}
+
+
+def _keeps_column(name: str) -> bool:
+    lname = name.lower()
+    # the position column, or what the Pos fallback in _combine_team_frames could pick
+    return name in PROJECTED_COLUMNS or ("pos" in lname and "xg" not in lname and "pass" not in lname)
+
+
+def _header_plan(head: list, header):
+    """
+    Columns of a table with these header rows (parsed once per layout) and
+    the positions of the ones scoring needs. None when the layout has no
+    player column, so the table is converted whole and reported by merge.
+    """
+    key = (tuple(map(tuple, head)), tuple(header) if isinstance(header, list) else header)
+    if key in _HEADER_PLANS:
+        return _HEADER_PLANS[key]
+
+    width = max(len(r) for r in head)
+    rows = [r + [""] * (width - len(r)) for r in head]
+    with TextParser(rows, header=header, thousands=",") as parser:
+        columns = parser.read().columns
+
+    schema = _build_schema(columns)
+    plan = None
+    if schema.player_pos is not None:
+        keys = {schema.player_pos, schema.id_pos, schema.shirt_pos}
+        keep = [i for i, c in enumerate(schema.names) if i in keys or _keeps_column(c)]
+        plan = (columns[keep], keep)
+    _HEADER_PLANS[key] = plan
+    return plan
+
+
+def _merge_team_tables(team_dfs, profile=NULL_PROFILE):
+    """
+    Merge the 6 outfield tables + GK table(s) for one team on the player.
+
+    Every tab is keyed on a stable player key (the FBref player id, falling
+    back to name + shirt number) and aligned to the first tab, then all tabs
+    are joined in one concat. Stat columns an earlier tab already provided
+    are dropped before anything is copied. Column names come from the
+    memoised per-layout plan (resolve_schema).
+    """
+    base = None  # (players, ids, shirts, kinds, key cache) of the first tab
+    parts = []
+    seen = set()
+    for df in team_dfs:
+        with profile.stage("flatten_standardise") as stage:
+            schema = resolve_schema(df.columns)
+            names = schema.names
+            stage.update(rows=len(df), cols=len(names))
+        if schema.player_pos is None:
             continue
-        df = df.rename(columns={player_col: "Player"})
 
         # drop total rows such as "16 Players"
-        df = df[~df["Player"].astype(str).str.contains("Players")]
+        players = df.iloc[:, schema.player_pos].astype(str).to_numpy()
+        keep = np.array(["Players" not in p for p in players], dtype=bool)
+        players = players[keep]
 
-        # standardise outfield column names
-        df = _standardise_columns(df)
+        ids = df.iloc[:, schema.id_pos].to_numpy()[keep] if schema.id_pos is not None else None
+        shirts = df.iloc[:, schema.shirt_pos].to_numpy()[keep] if schema.shirt_pos is not None else None
 
-        if merged is None:
-            merged = df
+        # avoid duplicate stat columns: only take what earlier tabs lack
+        if base is None:
+            cols = list(range(len(names)))
         else:
-            # avoid duplicate stat columns when merging
-            dup_cols = [c for c in df.columns if c != "Player" and c in merged.columns]
-            if dup_cols:
-                df = df.drop(columns=dup_cols)
-            merged = merged.merge(df, on="Player", how="left")
+            cols = [i for i, c in enumerate(names) if c not in seen]
+            if not cols:
+                continue
+        seen.update(names[i] for i in cols)
+
+        part = df.iloc[keep, cols]
+        part.columns = [names[i] for i in cols]
 
-    if merged is None:
+        if base is None:
+            base = (players, ids, shirts, _key_kinds(ids, shirts), {})
+        else:
+            b_players, b_ids, b_shirts, b_kinds, b_keys = base
+            kind = next(k for k in _key_kinds(ids, shirts) if k in b_kinds)
+            if kind not in b_keys:
+                b_keys[kind] = _player_keys(b_players, b_ids, b_shirts, kind)
+            keys = _player_keys(players, ids, shirts, kind)
+
+            unique = ~keys.duplicated()
+            if not unique.all():
+                part, keys = part[unique], keys[unique]
+            part.index = keys
+            part = part.reindex(b_keys[kind])
+        part.index = pd.RangeIndex(len(part))
+        parts.append(part)
+
+    if not parts:
         return pd.DataFrame()
 
-    merged.reset_index(drop=True, inplace=True)
-    return merged
+    return pd.concat(parts, axis=1)
+
+
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
 
+# FBref table ids: stats_<team id>_summary / _passing / ... and keeper_stats_<team id>
+_RE_TEAM_TABLE_ID = re.compile(r"^(?:keeper_stats|stats)_([0-9a-f]+)")
 
-def _extract_team_tables_from_html(html_text: str):
+_TABLE_CAPTIONS = (" Player Stats", " Goalkeeper Stats")
+
+
+def _cell_text(cell) -> str:
+    # same normalisation pd.read_html applies to every cell
+    return _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+
+
+def _expand_rows(rows, keep=None) -> list:
     """
-    Returns dict: team_name -> list of DataFrames for that team's tabs.
-    Includes both "Player Stats Table" and "Goalkeeper Stats".
+    <tr> elements -> lists of cell text, colspans repeated like read_html.
+    With `keep` (column positions), only those cells are read, in that
+    order, and short rows are padded with "".
+    """
+    out = []
+    if keep is None:
+        for tr in rows:
+            texts = []
+            for cell in tr.xpath("./td|./th"):
+                texts.extend([_cell_text(cell)] * int(cell.get("colspan") or 1))
+            out.append(texts)
+        return out
+
+    slots = {pos: j for j, pos in enumerate(keep)}
+    for tr in rows:
+        texts = [""] * len(keep)
+        pos = 0
+        for cell in tr.xpath("./td|./th"):
+            span = int(cell.get("colspan") or 1)
+            text = None
+            for k in range(pos, pos + span):
+                j = slots.get(k)
+                if j is not None:
+                    if text is None:
+                        text = _cell_text(cell)
+                    texts[j] = text
+            pos += span
+        out.append(texts)
+    return out
+
+
+_RE_PLAYER_HREF = re.compile(r"/players/([0-9a-f]{8})/")
+
+
+def _row_player_id(tr):
+    pid = tr.xpath("./*[@data-append-csv]/@data-append-csv")
+    if pid:
+        return str(pid[0])
+    for href in tr.xpath(".//a/@href"):
+        m = _RE_PLAYER_HREF.search(href)
+        if m:
+            return m.group(1)
+    return None
+
+
+def _table_to_frame(table, all_stats: bool = True) -> pd.DataFrame:
     """
-    soup = BeautifulSoup(html_text, "html.parser")
-    tables = soup.find_all("table")
-    dfs = pd.read_html(html_text)
+    Build a DataFrame from one lxml <table> element, producing the same
+    (multi-level) columns and dtypes pd.read_html would for that table,
+    plus a player_id column when the rows link to FBref player pages.
+    all_stats=False reads and converts only the columns scoring uses
+    (PROJECTED_COLUMNS plus the player keys).
+    """
+    # drop hidden cells, as read_html(displayed_only=True) does
+    for elem in table.xpath(".//style"):
+        elem.drop_tree()
+    for elem in table.xpath(".//*[@style]"):
+        if "display:none" in elem.get("style", "").replace(" ", ""):
+            elem.drop_tree()
+
+    head_rows = table.xpath("./thead/tr")
+    body_rows = table.xpath(".//tbody//tr") + table.xpath("./tr")
+    foot_rows = table.xpath(".//tfoot//tr")
+    if not head_rows:
+        while body_rows and all(c.tag == "th" for c in body_rows[0].xpath("./td|./th")):
+            head_rows.append(body_rows.pop(0))
+
+    head = _expand_rows(head_rows)
+    if len(head) == 1:
+        header = 0
+    elif head:
+        header = [i for i, r in enumerate(head) if any(r)]
+    else:
+        header = None
+
+    plan = None if all_stats or not head else _header_plan(head, header)
+    if plan is not None:
+        columns, keep = plan
+        rows = _expand_rows(body_rows + foot_rows, keep)
+        with TextParser(rows, header=None, thousands=",") as parser:
+            df = parser.read() if rows else pd.DataFrame(columns=range(len(keep)))
+        df.columns = columns
+    else:
+        rows = head + _expand_rows(body_rows) + _expand_rows(foot_rows)
+        if not rows:
+            return pd.DataFrame()
+
+        width = max(len(r) for r in rows)
+        for r in rows:
+            r.extend([""] * (width - len(r)))
+        with TextParser(rows, header=header, thousands=",") as parser:
+            df = parser.read()
+
+    # FBref player id per data row, from data-append-csv or the player link
+    player_ids = [_row_player_id(tr) for tr in body_rows + foot_rows]
+
+    if any(player_ids) and len(player_ids) == len(df):
+        nlevels = df.columns.nlevels
+        df[(PLAYER_ID,) + ("",) * (nlevels - 1) if nlevels > 1 else PLAYER_ID] = player_ids
+    return df
+
+
+def _team_table_name(table):
+    """Team name if this <table> is a player/GK stats table, else None."""
+    caption = table.find("caption")
+    if caption is not None:
+        text = caption.text_content()
+        for marker in _TABLE_CAPTIONS:
+            if marker in text:
+                return text.split(marker)[0].strip()
+        return None
+    # no caption: fall back to the FBref table id
+    m = _RE_TEAM_TABLE_ID.match(table.get("id", ""))
+    return m.group(1) if m else None
 
-    team_to_dfs = {}
-    idx = 0
-    for t in tables:
-        caption = t.find("caption")
-        if caption:
-            text = caption.get_text()
 
-            if "Player Stats Table" in text:
-                team_name = text.split(" Player Stats")[0].strip()
-                df = dfs[idx]
-                team_to_dfs.setdefault(team_name, []).append(df)
+def _commented_tables(comment):
+    """
+    <table> elements hidden inside an HTML comment, as FBref serves most
+    stats tabs on raw pages. A cheap substring scan rejects unrelated
+    comments; only candidate fragments are parsed, never the whole page.
+    """
+    text = comment.text or ""
+    if "<table" not in text or not any(m in text for m in _TABLE_CAPTIONS):
+        return []
+    fragment = lxml_html.fragment_fromstring(text, create_parent="div")
+    return list(fragment.iter("table"))
+
+
+def _iter_tables(doc):
+    """Every <table> in document order, including comment-wrapped ones."""
+    for node in doc.iter("table", etree.Comment):
+        if node.tag is etree.Comment:
+            yield from _commented_tables(node)
+        else:
+            yield node
+
+
+# bytes handed to the incremental parser per feed() call
+_FEED_CHUNK = 1 << 20
+
+
+def _parse_document(html):
+    """
+    lxml document for a page given as str or any bytes-like object
+    (bytes, bytearray, memoryview, mmap). Bytes are decoded as UTF-8 by
+    the parser itself, fed a chunk at a time, so no str copy of the page
+    is ever made.
+    """
+    if isinstance(html, str):
+        return lxml_html.document_fromstring(html)
+    with memoryview(html) as view, view.cast("B") as data:
+        if len(data) == 0:
+            raise etree.ParserError("Document is empty")
+        parser = lxml_html.HTMLParser(encoding="utf-8")
+        for start in range(0, len(data), _FEED_CHUNK):
+            parser.feed(data[start : start + _FEED_CHUNK].tobytes())
+    return parser.close()
+
+
+def _extract_team_tables_from_html(html_text, all_stats: bool = True):
+    """
+    Returns dict: team_name -> list of DataFrames for that team's tabs.
+    Includes both "Player Stats Table" and "Goalkeeper Stats".
 
-            elif "Goalkeeper Stats" in text:
-                team_name = text.split(" Goalkeeper Stats")[0].strip()
-                df = dfs[idx]
-                team_to_dfs.setdefault(team_name, []).append(df)
+    The page is parsed once with lxml and only the matching tables are
+    turned into DataFrames; every other table on the page is skipped.
+    Tables FBref wraps in HTML comments are found too. all_stats=False
+    keeps only the columns scoring uses (see _table_to_frame).
+    """
+    doc = _parse_document(html_text)
 
-        idx += 1
+    team_to_dfs = {}
+    for table in _iter_tables(doc):
+        team_name = _team_table_name(table)
+        if team_name is None:
+            continue
+        team_to_dfs.setdefault(team_name, []).append(_table_to_frame(table, all_stats))
 
     return team_to_dfs
 
@@ -372,140 +1044,474 @@ def _extract_team_tables_from_html(html_text: str):
 # MAIN ENTRY POINT used by Streamlit
 # ----------------------------------------------------------
 
-def calc_all_players_from_html(html_text: str) -> pd.DataFrame:
+def _team_frames_from_html(html_text, cache=None, profile=NULL_PROFILE,
+                           all_stats: bool = False) -> dict:
     """
-    Main function:
-      - Read FBref match-report HTML (already uploaded),
-      - Merge all per-team tables (outfield + GK),
-      - Compute scores.
+    team_name -> merged per-team DataFrame (the output of _merge_team_tables).
+    With a cache (see match_cache.MatchTableCache) the parse is skipped for
+    HTML that has been seen before. Projected and all-stats frames are
+    cached under separate keys.
     """
-    team_tables = _extract_team_tables_from_html(html_text)
+    key = None
+    if cache is not None:
+        with profile.stage("cache_lookup") as stage:
+            key = cache.key(html_text) + ("-all" if all_stats else "")
+            cached = cache.get(key)
+            if cached is not None:
+                stage.update(rows=sum(len(df) for df in cached.values()))
+        if cached is not None:
+            return cached
+
+    with profile.stage("extract") as stage:
+        team_tables = _extract_team_tables_from_html(html_text, all_stats)
+        all_tables = [df for dfs in team_tables.values() for df in dfs]
+        stage.update(
+            rows=sum(len(df) for df in all_tables),
+            cols=sum(df.shape[1] for df in all_tables),
+        )
     if len(team_tables) == 0:
         raise ValueError("No team player stats tables found in the HTML.")
 
     # Build merged table for each team
     team_frames = {}
     for team, dfs in team_tables.items():
-        team_frames[team] = _merge_team_tables(dfs)
+        with profile.stage("merge") as stage:
+            team_frames[team] = _merge_team_tables(dfs, profile=profile)
+            stage.update(rows=len(team_frames[team]), cols=team_frames[team].shape[1])
+
+    if cache is not None and team_frames:
+        cache.put(key, team_frames)
+    return team_frames
+
+
+def calc_all_players_from_html(
+    html_text,
+    engine: str = "vectorized",
+    cache=None,
+    profile=NULL_PROFILE,
+    full: bool = False,
+    compact: bool = True,
+    all_stats: bool = False,
+) -> pd.DataFrame:
+    """
+    Main function:
+      - Read FBref match-report HTML (already uploaded) given as str or
+        bytes-like (bytes, memoryview, mmap – parsed without decoding to str),
+      - Merge all per-team tables (outfield + GK), or load them from `cache`,
+      - Compute scores (engine="rows" uses the per-row reference functions).
+
+    Pass a profiling.PipelineProfile as `profile` to record per-stage
+    timings, sizes and memory peaks. full=True returns every internal stat
+    column alongside the slim ["Player", "Team", "pos", "score"] result
+    (the input score_breakdown and debug_player_components expect).
+    compact=True stores the frame with lossless compact dtypes
+    (see compact_dtypes); scores are the same either way.
+
+    Only the stat columns the scoring formulas read are parsed and merged
+    (PROJECTED_COLUMNS); all_stats=True keeps every column FBref publishes,
+    for auditing. Scores are the same either way.
+
+    Scoring stats the page has no column for are reported with a
+    SchemaWarning and listed in result.attrs["missing_stats"].
+    """
+    team_frames = _team_frames_from_html(
+        html_text, cache=cache, profile=profile, all_stats=all_stats
+    )
+    combined_full = _combine_team_frames(team_frames, profile=profile)
+
+    # a stat the page does not provide would silently score as 0
+    missing = missing_scoring_stats(combined_full)
+    if missing:
+        warnings.warn(
+            f"Match report has no column for scoring stats {missing}; they score as 0.",
+            SchemaWarning,
+            stacklevel=2,
+        )
 
-    if len(team_frames) == 0:
-        raise ValueError("Could not create any team dataframes from HTML.")
+    if compact:
+        with profile.stage("compact") as stage:
+            combined_full = compact_dtypes(combined_full)
+            stage.update(rows=len(combined_full), cols=combined_full.shape[1])
 
-    teams = list(team_frames.keys())
+    with profile.stage("scoring") as stage:
+        combined_full["score"] = score_players(combined_full, engine=engine)
+        stage.update(rows=len(combined_full), cols=len(STAT_MATRIX_COLUMNS))
 
-    # ---- infer goals scored per team from Gls column ----
-    if len(teams) >= 1:
-        t1 = teams[0]
-        df1 = team_frames[t1]
-        g1 = _get(df1.sum(numeric_only=True), "Performance_Gls", 0)
+    if full:
+        slim = ["Player", "Team", "pos", "score"]
+        result = combined_full[slim + [c for c in combined_full.columns if c not in slim]]
     else:
-        raise ValueError("No first team data found.")
+        # Slim result for the UI
+        result = combined_full[["Player", "Team", "pos", "score"]].copy()
+    result.attrs["missing_stats"] = missing
+    return result
+
+
+def calc_all_players_from_file(path, **kwargs) -> pd.DataFrame:
+    """
+    calc_all_players_from_html for a saved match report on disk. The file
+    is memory-mapped and parsed straight from the mapping, so neither the
+    bytes nor a decoded copy of the page is held in memory.
+    Keyword arguments are those of calc_all_players_from_html.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return calc_all_players_from_html(b"", **kwargs)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return calc_all_players_from_html(mapped, **kwargs)
+
+
+# merged column layout -> fallback position column (or None)
+_POS_COLUMNS = {}
+
+
+def _pos_column(columns: tuple):
+    """Fallback position column for a merged layout without "Pos"."""
+    if columns not in _POS_COLUMNS:
+        _POS_COLUMNS[columns] = next(
+            (c for c in columns
+             if "pos" in str(c).lower()
+             and "xg" not in str(c).lower() and "pass" not in str(c).lower()),
+            None,
+        )
+    return _POS_COLUMNS[columns]
 
-    if len(teams) >= 2:
-        t2 = teams[1]
-        df2 = team_frames[t2]
-        g2 = _get(df2.sum(numeric_only=True), "Performance_Gls", 0)
-    else:
-        t2 = None
-        df2 = pd.DataFrame()
-        g2 = 0
 
-    # attach goals_scored / goals_conceded and team label (for outfield logic)
-    if len(teams) >= 1:
-        team_frames[t1]["goals_scored"] = g1
-        team_frames[t1]["goals_conceded"] = g2
-        team_frames[t1]["Team"] = "Home"
+def _combine_team_frames(team_frames: dict, profile=NULL_PROFILE) -> pd.DataFrame:
+    """
+    Both teams' merged frames as one frame with goals_scored / goals_conceded,
+    Team (Home/Away), Squad (club name), Pos and the FWD/MID/DEF/GK bucket
+    "pos" – everything the scoring step needs.
+    """
+    if len(team_frames) == 0:
+        raise ValueError("Could not create any team dataframes from HTML.")
+
+    with profile.stage("goals_inference") as stage:
+        teams = list(team_frames.keys())
+
+        # ---- infer goals scored per team from Gls column ----
+        if len(teams) >= 1:
+            t1 = teams[0]
+            df1 = team_frames[t1]
+            g1 = _get(df1.sum(numeric_only=True), "Performance_Gls", 0)
+        else:
+            raise ValueError("No first team data found.")
 
-    if len(teams) >= 2:
-        team_frames[t2]["goals_scored"] = g2
-        team_frames[t2]["goals_conceded"] = g1
-        team_frames[t2]["Team"] = "Away"
+        if len(teams) >= 2:
+            t2 = teams[1]
+            df2 = team_frames[t2]
+            g2 = _get(df2.sum(numeric_only=True), "Performance_Gls", 0)
+        else:
+            t2 = None
+            df2 = pd.DataFrame()
+            g2 = 0
+
+        # attach goals_scored / goals_conceded and team label (for outfield logic)
+        # plus the club name from the table caption as "Squad"
+        if len(teams) >= 1:
+            team_frames[t1]["goals_scored"] = g1
+            team_frames[t1]["goals_conceded"] = g2
+            team_frames[t1]["Team"] = "Home"
+            team_frames[t1]["Squad"] = t1
+
+        if len(teams) >= 2:
+            team_frames[t2]["goals_scored"] = g2
+            team_frames[t2]["goals_conceded"] = g1
+            team_frames[t2]["Team"] = "Away"
+            team_frames[t2]["Squad"] = t2
+        stage.update(rows=sum(len(df) for df in team_frames.values()))
 
     # combine both teams
-    combined_full = pd.concat(team_frames.values(), ignore_index=True)
-
-    # ------------------------------------------------------
-    #  Robust detection of the Position column
-    # ------------------------------------------------------
-    if "Pos" not in combined_full.columns:
-        pos_candidate = None
-        for c in combined_full.columns:
-            cname = str(c).lower()
-            if "pos" in cname and "xg" not in cname and "pass" not in cname:
-                pos_candidate = c
-                break
-
-        if pos_candidate is not None:
-            combined_full = combined_full.rename(columns={pos_candidate: "Pos"})
+    with profile.stage("combine") as stage:
+        combined_full = pd.concat(team_frames.values(), ignore_index=True)
+        stage.update(rows=len(combined_full), cols=combined_full.shape[1])
+
+    with profile.stage("position_classification") as stage:
+        # ------------------------------------------------------
+        #  Robust detection of the Position column
+        # ------------------------------------------------------
+        if "Pos" not in combined_full.columns:
+            pos_candidate = _pos_column(tuple(combined_full.columns))
+            if pos_candidate is not None:
+                combined_full = combined_full.rename(columns={pos_candidate: "Pos"})
+            else:
+                combined_full["Pos"] = "UNK"
+
+        # ------------------------------------------------------
+        #  Classify into FWD / MID / DEF / GK
+        # ------------------------------------------------------
+        combined_full["pos"] = combined_full["Pos"].apply(position_calcul)
+        stage.update(rows=len(combined_full))
+    return combined_full
+
+
+# ----------------------------------------------------------
+# COMPACT DTYPES – lossless downcasts for full-stat frames
+# ----------------------------------------------------------
+
+TEAM_DTYPE = pd.CategoricalDtype(["Home", "Away"])
+POS_BUCKET_DTYPE = pd.CategoricalDtype(["FWD", "MID", "DEF", "GK"])
+
+# low-cardinality text columns stored as categoricals
+_CATEGORY_COLUMNS = {"Team": TEAM_DTYPE, "pos": POS_BUCKET_DTYPE, "Pos": "category",
+                     "Squad": "category", "Nation": "category"}
+# repeated across a season: one shared str object per distinct value
+_INTERNED_COLUMNS = ("Player", PLAYER_ID)
+
+_INT_TYPES = (np.int8, np.int16, np.int32)
+
+
+def _compact_types(block: np.ndarray) -> list:
+    """
+    Per column of a float64 block: the smallest int type, else float32,
+    that round-trips every value exactly; float64 when neither does.
+    """
+    with np.errstate(invalid="ignore"):
+        finite = np.isfinite(block).all(axis=0)
+        integral = finite & (block == np.trunc(block)).all(axis=0)
+        as_f32 = block.astype(np.float32).astype(np.float64)
+        f32_ok = ((as_f32 == block) | np.isnan(block)).all(axis=0)
+    if len(block):
+        lo = np.where(finite, block, 0).min(axis=0)
+        hi = np.where(finite, block, 0).max(axis=0)
+    else:
+        lo = hi = np.zeros(block.shape[1])
+
+    types = []
+    for j in range(block.shape[1]):
+        t = np.float64
+        if integral[j]:
+            t = next(
+                (it for it in _INT_TYPES
+                 if np.iinfo(it).min <= lo[j] and hi[j] <= np.iinfo(it).max),
+                np.float64,
+            )
+        if t is np.float64 and f32_ok[j]:
+            t = np.float32
+        types.append(t)
+    return types
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Memory-compact copy of a full-stat frame: numeric columns become the
+    smallest integer or float32 type that converts back to exactly the
+    same float64 values (anything else stays float64), Team / pos / Pos /
+    Squad / Nation become categoricals and player names are interned.
+
+    Every cast is checked to round-trip, so build_stat_matrix – and hence
+    every score – is identical to the float64 frame.
+    """
+    dtypes = list(df.dtypes)
+    numeric = [j for j, t in enumerate(dtypes) if t.kind in "iuf" and t.itemsize == 8]
+    block = df.iloc[:, numeric].to_numpy(dtype=np.float64)
+    types = _compact_types(block)
+
+    out = {}
+    for k, j in enumerate(numeric):
+        if types[k] is np.float64 and dtypes[j].kind != "f":
+            out[j] = df.iloc[:, j]  # wide integers stay as they are
         else:
-            combined_full["Pos"] = "UNK"
-
-    # ------------------------------------------------------
-    #  Classify into FWD / MID / DEF / GK and compute scores
-    # ------------------------------------------------------
-    combined_full["pos"] = combined_full["Pos"].apply(position_calcul)
-
-    def _apply_score(row):
-        if row["pos"] == "FWD":
-            return fwd_score_calc(row)
-        elif row["pos"] == "MID":
-            return mid_score_calc(row)
-        elif row["pos"] == "DEF":
-            return def_score_calc(row)
-        elif row["pos"] == "GK":
-            return gk_score_calc(row)
+            out[j] = block[:, k].astype(types[k])
+    for j in range(df.shape[1]):
+        if j in out:
+            continue
+        col, s = df.columns[j], df.iloc[:, j]
+        if col in _CATEGORY_COLUMNS and s.dtype == object:
+            out[j] = s.astype(_CATEGORY_COLUMNS[col])
+        elif col in _INTERNED_COLUMNS and s.dtype == object:
+            out[j] = s.map(lambda v: sys.intern(v) if isinstance(v, str) else v)
         else:
-            # fallback – treat unknown like MID
-            return mid_score_calc(row)
+            out[j] = s
+    out = dict(sorted(out.items()))
+    compact = pd.DataFrame(out, index=df.index)
+    compact.columns = df.columns
+    return compact
 
-    combined_full["score"] = combined_full.apply(_apply_score, axis=1)
 
-    # Slim result for the UI
-    result = combined_full[["Player", "Team", "pos", "score"]].copy()
-    return result
+# ----------------------------------------------------------
+# BULK SCORE BREAKDOWN – every player, every component
+# ----------------------------------------------------------
+
+# Per-position coefficients of the outfield formulas, grouped into the
+# components reported by score_breakdown (see def/mid/fwd_score_calc).
+_OUTFIELD_COEFFS = {
+    "DEF": dict(
+        aerial_won=1.9, aerial_lost=1.5, tkl=2.7, challenges_lost=1.6, int=2.7,
+        clr=1.1, result_base=10, result_conceded=-5, result_scored=0,
+        discipline_base=3, dis=1.2, fouls_offsides=0.6, og=3.5,
+        cmp_div=9.0, miss_div=4.5, to_succ=2.5, to_fail=0.8, blocks=1.1,
+        sot=2.5, off_target_div=2.0, early_sub=5,
+    ),
+    "MID": dict(
+        aerial_won=1.7, aerial_lost=1.5, tkl=2.6, challenges_lost=1.2, int=2.5,
+        clr=1.1, result_base=4, result_conceded=-2, result_scored=2,
+        discipline_base=3, dis=1.1, fouls_offsides=0.6, og=3.3,
+        cmp_div=6.6, miss_div=3.2, to_succ=2.9, to_fail=0.8, blocks=1.1,
+        sot=2.2, off_target_div=4.0, early_sub=0,
+    ),
+    "FWD": dict(
+        aerial_won=1.4, aerial_lost=0.4, tkl=2.6, challenges_lost=1.0, int=2.7,
+        clr=0.8, result_base=0, result_conceded=0, result_scored=3,
+        discipline_base=5, dis=0.9, fouls_offsides=0.5, og=3.0,
+        cmp_div=6.0, miss_div=8.0, to_succ=3.0, to_fail=1.0, blocks=0.8,
+        sot=3.0, off_target_div=3.0, early_sub=0,
+    ),
+}
+
+OUTFIELD_COMPONENTS = [
+    "aerials", "tackles", "interceptions", "clearances", "team_result",
+    "discipline", "passing", "key_passes", "take_ons", "blocks", "crosses",
+    "shooting", "minutes", "goals", "assists", "red_cards", "penalties",
+    "pk_won_bonus", "early_sub_penalty",
+]
+GK_COMPONENTS = [
+    "gk_base", "saves", "launched", "crosses_stopped", "sweeper",
+    "goals_against", "clean_sheet",
+]
+BREAKDOWN_COMPONENTS = OUTFIELD_COMPONENTS + GK_COMPONENTS
+
+
+def _outfield_components(S: dict, c: dict) -> dict:
+    conc = S["goals_conceded"]
+    kp = S["Unnamed: 23_level_0_KP"]
+    return {
+        "aerials": c["aerial_won"] * S["Aerial Duels_Won"] - c["aerial_lost"] * S["Aerial Duels_Lost"],
+        "tackles": c["tkl"] * S["Performance_Tkl"] - c["challenges_lost"] * S["Challenges_Lost"],
+        "interceptions": c["int"] * S["Performance_Int"],
+        "clearances": c["clr"] * S["Unnamed: 20_level_0_Clr"],
+        "team_result": (
+            c["result_base"] + c["result_conceded"] * conc + c["result_scored"] * S["goals_scored"]
+        ),
+        "discipline": (
+            c["discipline_base"]
+            - c["dis"] * S["Carries_Dis"]
+            - c["fouls_offsides"] * (S["Performance_Fls"] + S["Performance_Off"])
+            - c["og"] * S["Performance_OG"]
+            - 5 * S["Unnamed: 21_level_0_Err"]
+        ),
+        "passing": (
+            S["Passes_Cmp"] / c["cmp_div"]
+            - (S["Passes_Att"] - S["Passes_Cmp"]) / c["miss_div"]
+        ),
+        "key_passes": kp + 1.5 * kp,
+        "take_ons": (
+            c["to_succ"] * S["Take-Ons_Succ"]
+            - c["to_fail"] * (S["Take-Ons_Att"] - S["Take-Ons_Succ"])
+        ),
+        "blocks": c["blocks"] * S["Blocks_Sh"],
+        "crosses": 1.2 * S["Performance_Crs"],
+        "shooting": (
+            c["sot"] * S["Performance_SoT"]
+            + (S["Performance_Sh"] - S["Performance_SoT"]) / c["off_target_div"]
+        ),
+        "minutes": S["Unnamed: 5_level_0_Min"] / 30.0,
+        "goals": 10 * S["Performance_Gls"],
+        "assists": 8 * S["Performance_Ast"],
+        "red_cards": -5 * S["Performance_CrdR"],
+        "penalties": (
+            -5 * S["Performance_PKcon"]
+            - 5 * (S["Performance_PKatt"] - S["Performance_PK"])
+        ),
+        "pk_won_bonus": _pk_won_bonus(S),
+        "early_sub_penalty": np.where(
+            (S["Unnamed: 5_level_0_Min"] <= 45) & (conc == 0), -c["early_sub"], 0.0
+        ),
+    }
+
+
+def _gk_components(S: dict) -> dict:
+    GA = S["Shot Stopping_GA"]
+    return {
+        "gk_base": np.full(len(GA), 17.0),
+        "saves": 2.5 * S["Shot Stopping_Saves"],
+        "launched": 0.5 * S["Launched_Cmp"],
+        "crosses_stopped": 1.0 * S["Crosses_Stp"],
+        "sweeper": 1.0 * S["Sweeper_#OPA"],
+        "goals_against": np.where(GA == 0, 0.0, np.where(GA == 1, -5.0, -5 - 3 * (GA - 1))),
+        "clean_sheet": np.where(GA == 0, 2.0, 0.0),
+    }
+
+
+def score_breakdown(full_df: pd.DataFrame, engine: str = "vectorized") -> pd.DataFrame:
+    """
+    Per-player x per-component contributions for every row of a full frame
+    (calc_all_players_from_html(..., full=True)), computed in one vectorized
+    pass per position bucket.
+
+    Components that do not apply to a player's bucket are 0. raw_total is
+    the sum of the components (the unrounded score, up to float rounding);
+    score is the official rounded score from the scoring engine.
+    """
+    mat = build_stat_matrix(full_df)
+    pos = full_df["pos"].to_numpy(dtype=object)
+    out = np.zeros((len(full_df), len(BREAKDOWN_COMPONENTS)))
+    col = {name: j for j, name in enumerate(BREAKDOWN_COMPONENTS)}
+
+    gk = pos == "GK"
+    buckets = [("GK", gk)] + [
+        (b, pos == b) for b in ("DEF", "FWD")
+    ]
+    # anything that is not GK/DEF/FWD is scored like MID
+    buckets.append(("MID", ~(gk | (pos == "DEF") | (pos == "FWD"))))
+
+    for bucket, mask in buckets:
+        if not mask.any():
+            continue
+        S = _stat_view(mat[mask])
+        comps = _gk_components(S) if bucket == "GK" else _outfield_components(S, _OUTFIELD_COEFFS[bucket])
+        for name, values in comps.items():
+            out[mask, col[name]] = values
+
+    out += 0.0  # -0.0 -> 0.0 for display
+
+    id_cols = [c for c in ("Player", "Team", "pos", "Match") if c in full_df.columns]
+    breakdown = pd.DataFrame(out, columns=BREAKDOWN_COMPONENTS, index=full_df.index)
+    breakdown["raw_total"] = out.sum(axis=1)
+    breakdown["score"] = score_players(full_df, engine=engine)
+    return pd.concat([full_df[id_cols], breakdown], axis=1)
 
 
 # ----------------------------------------------------------
 # DEBUG HELPER – score breakdown for one player
 # ----------------------------------------------------------
 
-def debug_player_components(full_df: pd.DataFrame, player_name: str) -> dict:
+def debug_player_components(full_df: pd.DataFrame, player_name: str, index=None) -> dict:
     """
     Return a dict of the stats used in scoring for a given player,
-    plus their position bucket and final score.
+    plus their position bucket, per-component contributions and final score.
+    `full_df` is calc_all_players_from_html(..., full=True); for auditing
+    many players at once use score_breakdown instead.
+
+    `player_name` may be an FBref player id or a name in any accents or
+    case ("goncalo inacio", "Inacio"), with close misspellings resolved too.
+    Pass a player_index.PlayerIndex over `full_df` to reuse it across calls.
     """
-    row = full_df[full_df["Player"] == player_name]
-    if row.empty:
+    if index is None:
+        from player_index import PlayerIndex  # player_index imports this module
+
+        index = PlayerIndex.from_frame(full_df, match_column=None)
+    found = index.resolve(player_name)
+    if not found:
         raise ValueError(f"No player named '{player_name}' found.")
-    row = row.iloc[0]
+    if len(found) > 1:
+        names = ", ".join(index.name(identity) for identity in found)
+        raise ValueError(f"'{player_name}' matches several players: {names}")
+    row = index.history(found[0]).iloc[[0]]
 
-    pos_bucket = position_calcul(row.get("Pos", "MID"))
+    if "pos" not in row.columns:
+        row = row.assign(pos=row.get("Pos", pd.Series("MID", index=row.index)).apply(position_calcul))
 
     # All stats your formulas actually use
-    stats_used = [
-        "Aerial Duels_Won", "Aerial Duels_Lost",
-        "Performance_Tkl", "Challenges_Lost", "Performance_Int",
-        "Unnamed: 20_level_0_Clr", "Carries_Dis",
-        "Performance_Fls", "Performance_Off", "Performance_OG",
-        "Unnamed: 21_level_0_Err", "Passes_Cmp", "Passes_Att",
-        "Unnamed: 23_level_0_KP", "Take-Ons_Att", "Take-Ons_Succ",
-        "Blocks_Sh", "Performance_Crs", "Performance_SoT",
-        "Performance_Sh", "Unnamed: 5_level_0_Min",
-        "Performance_Gls", "Performance_Ast",
-        "Performance_CrdR", "Performance_PKcon",
-        "Performance_PKatt", "Performance_PK",
-        "Performance_PKwon", "goals_scored", "goals_conceded",
-    ]
-
-    data = {stat: _get(row, stat, 0) for stat in stats_used}
-
-    if pos_bucket == "FWD":
-        score = fwd_score_calc(row)
-    elif pos_bucket == "MID":
-        score = mid_score_calc(row)
-    else:  # DEF is the case for Inácio
-        score = def_score_calc(row)
-
-    data["pos_bucket"] = pos_bucket
-    data["final_score"] = score
+    stats_used = OUTFIELD_STATS + list(GK_STATS)
+    mat = build_stat_matrix(row)
+    data = dict(zip(stats_used, mat[0].tolist()))
+
+    breakdown = score_breakdown(row).iloc[0]
+    data["pos_bucket"] = breakdown["pos"]
+    data["components"] = {
+        name: float(breakdown[name])
+        for name in (GK_COMPONENTS if breakdown["pos"] == "GK" else OUTFIELD_COMPONENTS)
+    }
+    data["final_score"] = float(breakdown["score"])
     return data
@@ -0,0 +1,344 @@
+# scoring_rules.py
+# ==========================================================
+#   Scoring rules as data: per-position linear terms,
+#   derived stats and conditional adjustments, compiled to
+#   per-term weight vectors so K rule sets score together
+# ==========================================================
+
+import copy
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import (
+    _OUTFIELD_COEFFS,
+    STAT_MATRIX_COLUMNS,
+    build_stat_matrix,
+)
+
+POSITIONS = ("DEF", "MID", "FWD", "GK")
+
+# term name used for a constant contribution
+CONSTANT = "const"
+
+# Derived stats: linear combinations of stat-matrix columns
+DERIVED_TERMS = {
+    "Passes_Missed": {"Passes_Att": 1.0, "Passes_Cmp": -1.0},
+    "Take-Ons_Failed": {"Take-Ons_Att": 1.0, "Take-Ons_Succ": -1.0},
+    "Shots_Off_Target": {"Performance_Sh": 1.0, "Performance_SoT": -1.0},
+    "PK_Missed": {"Performance_PKatt": 1.0, "Performance_PK": -1.0},
+    "Fouls_Offsides": {"Performance_Fls": 1.0, "Performance_Off": 1.0},
+}
+
+_CONDITION_OPS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+# ----------------------------------------------------------
+# The default rule set (the formulas in scoring.py)
+# ----------------------------------------------------------
+#
+# A rule set maps each position to
+#   "terms":       [(component, stat or derived term or CONSTANT, weight[, divisor]), ...]
+#   "adjustments": [(component, [(stat, op, value), ...], amount), ...]
+#   "grouped":     components whose terms are summed before joining the total
+# A term adds weight * value / divisor (divisor 1 when omitted); terms are
+# added in list order, then adjustments add `amount` when all of their
+# conditions hold. This is the order the formulas evaluate in, so rounding
+# matches them exactly. A rule set may also carry its own "derived" terms
+# (name -> {stat: coef}).
+
+_PK_WON_NOT_SCORED = [("Performance_PKwon", "==", 1), ("Performance_PK", "!=", 1)]
+
+
+def _outfield_rules(c: dict) -> dict:
+    terms = [
+        ("aerials", "Aerial Duels_Won", c["aerial_won"]),
+        ("aerials", "Aerial Duels_Lost", -c["aerial_lost"]),
+        ("tackles", "Performance_Tkl", c["tkl"]),
+        ("tackles", "Challenges_Lost", -c["challenges_lost"]),
+        ("interceptions", "Performance_Int", c["int"]),
+        ("clearances", "Unnamed: 20_level_0_Clr", c["clr"]),
+        ("team_result", CONSTANT, c["result_base"]),
+        ("team_result", "goals_conceded", c["result_conceded"]),
+        ("team_result", "goals_scored", c["result_scored"]),
+        ("discipline", CONSTANT, c["discipline_base"]),
+        ("discipline", "Carries_Dis", -c["dis"]),
+        ("discipline", "Fouls_Offsides", -c["fouls_offsides"]),
+        ("discipline", "Performance_OG", -c["og"]),
+        ("discipline", "Unnamed: 21_level_0_Err", -5),
+        ("passing", "Passes_Cmp", 1, c["cmp_div"]),
+        ("passing", "Passes_Missed", -1, c["miss_div"]),
+        ("key_passes", "Unnamed: 23_level_0_KP", 1),
+        ("take_ons", "Take-Ons_Succ", c["to_succ"]),
+        ("take_ons", "Take-Ons_Failed", -c["to_fail"]),
+        ("blocks", "Blocks_Sh", c["blocks"]),
+        # the formulas add key passes twice: + KP ... + 1.5 * KP
+        ("key_passes", "Unnamed: 23_level_0_KP", 1.5),
+        ("crosses", "Performance_Crs", 1.2),
+        ("shooting", "Performance_SoT", c["sot"]),
+        ("shooting", "Shots_Off_Target", 1, c["off_target_div"]),
+        ("minutes", "Unnamed: 5_level_0_Min", 1, 30.0),
+        ("goals", "Performance_Gls", 10),
+        ("assists", "Performance_Ast", 8),
+        ("red_cards", "Performance_CrdR", -5),
+        ("penalties", "Performance_PKcon", -5),
+        ("penalties", "PK_Missed", -5),
+    ]
+    adjustments = [("pk_won_bonus", _PK_WON_NOT_SCORED, 6.4)]
+    if c["early_sub"]:
+        adjustments.append((
+            "early_sub_penalty",
+            [("Unnamed: 5_level_0_Min", "<=", 45), ("goals_conceded", "==", 0)],
+            -c["early_sub"],
+        ))
+    return {
+        "terms": [t for t in terms if t[2] != 0],
+        "adjustments": adjustments,
+        "grouped": ["team_result", "discipline"],
+    }
+
+
+DEFAULT_RULES = {
+    **{pos: _outfield_rules(_OUTFIELD_COEFFS[pos]) for pos in ("DEF", "MID", "FWD")},
+    "GK": {
+        "terms": [
+            ("gk_base", CONSTANT, 17),
+            ("saves", "Shot Stopping_Saves", 2.5),
+            ("launched", "Launched_Cmp", 0.5),
+            ("crosses_stopped", "Crosses_Stp", 1.0),
+            ("sweeper", "Sweeper_#OPA", 1.0),
+            # tiers 0 / -5 / -5 - 3 per extra goal == -3 * GA - 2 once GA != 0
+            ("goals_against", "Shot Stopping_GA", -3.0),
+        ],
+        "adjustments": [
+            ("goals_against", [("Shot Stopping_GA", "!=", 0)], -2.0),
+            ("clean_sheet", [("Shot Stopping_GA", "==", 0)], 2.0),
+        ],
+    },
+}
+
+
+def default_rules() -> dict:
+    """A deep copy of DEFAULT_RULES, safe to edit into a variant."""
+    return copy.deepcopy(DEFAULT_RULES)
+
+
+# ----------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------
+
+# Rule sets of one position that share a layout (the same steps in the
+# same order) are scored together:
+#   steps     tuple of ("term", ((stat column or CONSTANT, coef), ...), group)
+#             or ("adjust", ((column, op, value), ...), None); group is the
+#             component name for grouped components, else None
+#   columns   indices of the rule sets using this layout
+#   weights   (len(steps), len(columns)) weight or amount of every step
+#   divisors  (len(steps), len(columns)) divisor of every step (1 for adjustments)
+CompiledLayout = namedtuple("CompiledLayout", ["steps", "columns", "weights", "divisors"])
+
+_STAT_INDEX = {c: j for j, c in enumerate(STAT_MATRIX_COLUMNS)}
+
+
+def _term_weights(term: str, derived: dict) -> dict:
+    """stat column (or CONSTANT) -> coefficient for one term."""
+    if term == CONSTANT or term in _STAT_INDEX:
+        return {term: 1.0}
+    if term in derived:
+        unknown = [c for c in derived[term] if c not in _STAT_INDEX]
+        if unknown:
+            raise ValueError(f"Derived term '{term}' uses unknown stats {unknown}.")
+        return derived[term]
+    raise ValueError(f"Unknown scoring term '{term}'.")
+
+
+def _check_condition(cond) -> tuple:
+    col, op, value = cond
+    if col not in _STAT_INDEX:
+        raise ValueError(f"Unknown stat '{col}' in condition {cond}.")
+    if op not in _CONDITION_OPS:
+        raise ValueError(f"Unknown operator '{op}' (expected one of {list(_CONDITION_OPS)}).")
+    return (col, op, float(value))
+
+
+def _position_steps(spec: dict, derived: dict) -> list:
+    """[(step, weight, divisor), ...] of one position of one rule set, in evaluation order."""
+    grouped = set(spec.get("grouped", ()))
+    steps = []
+    for component, term, weight, *divisor in spec.get("terms", []):
+        coefs = tuple(_term_weights(term, derived).items())
+        group = component if component in grouped else None
+        steps.append((("term", coefs, group), weight, divisor[0] if divisor else 1.0))
+    for _, conds, amount in spec.get("adjustments", []):
+        key = tuple(_check_condition(c) for c in conds)
+        steps.append((("adjust", key, None), amount, 1.0))
+    return steps
+
+
+def compile_rule_sets(rule_sets: dict) -> dict:
+    """
+    Compile {name: rule set} into {position: [CompiledLayout, ...]}; column
+    k of the scores belongs to the k-th rule set.
+    """
+    compiled = {}
+    for pos in POSITIONS:
+        layouts = {}  # steps -> (columns, weights, divisors)
+        for k, rules in enumerate(rule_sets.values()):
+            derived = {**DERIVED_TERMS, **rules.get("derived", {})}
+            steps = _position_steps(rules[pos], derived)
+            columns, weights, divisors = layouts.setdefault(
+                tuple(step for step, _, _ in steps), ([], [], [])
+            )
+            columns.append(k)
+            weights.append([w for _, w, _ in steps])
+            divisors.append([d for _, _, d in steps])
+        compiled[pos] = [
+            CompiledLayout(
+                steps, columns,
+                np.array(weights, dtype=float).reshape(len(columns), len(steps)).T,
+                np.array(divisors, dtype=float).reshape(len(columns), len(steps)).T,
+            )
+            for steps, (columns, weights, divisors) in layouts.items()
+        ]
+    return compiled
+
+
+# ----------------------------------------------------------
+# Evaluation
+# ----------------------------------------------------------
+
+def _term_value(mat: np.ndarray, coefs) -> np.ndarray:
+    value = None
+    for col, coef in coefs:
+        part = np.ones(len(mat)) if col == CONSTANT else mat[:, _STAT_INDEX[col]]
+        part = part * coef
+        value = part if value is None else value + part
+    return value
+
+
+def _condition_mask(mat: np.ndarray, conds) -> np.ndarray:
+    mask = np.ones(len(mat), dtype=bool)
+    for col, op, value in conds:
+        mask &= _CONDITION_OPS[op](mat[:, _STAT_INDEX[col]], value)
+    return mask
+
+
+def _score_layout(mat: np.ndarray, layout: CompiledLayout) -> np.ndarray:
+    """
+    Raw (rows x rule sets) scores of one layout: every step is one
+    (rows x K) update, applied in the same order and with the same
+    operations (multiply, then divide) as the formulas, so results agree
+    to the last bit.
+    """
+    total = np.zeros((len(mat), len(layout.columns)))
+    group, group_name = None, None
+    for (kind, spec, name), weight, divisor in zip(layout.steps, layout.weights, layout.divisors):
+        if kind == "term" and name is not None and name == group_name:
+            group += np.multiply.outer(_term_value(mat, spec), weight) / divisor
+            continue
+        if group is not None:
+            total += group
+            group, group_name = None, None
+        if kind == "adjust":
+            total += _condition_mask(mat, spec)[:, None] * weight
+            continue
+        part = np.multiply.outer(_term_value(mat, spec), weight) / divisor
+        if name is None:
+            total += part
+        else:
+            group, group_name = part, name
+    if group is not None:
+        total += group
+    return total
+
+
+def score_matrix_with_rules(mat: np.ndarray, pos, compiled: dict) -> np.ndarray:
+    """
+    (rows x K) rounded scores, one pass per position bucket and layout.
+    Anything that is not FWD/DEF/GK is scored like MID.
+    """
+    pos = np.asarray(pos, dtype=object)
+    n_sets = sum(len(layout.columns) for layout in compiled["MID"])
+    scores = np.zeros((len(pos), n_sets))
+    other = ~np.isin(pos, ["DEF", "FWD", "GK"])
+    for bucket in POSITIONS:
+        mask = other if bucket == "MID" else pos == bucket
+        if not mask.any():
+            continue
+        rows = mat[mask]
+        for layout in compiled[bucket]:
+            scores[np.ix_(mask, layout.columns)] = _score_layout(rows, layout)
+    return np.round(scores, 0)
+
+
+def score_stat_matrix_rule_sets(mat: np.ndarray, pos, rule_sets: dict) -> np.ndarray:
+    """
+    (rows x K) scores of a stat matrix under every rule set in {name: rule set}.
+    DEFAULT_RULES reproduces score_stat_matrix exactly.
+    """
+    return score_matrix_with_rules(mat, pos, compile_rule_sets(rule_sets))
+
+
+def score_rule_sets(df: pd.DataFrame, rule_sets: dict) -> pd.DataFrame:
+    """
+    Score a frame that has the "pos" bucket column under every rule set in
+    {name: rule set}; returns one score column per name.
+    """
+    scores = score_stat_matrix_rule_sets(
+        build_stat_matrix(df), df["pos"].to_numpy(), rule_sets
+    )
+    return pd.DataFrame(scores, columns=list(rule_sets), index=df.index)
+
+
+# ----------------------------------------------------------
+# Editable weight tables
+# ----------------------------------------------------------
+
+WEIGHT_TABLE_COLUMNS = ["pos", "kind", "component", "term", "weight"]
+
+
+def _describe_conditions(conds) -> str:
+    return " & ".join(f"{col} {op} {value:g}" for col, op, value in conds)
+
+
+def rules_to_frame(rules: dict) -> pd.DataFrame:
+    """
+    One row per term / adjustment of a rule set, in rule order; a term's
+    weight is its effective coefficient (weight / divisor). Edit the
+    "weight" column and pass it to rules_with_weights.
+    """
+    rows = []
+    for pos in POSITIONS:
+        for component, term, weight, *divisor in rules[pos].get("terms", []):
+            rows.append((pos, "term", component, term, weight / divisor[0] if divisor else float(weight)))
+        for component, conds, amount in rules[pos].get("adjustments", []):
+            rows.append((pos, "adjustment", component, _describe_conditions(conds), float(amount)))
+    return pd.DataFrame(rows, columns=WEIGHT_TABLE_COLUMNS)
+
+
+def rules_with_weights(rules: dict, weights) -> dict:
+    """
+    Copy of `rules` with weights / amounts replaced, in rules_to_frame row
+    order. Terms whose weight is unchanged keep their written form (e.g. a
+    divisor), so unedited rows score exactly as before.
+    """
+    weights = iter(list(weights))
+    out = copy.deepcopy(rules)
+    for pos in POSITIONS:
+        spec = out[pos]
+        terms = []
+        for term in spec.get("terms", []):
+            weight = next(weights)
+            old = term[2] / term[3] if len(term) > 3 else term[2]
+            terms.append(term if weight == old else (term[0], term[1], weight))
+        spec["terms"] = terms
+        spec["adjustments"] = [(c, conds, next(weights)) for c, conds, _ in spec.get("adjustments", [])]
+    return out
@@ -0,0 +1,473 @@
+# scoring_service.py
+# ==========================================================
+#   Local scoring service: one pool of warm worker processes
+#   behind a small HTTP API, shared by the app and batch jobs
+#
+#     python scoring_service.py --port 8765 -j 4
+#     HFW_SCORING_SERVICE=http://127.0.0.1:8765 streamlit run app.py
+#
+#   POST /score    one match report as the body, or a JSON batch
+#                  ?format=json|arrow  &full=1  &all_stats=1  &name=...
+#   GET  /health   liveness, workers and queue depth
+#   GET  /metrics  request counts and latency percentiles
+# ==========================================================
+
+import argparse
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+import requests
+
+from batch import MAX_WORKERS, MatchResult, _score_one, default_workers, make_pool
+from fbref_synth import generate_match_html
+from match_cache import DEFAULT_CACHE_DIR
+from scoring import calc_all_players_from_html
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# set to the service URL to make app.py and batch.py score through it
+DEFAULT_SERVICE_URL = os.environ.get("HFW_SCORING_SERVICE") or None
+
+# matches accepted but not finished; more than this is answered with 503
+# (a single batch larger than the whole queue gets 413: it can never fit)
+DEFAULT_MAX_QUEUE = 32
+# 503 answers a client sits out before giving up on a match
+DEFAULT_MAX_RETRIES = 30
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# requests / matches kept for the latency percentiles
+_LATENCY_WINDOW = 1000
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Arrow schema metadata key: per-match name, error, missing stats and row count
+_ARROW_RESULTS_KEY = b"hfw.results"
+
+
+def _warm_worker() -> None:
+    # pool initializer: imports pandas / lxml / scoring and runs every
+    # pipeline stage once in each worker process as it starts
+    calc_all_players_from_html(generate_match_html(n_subs=0, filler_tables=0))
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _latency_summary(seconds) -> dict:
+    if not seconds:
+        return {"count": 0}
+    ms = 1000 * np.asarray(seconds)
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+# ----------------------------------------------------------
+# the engine: warm pool + bounded queue + metrics
+# ----------------------------------------------------------
+
+class ScoringEngine:
+    """
+    A warm worker pool with a bounded queue. score() returns None instead
+    of queueing when accepting the batch would put more than `max_queue`
+    matches in flight, so callers can answer 503 and retry later; a batch
+    larger than `max_queue` itself raises ValueError, as it never fits.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = DEFAULT_MAX_QUEUE,
+                 cache_dir=DEFAULT_CACHE_DIR):
+        self.workers = workers or default_workers(MAX_WORKERS)
+        self.max_queue = max_queue
+        self.cache_dir = cache_dir
+        self.pool = make_pool(self.workers, initializer=_warm_worker)
+        self.started = time.time()
+        self.worker_pids = []
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.stats = {"requests": 0, "matches": 0, "failed": 0, "rejected": 0}
+        self._request_latency = deque(maxlen=_LATENCY_WINDOW)
+        self._match_latency = deque(maxlen=_LATENCY_WINDOW)
+
+    def warm(self) -> list:
+        """
+        Start the worker processes now rather than on the first request.
+        Every worker runs a synthetic match in its initializer before it
+        takes work, so each one is warm; the returned pids are those of the
+        workers that answered (usually all of them).
+        """
+        futures = [self.pool.submit(_worker_pid) for _ in range(self.workers)]
+        self.worker_pids = sorted({f.result() for f in futures})
+        return self.worker_pids
+
+    def _reserve(self, n: int) -> bool:
+        with self._lock:
+            if self._queued + n > self.max_queue:
+                self.stats["rejected"] += 1
+                return False
+            self._queued += n
+            return True
+
+    def _finished(self, t0: float, fut) -> None:
+        failed = (
+            fut.cancelled() or fut.exception() is not None or fut.result().error is not None
+        )
+        with self._lock:
+            self._queued -= 1
+            self.stats["matches"] += 1
+            self.stats["failed"] += failed
+            self._match_latency.append(time.perf_counter() - t0)
+
+    def score(self, items, full: bool = False, all_stats: bool = False):
+        """
+        MatchResults for (name, html) pairs in input order, or None when
+        the queue is full.
+        """
+        items = list(items)
+        if len(items) > self.max_queue:
+            raise ValueError(
+                f"batch of {len(items)} matches is larger than the queue ({self.max_queue})"
+            )
+        if not self._reserve(len(items)):
+            return None
+
+        t0 = time.perf_counter()
+        futures = []
+        try:
+            for i, (name, html) in enumerate(items):
+                fut = self.pool.submit(
+                    _score_one, i, name, html, self.cache_dir, False, full, all_stats
+                )
+                futures.append(fut)
+                fut.add_done_callback(lambda f, t=time.perf_counter(): self._finished(t, f))
+            results = [fut.result() for fut in futures]
+        finally:
+            with self._lock:
+                # submitted matches free their slot in _finished; give back
+                # the ones a failed submit (e.g. a broken pool) never queued
+                self._queued -= len(items) - len(futures)
+                self.stats["requests"] += 1
+                self._request_latency.append(time.perf_counter() - t0)
+        return results
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "worker_pids": self.worker_pids,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def metrics(self) -> dict:
+        with self._lock:
+            request_latency = list(self._request_latency)
+            match_latency = list(self._match_latency)
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "request_latency": _latency_summary(request_latency),
+            "match_latency": _latency_summary(match_latency),
+        }
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+# ----------------------------------------------------------
+# HTTP front end
+# ----------------------------------------------------------
+
+def _result_info(r: MatchResult) -> dict:
+    return {
+        "name": r.name,
+        "error": None if r.error is None else str(r.error),
+        "missing_stats": [] if r.df is None else r.df.attrs.get("missing_stats", []),
+        "rows": 0 if r.df is None else len(r.df),
+    }
+
+
+def _json_body(results) -> bytes:
+    out = []
+    for r in results:
+        info = _result_info(r)
+        info["rows"] = [] if r.df is None else json.loads(r.df.to_json(orient="records"))
+        out.append(info)
+    return json.dumps({"results": out}, ensure_ascii=False).encode("utf-8")
+
+
+def _arrow_body(results) -> bytes:
+    """All matches' rows as one Arrow IPC stream; per-match info in the schema metadata."""
+    import pyarrow as pa
+
+    frames = [r.df for r in results if r.df is not None]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _ARROW_RESULTS_KEY: json.dumps([_result_info(r) for r in results]).encode("utf-8"),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    server_version = "HFWScoring/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def engine(self) -> ScoringEngine:
+        return self.server.engine
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._send_json(200, self.engine.health())
+        elif path == "/metrics":
+            self._send_json(200, self.engine.metrics())
+        else:
+            self._send_json(404, {"error": f"unknown path {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/score":
+            self._send_json(404, {"error": f"unknown path {url.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        query = parse_qs(url.query)
+        fmt = query.get("format", ["json"])[0]
+        full = query.get("full", ["0"])[0] in ("1", "true")
+        all_stats = query.get("all_stats", ["0"])[0] in ("1", "true")
+
+        # a JSON batch {"matches": [{"name": ..., "html": ...}, ...]} or one raw page
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                matches = json.loads(body)["matches"]
+                items = [
+                    (m.get("name") or f"match_{i}", m["html"].encode("utf-8"))
+                    for i, m in enumerate(matches)
+                ]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send_json(400, {"error": f"bad JSON batch: {e}"})
+                return
+        else:
+            items = [(query.get("name", ["match"])[0], body)]
+
+        if len(items) > self.engine.max_queue:
+            # retrying cannot help, so no Retry-After: split the batch instead
+            self._send_json(413, {
+                "error": f"batch of {len(items)} matches is larger than the queue; "
+                         f"send at most {self.engine.max_queue} per request",
+                "max_queue": self.engine.max_queue,
+            })
+            return
+        try:
+            results = self.engine.score(items, full=full, all_stats=all_stats)
+        except Exception as e:  # e.g. a worker process died
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if results is None:
+            self._send_json(
+                503, {"error": "scoring queue is full", **self.engine.health()},
+                headers={"Retry-After": "1"},
+            )
+        elif fmt == "arrow":
+            self._send(200, _arrow_body(results), ARROW_MEDIA_TYPE)
+        else:
+            self._send(200, _json_body(results))
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+def make_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, engine: ScoringEngine = None,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), ScoringRequestHandler)
+    server.daemon_threads = True
+    server.engine = engine or ScoringEngine()
+    server.verbose = verbose
+    return server
+
+
+# ----------------------------------------------------------
+# client
+# ----------------------------------------------------------
+
+class ScoringClient:
+    """
+    Client for a running scoring service. score_matches mirrors
+    batch.score_matches: MatchResults are yielded as matches finish,
+    sending a few at a time and retrying while the service answers 503,
+    up to `max_retries` times per match (then the match fails with the
+    503's HTTPError).
+    """
+
+    def __init__(self, url: str = DEFAULT_SERVICE_URL, timeout: float = 300.0,
+                 max_workers: int = 4, max_retries: int = DEFAULT_MAX_RETRIES):
+        if not url:
+            raise ValueError("No scoring service URL (set HFW_SCORING_SERVICE).")
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        # one keep-alive session per thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def health(self) -> dict:
+        r = self._session().get(f"{self.url}/health", timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def metrics(self) -> dict:
+        r = self._session().get(f"{self.url}/metrics", timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def _post(self, name: str, html, full: bool, all_stats: bool) -> requests.Response:
+        if isinstance(html, os.PathLike):
+            html = pathlib.Path(html).read_bytes()
+        elif isinstance(html, str):
+            html = html.encode("utf-8")
+        params = {"format": "arrow", "name": name, "full": int(full), "all_stats": int(all_stats)}
+        for attempt in range(self.max_retries + 1):
+            r = self._session().post(
+                f"{self.url}/score", params=params, data=html, timeout=self.timeout,
+                headers={"Content-Type": "text/html; charset=utf-8"},
+            )
+            # only a 503 that says when to come back is worth another try
+            retry_after = r.headers.get("Retry-After")
+            if r.status_code != 503 or retry_after is None or attempt == self.max_retries:
+                break
+            time.sleep(float(retry_after))
+        r.raise_for_status()
+        return r
+
+    def _score_one(self, index: int, name: str, html, full: bool, all_stats: bool) -> MatchResult:
+        import pyarrow as pa
+
+        try:
+            r = self._post(name, html, full, all_stats)
+            table = pa.ipc.open_stream(r.content).read_all()
+            info = json.loads(table.schema.metadata[_ARROW_RESULTS_KEY])[0]
+        except Exception as e:
+            return MatchResult(index, name, None, e, None)
+        if info["error"] is not None:
+            return MatchResult(index, name, None, RuntimeError(info["error"]), None)
+        df = table.to_pandas()
+        df.attrs["missing_stats"] = info["missing_stats"]
+        return MatchResult(index, name, df, None, None)
+
+    def score(self, name: str, html, full: bool = False, all_stats: bool = False) -> pd.DataFrame:
+        """Scored rows of one match report; raises the match's error."""
+        r = self._score_one(0, name, html, full, all_stats)
+        if r.error is not None:
+            raise r.error
+        return r.df
+
+    def score_matches(self, items, full: bool = False, all_stats: bool = False):
+        """
+        Score (name, html_bytes or path) pairs through the service, yielding
+        MatchResults as they finish. Closing the generator early cancels
+        matches that have not been sent yet.
+        """
+        window = 2 * self.max_workers
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            try:
+                for i, (name, data) in enumerate(items):
+                    pending.add(ex.submit(self._score_one, i, name, data, full, all_stats))
+                    if len(pending) >= window:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            yield fut.result()
+                for fut in as_completed(pending):
+                    pending.discard(fut)
+                    yield fut.result()
+            finally:
+                for fut in pending:
+                    fut.cancel()
+
+
+# ----------------------------------------------------------
+# command line entry point
+# ----------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve match scoring from a pool of warm worker processes."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="matches in flight before requests get 503 (default %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the parse cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine(
+        workers=args.workers, max_queue=args.max_queue,
+        cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+    )
+    t0 = time.perf_counter()
+    engine.warm()
+    print(
+        f"🔥 {engine.workers} worker(s) warm in {time.perf_counter() - t0:.1f}s",
+        file=sys.stderr,
+    )
+    server = make_server(args.host, args.port, engine, verbose=args.verbose)
+    print(f"✅ Scoring service on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
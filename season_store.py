@@ -0,0 +1,332 @@
+# season_store.py
+# ==========================================================
+#   Persistent SQLite store of scored matches: one row per
+#   player per match (full stats as JSON), indexed for
+#   season totals, player history and top-N queries
+# ==========================================================
+
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+from scoring import PLAYER_ID, calc_all_players_from_file, calc_all_players_from_html
+
+DEFAULT_SEASON_DB = os.environ.get("HFW_SEASON_DB", "season.sqlite")
+
+# columns stored as their own fields; everything else goes into the stats JSON
+_ROW_FIELDS = ("Player", PLAYER_ID, "Team", "Squad", "pos", "score", "Match")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id    TEXT PRIMARY KEY,
+    match_date  TEXT,
+    home        TEXT,
+    away        TEXT,
+    url         TEXT,
+    source      TEXT,
+    html_sha256 TEXT NOT NULL UNIQUE,
+    added_at    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_matches (
+    match_id   TEXT NOT NULL REFERENCES matches(match_id) ON DELETE CASCADE,
+    row        INTEGER NOT NULL,
+    player     TEXT NOT NULL,
+    player_key TEXT NOT NULL,
+    team       TEXT,
+    squad      TEXT,
+    pos        TEXT,
+    match_date TEXT,
+    score      REAL,
+    stats      TEXT NOT NULL,
+    PRIMARY KEY (match_id, row)
+);
+CREATE INDEX IF NOT EXISTS idx_pm_player ON player_matches (player_key, match_date);
+CREATE INDEX IF NOT EXISTS idx_pm_name ON player_matches (player);
+CREATE INDEX IF NOT EXISTS idx_pm_squad ON player_matches (squad, match_date);
+CREATE INDEX IF NOT EXISTS idx_pm_pos ON player_matches (pos, score);
+CREATE INDEX IF NOT EXISTS idx_pm_date ON player_matches (match_date);
+"""
+
+
+# ----------------------------------------------------------
+# match identity
+# ----------------------------------------------------------
+
+_RE_CANONICAL = re.compile(
+    r"<link[^>]+rel=[\"']canonical[\"'][^>]+href=[\"']([^\"']+)[\"']"
+    r"|<meta[^>]+property=[\"']og:url[\"'][^>]+content=[\"']([^\"']+)[\"']",
+    re.IGNORECASE,
+)
+_RE_MATCH_URL_ID = re.compile(r"/matches/([0-9a-f]{8})(?:/|$)")
+_RE_VENUE_DATE = re.compile(r"data-venue-date=[\"'](\d{4}-\d{2}-\d{2})[\"']")
+_RE_TITLE = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_RE_TITLE_TEAMS = re.compile(r"^\s*(.+?) vs\. (.+?) Match Report")
+_RE_TITLE_DATE = re.compile(
+    r"(January|February|March|April|May|June|July|August|September|October|"
+    r"November|December) (\d{1,2}), (\d{4})"
+)
+
+# metadata lives in <head> / the scorebox, near the top of the page
+_META_SCAN_BYTES = 256 * 1024
+
+
+def match_metadata(html) -> dict:
+    """
+    Identity and header fields of a match report: match_id (FBref's match
+    id from the canonical URL, else "sha256:<hash of the HTML>"), url,
+    match_date (ISO), home, away and html_sha256. `html` is str, bytes-like
+    or the os.PathLike of a saved page (memory-mapped).
+    """
+    if isinstance(html, os.PathLike):
+        with open(html, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return match_metadata(b"")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return match_metadata(mapped)
+
+    raw = html.encode("utf-8") if isinstance(html, str) else memoryview(html)
+    digest = hashlib.sha256(raw).hexdigest()
+    head = bytes(raw[:_META_SCAN_BYTES]).decode("utf-8", errors="ignore")
+
+    url = None
+    m = _RE_CANONICAL.search(head)
+    if m:
+        url = m.group(1) or m.group(2)
+    m = url and _RE_MATCH_URL_ID.search(url)
+    match_id = m.group(1) if m else f"sha256:{digest}"
+
+    title = _RE_TITLE.search(head)
+    title = title.group(1) if title else ""
+    teams = _RE_TITLE_TEAMS.match(title)
+
+    match_date = None
+    m = _RE_VENUE_DATE.search(head)
+    if m:
+        match_date = m.group(1)
+    else:
+        m = _RE_TITLE_DATE.search(title)
+        if m:
+            match_date = datetime.datetime.strptime(
+                " ".join(m.groups()), "%B %d %Y"
+            ).date().isoformat()
+
+    return {
+        "match_id": match_id,
+        "url": url,
+        "match_date": match_date,
+        "home": teams.group(1) if teams else None,
+        "away": teams.group(2) if teams else None,
+        "html_sha256": digest,
+    }
+
+
+# ----------------------------------------------------------
+# the store
+# ----------------------------------------------------------
+
+def _stats_json(df: pd.DataFrame) -> list:
+    """One JSON object per row with every column not stored as a field."""
+    stats = df.drop(columns=[c for c in _ROW_FIELDS if c in df.columns])
+    stats = stats.loc[:, ~stats.columns.duplicated()]
+    return [json.dumps(r, ensure_ascii=False) for r in json.loads(stats.to_json(orient="records"))]
+
+
+class SeasonStore:
+    """
+    Append-only SQLite store of scored matches.
+
+    Each match is stored once: a match whose FBref match id (or, without
+    one, whose exact HTML) is already present is skipped. Player rows keep
+    the stat columns as JSON next to indexed player / team / position
+    / date fields, so season questions never touch HTML again.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEASON_DB):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ------------------------------------------------------
+    # writing
+    # ------------------------------------------------------
+
+    def has_match(self, meta: dict) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM matches WHERE match_id = ? OR html_sha256 = ?",
+            (meta["match_id"], meta["html_sha256"]),
+        ).fetchone()
+        return row is not None
+
+    def add_scored_match(self, meta: dict, full_df: pd.DataFrame, source: str = None) -> bool:
+        """
+        Store a match scored with calc_all_players_from_html(..., full=True)
+        under the identity from match_metadata. False if it was already stored.
+        """
+        if self.has_match(meta):
+            return False
+
+        squads = list(dict.fromkeys(full_df["Squad"])) if "Squad" in full_df.columns else []
+        home = meta.get("home") or (squads[0] if squads else None)
+        away = meta.get("away") or (squads[1] if len(squads) > 1 else None)
+
+        players = full_df["Player"].astype(str).tolist()
+        if PLAYER_ID in full_df.columns:
+            ids = full_df[PLAYER_ID].tolist()
+            keys = [i if isinstance(i, str) and i else p for i, p in zip(ids, players)]
+        else:
+            keys = players
+
+        def column(name):
+            if name not in full_df.columns:
+                return [None] * len(full_df)
+            return full_df[name].tolist()
+
+        rows = zip(
+            [meta["match_id"]] * len(full_df),
+            range(len(full_df)),
+            players,
+            keys,
+            column("Team"),
+            column("Squad"),
+            column("pos"),
+            [meta.get("match_date")] * len(full_df),
+            [float(s) for s in full_df["score"]],
+            _stats_json(full_df),
+        )
+        with self._db:
+            self._db.execute(
+                "INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    meta["match_id"], meta.get("match_date"), home, away,
+                    meta.get("url"), source, meta["html_sha256"],
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                ),
+            )
+            self._db.executemany(
+                "INSERT INTO player_matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return True
+
+    def add_match_html(self, html, source: str = None, cache=None,
+                       all_stats: bool = False) -> bool:
+        """
+        Score and store one match report (str, bytes-like or a saved page's
+        os.PathLike); already stored matches are not parsed. all_stats=True
+        stores every FBref column, not just the ones scoring reads.
+        """
+        meta = match_metadata(html)
+        if self.has_match(meta):
+            return False
+        if isinstance(html, os.PathLike):
+            full_df = calc_all_players_from_file(
+                html, cache=cache, full=True, all_stats=all_stats
+            )
+        else:
+            full_df = calc_all_players_from_html(
+                html, cache=cache, full=True, all_stats=all_stats
+            )
+        return self.add_scored_match(meta, full_df, source=source)
+
+    # ------------------------------------------------------
+    # queries
+    # ------------------------------------------------------
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self._db, params=params)
+
+    @staticmethod
+    def _date_filter(since, until) -> tuple:
+        clauses, params = [], []
+        if since:
+            clauses.append("match_date >= ?")
+            params.append(str(since))
+        if until:
+            clauses.append("match_date <= ?")
+            params.append(str(until))
+        return clauses, params
+
+    def matches(self) -> pd.DataFrame:
+        return self._query(
+            "SELECT match_id, match_date, home, away, url, source FROM matches "
+            "ORDER BY match_date, match_id"
+        )
+
+    def season_totals(self, pos: str = None, squad: str = None, since=None,
+                      until=None, limit: int = None) -> pd.DataFrame:
+        """Per player: matches played, total and mean score, best match."""
+        clauses, params = self._date_filter(since, until)
+        if pos:
+            clauses.append("pos = ?")
+            params.append(pos)
+        if squad:
+            clauses.append("squad = ?")
+            params.append(squad)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if limit is not None:
+            params.append(int(limit))
+        return self._query(
+            f"""
+            SELECT player_key, MAX(player) AS player, GROUP_CONCAT(DISTINCT squad) AS squad,
+                   GROUP_CONCAT(DISTINCT pos) AS pos, COUNT(*) AS matches,
+                   SUM(score) AS total, AVG(score) AS mean, MAX(score) AS best
+            FROM player_matches {where}
+            GROUP BY player_key
+            ORDER BY total DESC
+            {"LIMIT ?" if limit is not None else ""}
+            """,
+            params,
+        )
+
+    def top_players(self, pos: str, n: int = 10, since=None, until=None) -> pd.DataFrame:
+        """Top `n` season totals for one position bucket (FWD / MID / DEF / GK)."""
+        return self.season_totals(pos=pos, since=since, until=until, limit=n)
+
+    def player_history(self, player: str, with_stats: bool = False) -> pd.DataFrame:
+        """
+        Every stored match of one player, oldest first. `player` is an FBref
+        player id or an exact player name.
+        """
+        cols = "pm.match_id, pm.match_date, m.home, m.away, pm.player, pm.squad, pm.team, pm.pos, pm.score"
+        if with_stats:
+            cols += ", pm.stats"
+        df = self._query(
+            f"""
+            SELECT {cols}
+            FROM player_matches pm JOIN matches m USING (match_id)
+            WHERE pm.player_key = ? OR pm.player = ?
+            ORDER BY pm.match_date, pm.match_id
+            """,
+            (player, player),
+        )
+        if with_stats:
+            stats = pd.DataFrame([json.loads(s) for s in df.pop("stats")], index=df.index)
+            df = pd.concat([df, stats], axis=1)
+        return df
+
+    def match_frame(self, match_id: str) -> pd.DataFrame:
+        """The stored full frame of one match (stats JSON expanded to columns)."""
+        df = self._query(
+            "SELECT player AS Player, team AS Team, squad AS Squad, pos, score, stats "
+            "FROM player_matches WHERE match_id = ? ORDER BY row",
+            (match_id,),
+        )
+        stats = pd.DataFrame([json.loads(s) for s in df.pop("stats")], index=df.index)
+        return pd.concat([df, stats], axis=1)
@@ -0,0 +1,107 @@
+# test_fbref_fetch.py
+# ==========================================================
+#   FbrefFetcher against a local stand-in for FBref:
+#   429 back-off, 304 revalidation and the rate limit
+#   (python -m pytest test_fbref_fetch.py)
+# ==========================================================
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fbref_fetch import FbrefFetcher
+from fbref_synth import generate_match_html
+
+PAGE = generate_match_html(n_subs=0, filler_tables=0).encode("utf-8")
+ETAG = '"synthetic-1"'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves one synthetic match report at every path, with an ETag."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), self.path, dict(self.headers)))
+            throttled = server.throttle.get(self.path, 0)
+            if throttled:
+                server.throttle[self.path] = throttled - 1
+
+        if throttled:
+            self._reply(429, b"slow down", {"Retry-After": str(server.retry_after)})
+        elif self.headers.get("If-None-Match") == ETAG:
+            self._reply(304, b"", {"ETag": ETAG})
+        else:
+            self._reply(200, PAGE, {"ETag": ETAG, "Content-Type": "text/html; charset=utf-8"})
+
+    def _reply(self, status: int, body: bytes, headers: dict) -> None:
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []  # (monotonic time, path, headers)
+    server.throttle = {}  # path -> 429 answers still to give
+    server.retry_after = 1
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("rate", [100.0, 0])
+def test_429_waits_for_retry_after(stand_in, tmp_path, rate):
+    stand_in.throttle["/en/matches/slow"] = 1
+    with FbrefFetcher(stand_in.url, rate=rate, cache_dir=str(tmp_path), backoff=0.01) as fetcher:
+        result = fetcher.fetch("https://fbref.com/en/matches/slow")
+
+    assert result.error is None and result.content == PAGE
+    times = [t for t, path, _ in stand_in.requests if path == "/en/matches/slow"]
+    assert len(times) == 2
+    assert times[1] - times[0] >= 0.9  # Retry-After: 1, not the 10 ms back-off
+    assert fetcher.stats["retries"] == 1
+
+
+def test_stale_entry_is_revalidated_with_304(stand_in, tmp_path):
+    url = "/en/matches/cached"
+    with FbrefFetcher(stand_in.url, rate=0, cache_dir=str(tmp_path)) as fetcher:
+        first = fetcher.fetch(url)
+        fresh = fetcher.fetch(url)
+    assert (first.from_cache, fresh.from_cache) == (False, True)
+    assert len(stand_in.requests) == 1  # fresh entries need no request
+
+    with FbrefFetcher(stand_in.url, rate=0, cache_dir=str(tmp_path), max_age=0) as fetcher:
+        stale = fetcher.fetch(url)
+    assert stale.from_cache and stale.status == 200 and stale.content == PAGE
+    assert fetcher.stats["revalidated"] == 1
+    assert stand_in.requests[-1][2].get("If-None-Match") == ETAG
+
+
+def test_rate_limit_spaces_requests_across_threads(stand_in):
+    rate, n = 20.0, 8
+    with FbrefFetcher(stand_in.url, rate=rate, burst=1, max_workers=4, cache_dir=None) as fetcher:
+        results = list(fetcher.fetch_many([f"/en/matches/m{i}" for i in range(n)]))
+
+    assert sorted(r.index for r in results) == list(range(n))
+    assert all(r.error is None for r in results)
+    times = sorted(t for t, _, _ in stand_in.requests)
+    # one token per 1/rate seconds after the first: allow a little timer slack
+    assert times[-1] - times[0] >= (n - 1) / rate * 0.9
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.5 / rate
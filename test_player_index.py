@@ -0,0 +1,65 @@
+# test_player_index.py
+# ==========================================================
+#   Player identities across matches: a club's players stay
+#   one identity whether the club plays home or away
+#   (python -m pytest test_player_index.py)
+# ==========================================================
+
+import pandas as pd
+
+from player_index import PlayerIndex, PlayerRef
+
+# the per-match frame app.py keeps for the session
+COLUMNS = ["Player", "Team", "pos", "score", "Squad", "player_id"]
+
+
+def _match(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_club_home_then_away_is_one_identity():
+    index = PlayerIndex()
+    # name-only rows while Sporting is at home ...
+    index.add_match("m1", _match([
+        ["Gonçalo Inácio", "Home", "DEF", 7.0, "Sporting CP", None],
+        ["João Silva", "Away", "MID", 4.0, "Benfica", None],
+    ]))
+    # ... then the id turns up with Sporting away
+    index.add_match("m2", _match([
+        ["Rui Costa", "Home", "MID", 5.0, "Porto", "rc01"],
+        ["Goncalo Inacio", "Away", "DEF", 6.0, "Sporting CP", "gi01"],
+    ]))
+    # and a later name-only row, home again
+    index.add_match("m3", _match([
+        ["GONCALO INACIO", "Home", "DEF", 9.0, "Sporting CP", None],
+    ]))
+
+    assert index.resolve("inacio") == ["gi01"]
+    assert index.refs("gi01") == [PlayerRef("m1", 0), PlayerRef("m2", 1), PlayerRef("m3", 0)]
+    assert index.history("gi01")["score"].tolist() == [7.0, 6.0, 9.0]
+
+    index.remove_match("m2")
+    assert index.refs("gi01") == [PlayerRef("m1", 0), PlayerRef("m3", 0)]
+    index.remove_match("m1")
+    index.remove_match("m3")
+    assert len(index) == 0 and index.resolve("inacio", fuzzy=False) == []
+
+
+def test_same_name_at_another_club_stays_apart():
+    index = PlayerIndex()
+    index.add_match("m1", _match([["João Silva", "Home", "MID", 4.0, "Benfica", None]]))
+    index.add_match("m2", _match([["Joao Silva", "Away", "MID", 6.0, "Porto", "js09"]]))
+
+    assert index.resolve("joao silva") == ["js09", "name:joao silva"]
+    assert index.refs("js09") == [PlayerRef("m2", 0)]
+
+
+def test_home_away_side_is_not_a_team():
+    # without Squad, Team (Home/Away) must not split a player by fixture
+    index = PlayerIndex()
+    frame = _match([["Gonçalo Inácio", "Home", "DEF", 7.0, None, None]]).drop(columns="Squad")
+    index.add_match("m1", frame)
+    index.add_match("m2", frame.assign(Team="Away", player_id="gi01"))
+
+    assert index.resolve("inacio") == ["gi01"]
+    assert index.refs("gi01") == [PlayerRef("m1", 0), PlayerRef("m2", 0)]
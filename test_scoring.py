@@ -0,0 +1,49 @@
+# test_scoring.py
+# ==========================================================
+#   The vectorized engine must score exactly like the
+#   per-row reference engine (python -m pytest test_scoring.py)
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fbref_synth import generate_match_html
+from scoring import (
+    _combine_team_frames,
+    _extract_team_tables_from_html,
+    _merge_team_tables,
+    score_players,
+)
+
+
+def _match_frame(**kwargs) -> pd.DataFrame:
+    tables = _extract_team_tables_from_html(generate_match_html(**kwargs), all_stats=False)
+    return _combine_team_frames({t: _merge_team_tables(d) for t, d in tables.items()})
+
+
+MATCHES = {
+    "seed-0": dict(seed=0),
+    "seed-7": dict(seed=7, n_subs=0),
+    "seed-42-commented": dict(seed=42, comment_tables=True),
+    "seed-99-bench": dict(seed=99, n_subs=7),
+}
+
+
+@pytest.mark.parametrize("match", MATCHES.values(), ids=MATCHES.keys())
+@pytest.mark.parametrize("pos", [None, "FWD", "MID", "DEF", "GK", "unknown", np.nan])
+def test_vectorized_matches_rows(match, pos):
+    df = _match_frame(**match)
+    if pos is not None:
+        # the same stat rows through every bucket, including the MID fallback
+        df = df.assign(pos=pd.Series(pos, index=df.index, dtype=object))
+
+    vectorized = score_players(df, engine="vectorized")
+    rows = score_players(df, engine="rows")
+    pd.testing.assert_series_equal(vectorized, rows, check_exact=True)
+
+
+def test_empty_frame_scores_empty():
+    df = _match_frame().iloc[:0]
+    assert score_players(df, engine="vectorized").empty
+    assert score_players(df, engine="rows").empty
@@ -0,0 +1,68 @@
+# test_scoring_rules.py
+# ==========================================================
+#   The compiled default rule set must score exactly like
+#   the formula engine (python -m pytest test_scoring_rules.py)
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fbref_synth import generate_matches
+from scoring import (
+    STAT_MATRIX_COLUMNS,
+    _combine_team_frames,
+    _extract_team_tables_from_html,
+    _merge_team_tables,
+    score_players,
+    score_stat_matrix,
+)
+from scoring_rules import (
+    DEFAULT_RULES,
+    rules_to_frame,
+    rules_with_weights,
+    score_rule_sets,
+    score_stat_matrix_rule_sets,
+)
+
+
+@pytest.fixture(scope="module")
+def synthetic_corpus() -> pd.DataFrame:
+    """Merged player rows of 200 synthetic matches (6,400 players)."""
+    frames = []
+    for _, html in generate_matches(200):
+        tables = _extract_team_tables_from_html(html, all_stats=False)
+        frames.append(_combine_team_frames({t: _merge_team_tables(d) for t, d in tables.items()}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_default_rules_match_score_players(synthetic_corpus):
+    expected = score_players(synthetic_corpus)
+    scored = score_rule_sets(synthetic_corpus, {"default": DEFAULT_RULES})
+    mismatched = synthetic_corpus.loc[scored["default"] != expected, ["Player", "pos"]]
+    assert mismatched.empty, f"{len(mismatched)} rows differ"
+
+
+def test_default_rules_match_on_random_stats():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    mat = rng.integers(0, 12, (n, len(STAT_MATRIX_COLUMNS))).astype(float)
+    mat[:, STAT_MATRIX_COLUMNS.index("Unnamed: 5_level_0_Min")] = rng.integers(0, 95, n)
+    pos = rng.choice(["DEF", "MID", "FWD", "GK", "unknown"], n)
+
+    unedited = rules_with_weights(DEFAULT_RULES, rules_to_frame(DEFAULT_RULES)["weight"])
+    scores = score_stat_matrix_rule_sets(mat, pos, {"default": DEFAULT_RULES, "unedited": unedited})
+    expected = score_stat_matrix(mat, pos)
+    np.testing.assert_array_equal(scores[:, 0], expected)
+    np.testing.assert_array_equal(scores[:, 1], expected)
+
+
+def test_goalkeeper_edit_leaves_outfield_scores(synthetic_corpus):
+    weights = rules_to_frame(DEFAULT_RULES)
+    weights.loc[(weights["pos"] == "GK") & (weights["component"] == "saves"), "weight"] = 4.0
+    edited = rules_with_weights(DEFAULT_RULES, weights["weight"])
+
+    scores = score_rule_sets(synthetic_corpus, {"current": DEFAULT_RULES, "what_if": edited})
+    moved = scores["what_if"] != scores["current"]
+    assert not moved[synthetic_corpus["pos"] != "GK"].any()
+    assert moved[synthetic_corpus["pos"] == "GK"].any()
@@ -0,0 +1,61 @@
+# test_watch_folder.py
+# ==========================================================
+#   A watcher whose combined output lives in the watched
+#   folder must not score or rescan for its own writes
+#   (python -m pytest test_watch_folder.py)
+# ==========================================================
+
+import time
+
+import pytest
+
+from fbref_synth import generate_match_html
+from watch_folder import FolderWatcher
+
+
+class CountingWatcher(FolderWatcher):
+    polls = 0
+
+    def poll(self) -> list:
+        self.polls += 1
+        return super().poll()
+
+
+def _watch(folder, output, **kwargs) -> FolderWatcher:
+    (folder / "match1.html").write_text(generate_match_html(n_subs=0), encoding="utf-8")
+    watcher = CountingWatcher(
+        str(folder), output=str(folder / output), interval=60.0, settle=0.2,
+        workers=1, cache_dir=None, **kwargs,
+    ).start()
+    assert watcher.wait_idle(timeout=60)
+    return watcher
+
+
+def test_output_in_folder_does_not_wake_the_watcher(tmp_path):
+    pytest.importorskip("watchdog")
+    watcher = _watch(tmp_path, "hfw-scores.csv")
+    try:
+        assert watcher.mode == "watchdog"
+        time.sleep(1.0)  # let events from the first publish drain
+        polls = watcher.polls
+
+        watcher._publish(set())  # rewrite the CSV and its state file
+        time.sleep(1.0)
+        assert watcher.polls == polls
+
+        (tmp_path / "match2.html").write_text(generate_match_html(n_subs=0), encoding="utf-8")
+        time.sleep(1.0)
+        assert watcher.polls > polls  # real changes still wake it
+    finally:
+        watcher.stop()
+
+
+def test_output_with_html_suffix_is_never_scored(tmp_path):
+    watcher = _watch(tmp_path, "scores.html", use_watchdog=False)
+    try:
+        watcher.poll()
+        assert watcher.wait_idle(timeout=60)
+        assert watcher.errors == {}
+        assert watcher.combined()["Match"].unique().tolist() == ["match1.html"]
+    finally:
+        watcher.stop()
@@ -0,0 +1,461 @@
+# watch_folder.py
+# ==========================================================
+#   Watch a folder of saved FBref match reports and score each
+#   new or changed file once, keeping the combined results
+#   current – a matchday costs only its new matches
+#
+#     python watch_folder.py matchday/ -o scores.csv
+# ==========================================================
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from batch import SLIM_COLUMNS, _is_html, make_pool, score_matches
+from match_cache import DEFAULT_CACHE_DIR
+
+# seconds between folder scans (or event checks with watchdog)
+DEFAULT_INTERVAL = 2.0
+# a file's size and mtime must hold this long before it is scored, so
+# pages still being written by the browser are not picked up half-saved
+DEFAULT_SETTLE = 2.0
+
+# what a scored file looked like: its size, mtime and content hash
+FileState = namedtuple("FileState", ["size", "mtime_ns", "sha256"])
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _ChangeHandler:
+    """watchdog event handler: remembers which paths changed."""
+
+    def __init__(self, watcher):
+        self._watcher = watcher
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path:
+                self._watcher._mark_dirty(os.fsdecode(path))
+
+
+class FolderWatcher:
+    """
+    Scores every HTML match report under `folder` once, then only files
+    that are new or whose content changed; deleted files drop out of the
+    results. Changes come from watchdog when it is installed, otherwise
+    from polling every `interval` seconds. Scoring runs in a background
+    thread on a pool of worker processes.
+
+    Combined slim rows (Match = path relative to the folder) are kept in
+    memory, written to `output` after every change and – together with a
+    <output>.watch.json state file – reloaded on restart, so a restarted
+    watcher only scores what changed while it was away. `output` may live
+    inside the watched folder: the watcher's own files are never scored
+    and their writes do not wake it.
+    """
+
+    def __init__(self, folder: str, output: str = None, interval: float = DEFAULT_INTERVAL,
+                 settle: float = DEFAULT_SETTLE, workers: int = None,
+                 cache_dir=DEFAULT_CACHE_DIR, store: str = None, all_stats: bool = False,
+                 use_watchdog: bool = True, on_update=None):
+        self.folder = os.path.abspath(folder)
+        self.output = os.path.abspath(output) if output else None
+        self._own_files = set()  # relative paths of the output, state file and their temp files
+        if self.output:
+            for path in (self.output, self._state_path):
+                self._own_files.update(os.path.relpath(p, self.folder) for p in (path, path + ".tmp"))
+        self.interval = interval
+        self.settle = settle
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.store_path = store
+        self.all_stats = all_stats
+        self.on_update = on_update
+        self.errors = {}  # relative path -> error message of its last attempt
+
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._rows = {}  # relative path -> slim rows
+        self._state = {}  # relative path -> FileState it was scored from
+        self._pending = {}  # relative path -> ((size, mtime_ns), stable since)
+        self._dirty = set()
+        self._queue = queue.Queue()
+        self._inflight = {}  # relative path -> (size, mtime_ns) queued or being scored
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._pool = None
+        self._threads = []
+        self._observer = self._start_observer() if use_watchdog else None
+        self._load_previous()
+
+    # ------------------------------------------------------
+    # change detection
+    # ------------------------------------------------------
+
+    def _start_observer(self):
+        try:
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+        observer = Observer()
+        observer.schedule(_ChangeHandler(self), self.folder, recursive=True)
+        observer.start()
+        self._dirty.add(None)  # full scan first
+        return observer
+
+    @property
+    def mode(self) -> str:
+        return "watchdog" if self._observer is not None else "polling"
+
+    def _mark_dirty(self, path: str) -> None:
+        rel = os.path.relpath(path, self.folder)
+        if rel in self._own_files:
+            return  # our own output being rewritten
+        with self._lock:
+            self._dirty.add(rel)
+        self._wake.set()
+
+    def _scan(self) -> set:
+        found = set()
+        for root, _, files in os.walk(self.folder):
+            for fname in files:
+                rel = os.path.relpath(os.path.join(root, fname), self.folder)
+                if _is_html(fname) and rel not in self._own_files:
+                    found.add(rel)
+        return found
+
+    def _paths_to_check(self) -> set:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            known = set(self._state) | set(self._pending)
+        if self._observer is None or None in dirty:
+            return self._scan() | known
+        return {p for p in dirty if _is_html(p)} | set(self._pending)
+
+    def poll(self) -> list:
+        """
+        One detection pass: queue files whose size and mtime have held
+        for `settle` seconds and differ from what was scored, and drop
+        deleted ones. Returns the relative paths queued.
+        """
+        now = time.monotonic()
+        ready, removed = [], []
+        for rel in sorted(self._paths_to_check()):
+            try:
+                st = os.stat(os.path.join(self.folder, rel))
+            except FileNotFoundError:
+                self._pending.pop(rel, None)
+                if rel in self._state:
+                    removed.append(rel)
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            done = self._state.get(rel)
+            scored = done is not None and (done.size, done.mtime_ns) == sig
+            if scored or self._inflight.get(rel) == sig:
+                self._pending.pop(rel, None)
+                continue
+            seen = self._pending.get(rel)
+            untouched = time.time_ns() - st.st_mtime_ns >= self.settle * 1e9
+            if (seen is None and untouched) or (
+                seen is not None and seen[0] == sig and now - seen[1] >= self.settle
+            ):
+                self._pending.pop(rel, None)
+                if st.st_size > 0:  # an empty file is a save that never started
+                    ready.append((rel, sig))
+            elif seen is None or seen[0] != sig:
+                self._pending[rel] = (sig, now)  # new or still being written
+
+        if removed:
+            with self._lock:
+                for rel in removed:
+                    self._rows.pop(rel, None)
+                    self._state.pop(rel, None)
+                    self.errors.pop(rel, None)
+            self._publish(removed)
+        if ready:
+            with self._lock:
+                self._inflight.update(ready)
+            for item in ready:
+                self._queue.put(item)
+        return [rel for rel, _ in ready]
+
+    # ------------------------------------------------------
+    # scoring (background thread)
+    # ------------------------------------------------------
+
+    def _score_loop(self) -> None:
+        store = metadata = None
+        if self.store_path:
+            from season_store import SeasonStore, match_metadata as metadata
+
+            store = SeasonStore(self.store_path)  # sqlite objects stay in this thread
+        try:
+            while not self._stop.is_set():
+                try:
+                    batch = [self._queue.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._score_batch(batch, store, metadata)
+                except Exception as e:  # e.g. a worker process died
+                    self._batch_failed(batch, e)
+                finally:
+                    with self._lock:
+                        for rel, _ in batch:
+                            self._inflight.pop(rel, None)
+        finally:
+            if store is not None:
+                store.close()
+
+    def _score_batch(self, batch, store, match_metadata) -> None:
+        todo = []
+        for rel, (size, mtime_ns) in batch:
+            path = os.path.join(self.folder, rel)
+            try:
+                sha = _file_sha256(path)
+            except OSError:
+                continue  # gone again; the next poll notices
+            done = self._state.get(rel)
+            if done is not None and done.sha256 == sha:
+                # saved again with the same content: nothing to rescore
+                with self._lock:
+                    self._state[rel] = FileState(size, mtime_ns, sha)
+                continue
+            todo.append((rel, FileState(size, mtime_ns, sha)))
+        if not todo:
+            with self._publish_lock:
+                self._save_state()
+            return
+
+        if self._pool is None:
+            self._pool = make_pool(self.workers)
+        items = [(rel, pathlib.Path(self.folder, rel)) for rel, _ in todo]
+        changed = []
+        for r in score_matches(items, cache_dir=self.cache_dir, pool=self._pool,
+                               full=store is not None, all_stats=self.all_stats):
+            rel, state = todo[r.index]
+            with self._lock:
+                self._state[rel] = state  # failed files are retried once they change
+                if r.error is not None:
+                    self.errors[rel] = str(r.error)
+                    self._rows.pop(rel, None)
+                else:
+                    self.errors.pop(rel, None)
+                    self._rows[rel] = r.df[SLIM_COLUMNS].sort_values("score", ascending=False)
+            if r.error is None and store is not None:
+                store.add_scored_match(
+                    match_metadata(pathlib.Path(self.folder, rel)), r.df, source=rel
+                )
+            changed.append(rel)
+        self._publish(changed)
+
+    def _batch_failed(self, batch, error: Exception) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None  # a fresh pool for the next batch
+        with self._lock:
+            for rel, (size, mtime_ns) in batch:
+                # retried once the file changes again
+                self._state[rel] = FileState(size, mtime_ns, None)
+                self.errors[rel] = f"{type(error).__name__}: {error}"
+                self._rows.pop(rel, None)
+        self._publish([rel for rel, _ in batch])
+
+    # ------------------------------------------------------
+    # results
+    # ------------------------------------------------------
+
+    def combined(self) -> pd.DataFrame:
+        """Every scored player row, by match path then score."""
+        with self._lock:
+            frames = [self._rows[rel] for rel in sorted(self._rows)]
+        if not frames:
+            return pd.DataFrame(columns=SLIM_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "matches": len(self._rows),
+                "failed": len(self.errors),
+                "waiting": len(self._pending),
+                "scoring": len(self._inflight),
+            }
+
+    @property
+    def _state_path(self) -> str:
+        return self.output + ".watch.json"
+
+    def _save_state(self) -> None:
+        if not self.output:
+            return
+        with self._lock:
+            state = {rel: list(s) for rel, s in self._state.items() if rel in self._rows}
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"folder": self.folder, "files": state}, f)
+        os.replace(tmp, self._state_path)
+
+    def _publish(self, changed) -> None:
+        with self._publish_lock:
+            if self.output:
+                tmp = self.output + ".tmp"
+                self.combined().to_csv(tmp, index=False, encoding="utf-8-sig")
+                os.replace(tmp, self.output)
+                self._save_state()
+            if self.on_update is not None:
+                self.on_update(changed)
+
+    def _load_previous(self) -> None:
+        if not self.output or not os.path.exists(self.output):
+            return
+        try:
+            with open(self._state_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            rows = pd.read_csv(self.output, encoding="utf-8-sig")
+        except (OSError, ValueError):
+            return
+        if saved.get("folder") != self.folder:
+            return
+        by_match = dict(tuple(rows.groupby("Match", sort=False)))
+        for rel, state in saved["files"].items():
+            if rel in by_match:
+                self._state[rel] = FileState(*state)
+                self._rows[rel] = by_match[rel][SLIM_COLUMNS].reset_index(drop=True)
+
+    # ------------------------------------------------------
+    # lifecycle
+    # ------------------------------------------------------
+
+    def start(self) -> "FolderWatcher":
+        """Detect and score in background threads until stop()."""
+        self.poll()  # files already in the folder are picked up before returning
+        scorer = threading.Thread(target=self._score_loop, name="watch-score", daemon=True)
+        detector = threading.Thread(target=self._detect_loop, name="watch-detect", daemon=True)
+        self._threads = [scorer, detector]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def _detect_loop(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            # with watchdog, wake early on events; pending files are rechecked each tick
+            self._wake.wait(min(self.interval, self.settle / 2) if self._pending else self.interval)
+            self._wake.clear()
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not self._pending and not self._inflight
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until no file is waiting to settle or being scored."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.idle():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+# ----------------------------------------------------------
+# command line entry point
+# ----------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Watch a folder of saved FBref match reports and keep a combined score CSV."
+    )
+    parser.add_argument("folder")
+    parser.add_argument("-o", "--output", required=True, help="combined CSV, rewritten on change")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between checks (default %(default)s)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help="seconds a file must stay unchanged before scoring (default %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--store", metavar="DB", help="also append new matches to this season store")
+    parser.add_argument("--all-stats", action="store_true",
+                        help="store every FBref stat column, not just the ones scoring reads")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the parse cache")
+    parser.add_argument("--polling", action="store_true", help="poll even if watchdog is installed")
+    parser.add_argument("--once", action="store_true",
+                        help="score what is in the folder now, then exit")
+    args = parser.parse_args(argv)
+
+    def report(changed):
+        s = watcher.status()
+        for rel in changed:
+            if rel in watcher.errors:
+                print(f"❌ {rel}: {watcher.errors[rel]}", file=sys.stderr)
+            else:
+                print(f"📄 {rel}", file=sys.stderr)
+        print(f"✅ {s['matches']} match(es) in {args.output}", file=sys.stderr)
+
+    watcher = FolderWatcher(
+        args.folder, args.output, interval=args.interval, settle=args.settle,
+        workers=args.workers, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+        store=args.store, all_stats=args.all_stats, use_watchdog=not args.polling,
+        on_update=report,
+    )
+    print(
+        f"👀 Watching {watcher.folder} ({watcher.mode}); "
+        f"{watcher.status()['matches']} match(es) already scored",
+        file=sys.stderr,
+    )
+    watcher.start()
+    try:
+        if args.once:
+            watcher.wait_idle()
+        else:
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 1 if watcher.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())